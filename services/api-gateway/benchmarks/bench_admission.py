@@ -0,0 +1,75 @@
+# API gateway admission control overhead benchmark
+"""Measure the per-request cost of AdmissionMiddleware.
+
+Usage (from services/api-gateway):
+    python -m benchmarks.bench_admission [--requests 50000] [--clients 1000]
+
+A trivial FastAPI route is called straight through its ASGI interface,
+once bare and once behind the middleware with local token buckets, so the
+difference is the admission decision plus the in-flight bookkeeping.
+``--clients`` spreads the requests over that many client addresses.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from src.core.admission import AdmissionController, AdmissionMiddleware
+from src.core.config import Settings
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/api/v1/rag/ping")
+    async def ping():
+        return {"ok": True}
+    return app
+
+async def drive(app, requests, clients):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    statuses = {}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses[message["status"]] = statuses.get(message["status"], 0) + 1
+
+    scopes = [
+        {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/api/v1/rag/ping", "raw_path": b"/api/v1/rag/ping",
+            "root_path": "", "query_string": b"", "headers": [(b"host", b"gateway")],
+            "client": (f"10.0.{i // 256}.{i % 256}", 50000), "server": ("gateway", 80),
+        }
+        for i in range(clients)
+    ]
+    for i in range(1000):
+        await app(dict(scopes[i % clients]), receive, send)
+    statuses.clear()
+    started = time.perf_counter()
+    for i in range(requests):
+        await app(dict(scopes[i % clients]), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6, statuses
+
+async def main_async(args):
+    bare_us, _ = await drive(make_app(), args.requests, args.clients)
+    settings = Settings(ADMISSION_CLASSES={
+        "interactive": {"rate": 1e9, "burst": 1e9, "max_in_flight": 1e9, "shed_at": 1.0},
+    })
+    controller = AdmissionController(settings)
+    limited_us, statuses = await drive(AdmissionMiddleware(make_app(), controller), args.requests, args.clients)
+    print(f"bare route:         {bare_us:7.1f} us/request")
+    print(f"with admission:     {limited_us:7.1f} us/request ({statuses})")
+    print(f"overhead:           {limited_us - bare_us:7.1f} us/request")
+    print(f"decision (in-band): {controller.stats()['avg_decision_us']:7.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--clients", type=int, default=1000)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
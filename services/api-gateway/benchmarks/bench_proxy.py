@@ -0,0 +1,105 @@
+# API gateway proxy mode benchmark
+"""Compare gateway CPU time and memory per request for PROXY_MODE=json and stream.
+
+Usage (from services/api-gateway):
+    python -m benchmarks.bench_proxy [--papers 50] [--abstract-chars 20000]
+                                     [--requests 200] [--concurrency 10]
+
+The upstream is an in-process mock serving a JSON list of ``--papers``
+paper-sized objects in 64 KiB chunks, and the gateway runs in-process
+behind ``httpx.ASGITransport``, so the numbers isolate the gateway's own
+work. CPU and throughput are measured without tracing; memory is the
+traced peak above baseline of single requests run one after another. The
+test client buffers every response, which adds the body size to both.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+
+import httpx
+
+from src.core.http import upstreams
+from src.main import app
+
+CHUNK = 64 * 1024
+
+def make_payload(papers, abstract_chars):
+    return json.dumps([
+        {
+            "pmid": str(30000000 + i),
+            "title": f"Paper {i}",
+            "abstract": "lorem ipsum dolor sit amet " * (abstract_chars // 27),
+            "authors": [{"name": f"Author {j}"} for j in range(10)],
+        }
+        for i in range(papers)
+    ]).encode("utf-8")
+
+def mock_upstream(payload):
+    async def chunks():
+        for start in range(0, len(payload), CHUNK):
+            yield payload[start:start + CHUNK]
+
+    def handler(request):
+        return httpx.Response(200, content=chunks(), headers={"content-type": "application/json"})
+    return httpx.MockTransport(handler)
+
+async def run_mode(mode, payload, requests, concurrency, memory_samples=10):
+    upstreams.settings.PROXY_MODE = mode
+    upstreams.clients["ingestion"] = httpx.AsyncClient(base_url="http://ingestion", transport=mock_upstream(payload))
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://gateway") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get("/api/v1/ingest/jobs")
+                assert response.status_code == 200 and len(response.content) > len(payload) // 2
+
+        await one()
+        cpu, wall = time.process_time(), time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+        # Client responses sit in reference cycles, collect them between samples
+        peak = 0
+        tracemalloc.start()
+        for _ in range(memory_samples):
+            gc.collect()
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await one()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+    await upstreams.clients["ingestion"].aclose()
+    return {
+        "mode": mode,
+        "cpu_ms_per_request": cpu / requests * 1000,
+        "requests_per_second": requests / wall,
+        "peak_mib": peak / 2 ** 20,
+    }
+
+async def main_async(args):
+    payload = make_payload(args.papers, args.abstract_chars)
+    print(f"payload {len(payload) / 2 ** 20:.1f} MiB, {args.requests} requests, concurrency {args.concurrency}")
+    upstreams.start()
+    try:
+        for mode in ("json", "stream"):
+            result = await run_mode(mode, payload, args.requests, args.concurrency)
+            print(
+                f"{result['mode']:>6}: {result['cpu_ms_per_request']:7.2f} ms CPU/request, "
+                f"{result['requests_per_second']:7.1f} req/s, peak {result['peak_mib']:7.1f} MiB/request"
+            )
+    finally:
+        await upstreams.aclose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=int, default=50)
+    parser.add_argument("--abstract-chars", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import hashlib
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # a shared rate limit backend is optional
+    redis_asyncio = None
+
+from .config import Settings, get_settings
+from .http import UpstreamClients, upstreams
+
+logger = logging.getLogger(__name__)
+
+# Requests to these paths are never limited
+EXEMPT_PATHS = ("/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+# Upstream each gateway path is proxied to, for shedding when its pool is exhausted
+UPSTREAM_PREFIXES = (
+    ("/api/v1/ingest", "ingestion"),
+    ("/api/v1/citations", "ingestion"),
+    ("/api/v1/papers", "ingestion"),
+    ("/api/v1/process", "processor"),
+    ("/api/v1/entities", "processor"),
+    ("/api/v1/rag", "rag"),
+)
+
+_TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+class LocalBuckets:
+    """Token buckets held in this process, keyed by class and client"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def take(self, key: str, rate: float, burst: float) -> float:
+        """Take one token; returns 0 when admitted, else seconds until a token is free"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        if len(self._buckets) >= self.max_keys and key not in self._buckets:
+            self._prune(now, rate, burst)
+        self._buckets[key] = (tokens, now)
+        return wait
+
+    def _prune(self, now: float, rate: float, burst: float) -> None:
+        # Buckets idle long enough to have refilled carry no state
+        idle = burst / rate
+        self._buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self._buckets.items()
+            if now - updated < idle
+        }
+
+class RedisBuckets:
+    """Token buckets shared by all gateway replicas through Redis.
+
+    Refill is computed from the Redis server clock inside one script call,
+    so replicas never disagree on time. If Redis is unreachable the local
+    buckets take over until it answers again.
+    """
+
+    def __init__(self, url: str, fallback: LocalBuckets):
+        if redis_asyncio is None:
+            raise RuntimeError("ADMISSION_REDIS_URL is set but the redis package is not installed")
+        self.client = redis_asyncio.from_url(url)
+        self.script = self.client.register_script(_TOKEN_BUCKET_SCRIPT)
+        self.fallback = fallback
+        self.errors = 0
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        try:
+            return float(await self.script(keys=[f"gateway:bucket:{key}"], args=[rate, burst]))
+        except Exception as e:
+            self.errors += 1
+            if self.errors == 1 or self.errors % 1000 == 0:
+                logger.warning(f"Rate limit backend unavailable, using local buckets: {str(e)}")
+            return self.fallback.take(key, rate, burst)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+class AdmissionController:
+    """Decides per request whether to admit, rate limit (429) or shed (503).
+
+    Every route belongs to a priority class, by default ``interactive``.
+    Each class has a token bucket per client (API key, else IP), a cap on
+    its requests in flight and ``shed_at``, the fraction of the gateway
+    wide ``max_in_flight`` above which the class is shed, so bulk work
+    gives way to interactive queries first. Routes can add their own
+    concurrency cap, and requests are shed while their upstream's
+    connection pool is exhausted. In-flight counts are per replica.
+    """
+
+    def __init__(self, settings: Settings, upstream_clients: Optional[UpstreamClients] = None):
+        self.settings = settings
+        self.upstreams = upstream_clients
+        self.classes = settings.ADMISSION_CLASSES
+        self.max_in_flight = settings.ADMISSION_MAX_IN_FLIGHT
+        # Longest prefix first so specific routes win
+        routes = []
+        for key, rule in settings.ADMISSION_ROUTES.items():
+            method, prefix = key.split(" ", 1)
+            routes.append((method.upper(), prefix, rule))
+        self.routes = sorted(routes, key=lambda route: -len(route[1]))
+        self.local = LocalBuckets()
+        self.buckets = None
+        self.in_flight = 0
+        self.class_in_flight = {name: 0 for name in self.classes}
+        self.route_in_flight: Dict[str, int] = {}
+        self._stats = {
+            name: {"admitted": 0, "rate_limited": 0, "shed": 0} for name in self.classes
+        }
+        self._decisions = 0
+        self._decision_ns = 0
+
+    async def start(self) -> None:
+        if self.settings.ADMISSION_REDIS_URL:
+            self.buckets = RedisBuckets(self.settings.ADMISSION_REDIS_URL, self.local)
+            logger.info("Admission control sharing rate limits through Redis")
+
+    async def aclose(self) -> None:
+        if self.buckets is not None:
+            await self.buckets.aclose()
+            self.buckets = None
+
+    def route(self, method: str, path: str) -> Tuple[str, Optional[str], Dict[str, Any]]:
+        """Priority class, matched route key and rule of a request"""
+        for route_method, prefix, rule in self.routes:
+            if method == route_method and path.startswith(prefix):
+                return rule.get("class", "interactive"), f"{route_method} {prefix}", rule
+        return "interactive", None, {}
+
+    def client_key(self, scope: Dict[str, Any]) -> str:
+        headers = dict(scope.get("headers") or [])
+        api_key = headers.get(b"x-api-key")
+        if api_key:
+            # Keys are hashed so they never end up in Redis or logs
+            return "key:" + hashlib.sha256(api_key).hexdigest()[:32]
+        forwarded = headers.get(b"x-forwarded-for")
+        if forwarded and self.settings.ADMISSION_TRUST_FORWARDED:
+            return "ip:" + forwarded.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    def _upstream_saturated(self, path: str) -> bool:
+        if self.upstreams is None:
+            return False
+        for prefix, upstream in UPSTREAM_PREFIXES:
+            if path.startswith(prefix):
+                return self.upstreams.in_flight(upstream) >= self.settings.UPSTREAM_MAX_CONNECTIONS
+        return False
+
+    async def admit(self, scope: Dict[str, Any]) -> Tuple[Optional[Tuple[int, str, float]], Optional[Tuple]]:
+        """Returns (rejection, ticket).
+
+        A rejection is (status, detail, retry_after). A ticket is handed back
+        to ``release`` when the admitted request is done.
+        """
+        started = time.perf_counter_ns()
+        try:
+            name, route, rule = self.route(scope["method"], scope["path"])
+            limits = self.classes.get(name) or self.classes["interactive"]
+            stats = self._stats.setdefault(name, {"admitted": 0, "rate_limited": 0, "shed": 0})
+
+            # Shedding first, it needs no bucket round trip
+            route_cap = rule.get("max_in_flight")
+            if (
+                self.in_flight >= self.max_in_flight * limits.get("shed_at", 1.0)
+                or self.class_in_flight.get(name, 0) >= limits.get("max_in_flight", math.inf)
+                or (route_cap is not None and self.route_in_flight.get(route, 0) >= route_cap)
+                or self._upstream_saturated(scope["path"])
+            ):
+                stats["shed"] += 1
+                return (503, f"Gateway is at capacity for {name} requests", limits.get("retry_after", 1)), None
+
+            rate, burst = limits.get("rate"), limits.get("burst", 1)
+            wait = 0.0
+            if rate:
+                key = f"{name}:{self.client_key(scope)}"
+                if self.buckets is not None:
+                    wait = await self.buckets.take(key, rate, burst)
+                else:
+                    wait = self.local.take(key, rate, burst)
+            if wait > 0:
+                stats["rate_limited"] += 1
+                return (429, f"Rate limit exceeded for {name} requests", wait), None
+
+            stats["admitted"] += 1
+            self.in_flight += 1
+            self.class_in_flight[name] = self.class_in_flight.get(name, 0) + 1
+            if route is not None:
+                self.route_in_flight[route] = self.route_in_flight.get(route, 0) + 1
+            return None, (name, route)
+        finally:
+            self._decisions += 1
+            self._decision_ns += time.perf_counter_ns() - started
+
+    def release(self, ticket: Tuple) -> None:
+        name, route = ticket
+        self.in_flight -= 1
+        self.class_in_flight[name] -= 1
+        if route is not None:
+            self.route_in_flight[route] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "classes": {
+                name: {**counters, "in_flight": self.class_in_flight.get(name, 0)}
+                for name, counters in self._stats.items()
+            },
+            "routes_in_flight": dict(self.route_in_flight),
+            "backend": "redis" if self.buckets is not None else "local",
+            "backend_errors": self.buckets.errors if self.buckets is not None else 0,
+            "decisions": self._decisions,
+            "avg_decision_us": self._decision_ns / self._decisions / 1000 if self._decisions else 0.0,
+        }
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying an ``AdmissionController``.
+
+    Rejections are answered before the request reaches routing, and the
+    in-flight slot of an admitted request is held until its response,
+    streamed or not, has been sent.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.controller.settings.ADMISSION_ENABLED \
+                or scope["path"] in EXEMPT_PATHS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        rejection, ticket = await self.controller.admit(scope)
+        if rejection is not None:
+            status, detail, retry_after = rejection
+            await self._reject(send, status, detail, retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(ticket)
+
+    @staticmethod
+    async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+admission = AdmissionController(get_settings(), upstreams)
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    body: bytes
+    media_type: Optional[str]
+    # Upstream headers that are part of the payload, e.g. pagination cursors
+    headers: Dict[str, str]
+
+def cache_key(upstream: str, method: str, path: str, params: Any = None, json_body: Any = None) -> str:
+    """Stable key for a proxied call; JSON bodies and params are compared canonically"""
+    canonical = json.dumps(
+        [upstream, method.upper(), path, params or {}, json_body],
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """TTL and LRU bounded cache of raw upstream responses with single-flight loads.
+
+    Entries hold the upstream body bytes, so a hit is served without
+    decoding or re-encoding JSON. Concurrent misses for one key share a
+    single upstream call; the call runs as its own task so a caller that
+    disconnects does not cancel it for the others. Only 2xx responses are
+    stored, errors are shared with the waiting callers and then dropped.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 10000, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "stores": 0, "evictions": 0, "expirations": 0}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ResponseCache":
+        return cls(
+            max_bytes=settings.CACHE_MAX_BYTES,
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            enabled=settings.CACHE_ENABLED
+        )
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self._stats["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: CachedResponse, ttl: float) -> None:
+        size = len(response.body)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, response)
+        self._bytes += size
+        self._stats["stores"] += 1
+        while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1].body)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    async def fetch(
+        self,
+        key: str,
+        ttl: float,
+        load: Callable[[], Awaitable[CachedResponse]],
+        refresh: bool = False
+    ) -> Tuple[CachedResponse, str]:
+        """The cached response for ``key`` or the result of one shared ``load``.
+
+        Returns the response and how it was served: HIT, MISS or COALESCED.
+        ``refresh`` skips the lookup but still joins a load in flight.
+        """
+        if not self.enabled:
+            return await load(), "BYPASS"
+        if not refresh:
+            cached = self.get(key)
+            if cached is not None:
+                self._stats["hits"] += 1
+                return cached, "HIT"
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(task), "COALESCED"
+
+        self._stats["misses"] += 1
+        task = asyncio.ensure_future(self._load(key, ttl, load))
+        self._inflight[key] = task
+        return await asyncio.shield(task), "MISS"
+
+    async def _load(self, key: str, ttl: float, load: Callable[[], Awaitable[CachedResponse]]) -> CachedResponse:
+        try:
+            response = await load()
+            if 200 <= response.status_code < 300:
+                self.put(key, response, ttl)
+            return response
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "in_flight": len(self._inflight),
+            "hit_ratio": (self._stats["hits"] + self._stats["coalesced"]) / lookups if lookups else 0.0,
+            **self._stats,
+        }
+
+response_cache = ResponseCache.from_settings(get_settings())
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Any, Dict
 
 class Settings(BaseSettings):
     # App Configuration
@@ -10,6 +11,76 @@ class Settings(BaseSettings):
     DATA_INGESTION_URL: str = "http://localhost:8001"
     DOCUMENT_PROCESSOR_URL: str = "http://localhost:8002"
     RAG_SERVICE_URL: str = "http://localhost:8003"
+
+    # Upstream connection pools, one per service
+    UPSTREAM_MAX_CONNECTIONS: int = 100
+    UPSTREAM_MAX_KEEPALIVE: int = 20
+    UPSTREAM_KEEPALIVE_EXPIRY: float = 30.0
+    UPSTREAM_HTTP2: bool = False
+    UPSTREAM_CONNECT_TIMEOUT: float = 5.0
+    UPSTREAM_TIMEOUT: float = 30.0
+    # "stream" relays upstream bodies byte for byte, "json" decodes and re-encodes them
+    PROXY_MODE: str = "stream"
+    # Read timeouts by route name, JSON in the environment
+    UPSTREAM_ROUTE_TIMEOUTS: Dict[str, float] = {
+        "ingest.create": 30.0,
+        "ingest.jobs": 10.0,
+        "process.document": 120.0,
+        "rag.index": 600.0,
+        "rag.query": 60.0,
+        "citations": 30.0,
+        "entities": 10.0,
+        "papers": 10.0,
+        "pipeline.process": 600.0,
+        "pipeline.index": 300.0,
+    }
+
+    # Response cache for idempotent proxied calls
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_MAX_ENTRIES: int = 10000
+    # Seconds a response is kept, by route name; routes not listed are only coalesced
+    CACHE_TTLS: Dict[str, float] = {
+        "rag.query": 300.0,
+        "papers": 3600.0,
+        "papers.list": 30.0,
+        "papers.search": 60.0,
+    }
+
+    # Admission control: per-client token buckets (requests/second and burst),
+    # per-class in-flight caps and shedding once gateway load passes shed_at
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_IN_FLIGHT: int = 500
+    ADMISSION_CLASSES: Dict[str, Dict[str, float]] = {
+        "interactive": {"rate": 20.0, "burst": 40.0, "max_in_flight": 400, "shed_at": 1.0},
+        "bulk": {"rate": 0.2, "burst": 3.0, "max_in_flight": 8, "shed_at": 0.5, "retry_after": 30},
+    }
+    # "METHOD /path-prefix" to priority class and an optional concurrency cap
+    ADMISSION_ROUTES: Dict[str, Dict[str, Any]] = {
+        "POST /api/v1/rag/index": {"class": "bulk", "max_in_flight": 1},
+        "POST /api/v1/ingest": {"class": "bulk", "max_in_flight": 4},
+        # Per-paper processing is the normal client flow; the cap only bounds processor load
+        "POST /api/v1/process": {"class": "interactive", "max_in_flight": 16},
+        "POST /api/v1/citations/resolve": {"class": "bulk", "max_in_flight": 1},
+        "POST /api/v1/entities/index/refresh": {"class": "bulk", "max_in_flight": 1},
+        "POST /api/v1/pipeline": {"class": "bulk", "max_in_flight": 2},
+        "POST /api/v1/rag/query": {"class": "interactive", "max_in_flight": 100},
+    }
+    # Share rate limits between replicas, e.g. redis://redis:6379/0
+    ADMISSION_REDIS_URL: str = ""
+    # Rate limit by the first X-Forwarded-For address when behind a trusted proxy
+    ADMISSION_TRUST_FORWARDED: bool = False
+
+    # Ingest -> process -> index pipelines: PMIDs per batch, workers per stage,
+    # batches queued between stages before the earlier stage waits
+    PIPELINE_BATCH_SIZE: int = 25
+    PIPELINE_PROCESS_CONCURRENCY: int = 4
+    PIPELINE_INDEX_CONCURRENCY: int = 1
+    PIPELINE_QUEUE_SIZE: int = 4
+    PIPELINE_POLL_INTERVAL: float = 2.0
+    PIPELINE_MAX_RUNNING: int = 4
+    # Finished pipelines kept for status lookups
+    PIPELINE_MAX_JOBS: int = 100
     
     class Config:
         case_sensitive = True
@@ -0,0 +1,255 @@
+import importlib.util
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from .cache import CachedResponse, cache_key, response_cache
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Upstream response headers kept with cached bodies
+CACHED_HEADERS = ("x-next-cursor",)
+
+PROXY_MODES = ("stream", "json")
+
+# Connection-level headers that describe one hop and must not be relayed
+HOP_BY_HOP_HEADERS = frozenset((
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade",
+))
+
+def upstream_error(upstream: str, e: Exception) -> HTTPException:
+    """The gateway's answer to a failed upstream call"""
+    if isinstance(e, httpx.HTTPStatusError):
+        return HTTPException(status_code=e.response.status_code, detail=str(e))
+    if isinstance(e, httpx.TimeoutException):
+        return HTTPException(status_code=504, detail=f"{upstream} timed out: {str(e)}")
+    if isinstance(e, httpx.TransportError):
+        return HTTPException(status_code=502, detail=f"{upstream} unreachable: {str(e)}")
+    return HTTPException(status_code=500, detail=str(e))
+
+class UpstreamClients:
+    """One long-lived, pooled ``httpx.AsyncClient`` per upstream service.
+
+    Clients are opened in the app lifespan and reused by every request, so
+    proxied calls run over kept-alive connections instead of paying TCP
+    setup each time. Each upstream also keeps request counters for
+    ``/metrics``.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.base_urls = {
+            "ingestion": settings.DATA_INGESTION_URL,
+            "processor": settings.DOCUMENT_PROCESSOR_URL,
+            "rag": settings.RAG_SERVICE_URL,
+        }
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats = {
+            name: {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0, "total_seconds": 0.0}
+            for name in self.base_urls
+        }
+
+    def start(self) -> None:
+        settings = self.settings
+        limits = httpx.Limits(
+            max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY
+        )
+        http2 = settings.UPSTREAM_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("UPSTREAM_HTTP2 is set but h2 is not installed, using HTTP/1.1")
+            http2 = False
+        for name, base_url in self.base_urls.items():
+            self.clients[name] = httpx.AsyncClient(
+                base_url=base_url,
+                limits=limits,
+                http2=http2,
+                timeout=httpx.Timeout(settings.UPSTREAM_TIMEOUT, connect=settings.UPSTREAM_CONNECT_TIMEOUT)
+            )
+        logger.info(
+            f"Upstream pools ready: {settings.UPSTREAM_MAX_CONNECTIONS} connections, "
+            f"{settings.UPSTREAM_MAX_KEEPALIVE} keep-alive per upstream, http2={http2}"
+        )
+
+    async def aclose(self) -> None:
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients = {}
+
+    def in_flight(self, upstream: str) -> int:
+        return self._stats[upstream]["in_flight"]
+
+    def timeout(self, route: str) -> float:
+        return self.settings.UPSTREAM_ROUTE_TIMEOUTS.get(route, self.settings.UPSTREAM_TIMEOUT)
+
+    def client(self, upstream: str) -> httpx.AsyncClient:
+        if upstream not in self.clients:
+            raise RuntimeError("Upstream clients are not started")
+        return self.clients[upstream]
+
+    async def request(
+        self,
+        upstream: str,
+        method: str,
+        path: str,
+        route: Optional[str] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """Send a request over the upstream's pool with the route's timeout"""
+        client = self.client(upstream)
+        if route is not None and "timeout" not in kwargs:
+            kwargs["timeout"] = httpx.Timeout(self.timeout(route), connect=self.settings.UPSTREAM_CONNECT_TIMEOUT)
+        stats = self._stats[upstream]
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        started = time.perf_counter()
+        try:
+            return await client.request(method, path, **kwargs)
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["in_flight"] -= 1
+            stats["total_seconds"] += time.perf_counter() - started
+
+    async def forward(self, upstream: str, method: str, path: str, route: Optional[str] = None, **kwargs) -> Any:
+        """Proxy a call and return its JSON body, passing upstream errors through"""
+        try:
+            response = await self.request(upstream, method, path, route, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            raise upstream_error(upstream, e)
+
+    async def proxy(self, upstream: str, method: str, path: str, route: Optional[str] = None, **kwargs) -> Any:
+        """Relay a call in the configured PROXY_MODE.
+
+        ``stream`` passes the upstream status, headers and body bytes through
+        chunk by chunk without decoding them; upstream errors reach the client
+        unchanged. ``json`` decodes the body like ``forward``.
+        """
+        if self.settings.PROXY_MODE == "json":
+            return await self.forward(upstream, method, path, route, **kwargs)
+        return await self.stream(upstream, method, path, route, **kwargs)
+
+    async def stream(self, upstream: str, method: str, path: str, route: Optional[str] = None, **kwargs) -> Response:
+        client = self.client(upstream)
+        if route is not None and "timeout" not in kwargs:
+            kwargs["timeout"] = httpx.Timeout(self.timeout(route), connect=self.settings.UPSTREAM_CONNECT_TIMEOUT)
+        # Raw bytes are relayed, so the upstream must not compress for a client that may not accept it
+        headers = {**kwargs.pop("headers", {}), "Accept-Encoding": "identity"}
+        request = client.build_request(method, path, headers=headers, **kwargs)
+
+        stats = self._stats[upstream]
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        started = time.perf_counter()
+        try:
+            response = await client.send(request, stream=True)
+        except Exception as e:
+            stats["errors"] += 1
+            stats["in_flight"] -= 1
+            stats["total_seconds"] += time.perf_counter() - started
+            raise upstream_error(upstream, e)
+
+        async def body():
+            # The connection returns to the pool once the body is read or the client goes away
+            try:
+                if response.is_stream_consumed:
+                    # Transports and hooks may have read the body already
+                    yield response.content
+                else:
+                    async for chunk in response.aiter_raw():
+                        yield chunk
+            finally:
+                await response.aclose()
+                stats["in_flight"] -= 1
+                stats["total_seconds"] += time.perf_counter() - started
+
+        return StreamingResponse(
+            body(),
+            status_code=response.status_code,
+            headers={
+                name: value for name, value in response.headers.items()
+                if name.lower() not in HOP_BY_HOP_HEADERS
+            }
+        )
+
+    async def forward_cached(
+        self,
+        upstream: str,
+        method: str,
+        path: str,
+        route: str,
+        refresh: bool = False,
+        **kwargs
+    ) -> Response:
+        """Proxy an idempotent call through the response cache.
+
+        The route's CACHE_TTLS entry sets how long a 2xx body is kept; routes
+        without one are still coalesced but not stored. The X-Cache header
+        tells whether the body was a HIT, a MISS or COALESCED with another
+        request's call.
+        """
+        key = cache_key(upstream, method, path, kwargs.get("params"), kwargs.get("json"))
+
+        async def load() -> CachedResponse:
+            response = await self.request(upstream, method, path, route, **kwargs)
+            return CachedResponse(
+                status_code=response.status_code,
+                body=response.content,
+                media_type=response.headers.get("content-type"),
+                headers={name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+            )
+
+        try:
+            cached, outcome = await response_cache.fetch(
+                key, self.settings.CACHE_TTLS.get(route, 0), load, refresh=refresh
+            )
+        except Exception as e:
+            raise upstream_error(upstream, e)
+        if cached.status_code >= 400:
+            detail = cached.body.decode("utf-8", "replace")
+            try:
+                detail = json.loads(detail).get("detail", detail)
+            except (ValueError, AttributeError):
+                pass
+            raise HTTPException(status_code=cached.status_code, detail=detail)
+        return Response(
+            content=cached.body,
+            status_code=cached.status_code,
+            media_type=cached.media_type,
+            headers={**cached.headers, "X-Cache": outcome}
+        )
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Request counters and connection pool usage per upstream"""
+        metrics = {}
+        for name, stats in self._stats.items():
+            upstream = dict(stats)
+            upstream["avg_ms"] = stats["total_seconds"] / stats["requests"] * 1000 if stats["requests"] else 0.0
+            # httpcore keeps the live connections on the transport's pool
+            pool = getattr(getattr(self.clients.get(name), "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            idle = sum(1 for connection in connections if connection.is_idle())
+            upstream["pool"] = {
+                "connections": len(connections),
+                "idle": idle,
+                "active": len(connections) - idle,
+                "max_connections": self.settings.UPSTREAM_MAX_CONNECTIONS,
+                "utilization": (len(connections) - idle) / self.settings.UPSTREAM_MAX_CONNECTIONS,
+            }
+            metrics[name] = upstream
+        return metrics
+
+upstreams = UpstreamClients(get_settings())
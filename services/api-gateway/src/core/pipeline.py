@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import HTTPException
+
+from .config import Settings, get_settings
+from .http import UpstreamClients, upstreams
+
+logger = logging.getLogger(__name__)
+
+class StageStats:
+    """Counters of one pipeline stage, reported in the job status"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.received = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.batches = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+        # Time spent waiting for room in the next stage's queue
+        self.blocked_seconds = 0.0
+        self.last_error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def begin(self, items: int) -> float:
+        now = time.monotonic()
+        if self.started_at is None:
+            self.started_at = now
+        self.received += items
+        self.in_flight += items
+        return now
+
+    def end(self, items: int, started: float, failed: bool = False, skipped: int = 0) -> None:
+        self.in_flight -= items
+        self.batches += 1
+        self.busy_seconds += time.monotonic() - started
+        if failed:
+            self.failed += items
+        else:
+            self.completed += items - skipped
+            self.skipped += skipped
+
+    def snapshot(self, queued: Optional[int] = None) -> Dict[str, Any]:
+        end = self.finished_at or time.monotonic()
+        elapsed = end - self.started_at if self.started_at is not None else 0.0
+        return {
+            "workers": self.workers,
+            "received": self.received,
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "in_flight": self.in_flight,
+            "queued_batches": queued,
+            "batches": self.batches,
+            "elapsed_seconds": elapsed,
+            "items_per_second": self.completed / elapsed if elapsed > 0 else None,
+            # Share of worker time spent on upstream calls; the busiest stage is the bottleneck
+            "utilization": self.busy_seconds / (elapsed * self.workers) if elapsed > 0 else 0.0,
+            "blocked_seconds": self.blocked_seconds,
+            "last_error": self.last_error,
+        }
+
+class PipelineJob:
+    def __init__(self, query: str, limit: int, mode: str, settings: Settings):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.limit = limit
+        self.mode = mode
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.ingestion_job_id: Optional[int] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.stages = {
+            "ingest": StageStats(1),
+            "process": StageStats(settings.PIPELINE_PROCESS_CONCURRENCY),
+            "index": StageStats(settings.PIPELINE_INDEX_CONCURRENCY),
+        }
+        # Bounded queues of PMID batches feeding the process and index stages
+        self.queues: Dict[str, asyncio.Queue] = {
+            "process": asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE),
+            "index": asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE),
+        }
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def status_dict(self) -> Dict[str, Any]:
+        return {
+            "pipeline_id": self.id,
+            "query": self.query,
+            "limit": self.limit,
+            "mode": self.mode,
+            "status": self.status,
+            "error": self.error,
+            "ingestion_job_id": self.ingestion_job_id,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "stages": {
+                name: stats.snapshot(self.queues[name].qsize() if name in self.queues else None)
+                for name, stats in self.stages.items()
+            },
+        }
+
+class PipelineRunner:
+    """Runs ingest -> process -> index as a streaming pipeline of stages.
+
+    The ingest stage tails the ingestion job's stored items and hands them
+    on in batches as soon as they are stored. Process and index workers
+    take batches from bounded queues, so a slow stage holds back the ones
+    before it instead of letting work pile up in memory, and only the new
+    papers are embedded. Jobs are kept in memory by the replica that runs
+    them, the last PIPELINE_MAX_JOBS finished ones included.
+    """
+
+    def __init__(self, settings: Settings, upstream_clients: UpstreamClients):
+        self.settings = settings
+        self.upstreams = upstream_clients
+        self.jobs: Dict[str, PipelineJob] = {}
+
+    def running(self) -> int:
+        return sum(1 for job in self.jobs.values() if not job.done)
+
+    def submit(self, query: str, limit: int, mode: str = "abstract") -> PipelineJob:
+        if self.running() >= self.settings.PIPELINE_MAX_RUNNING:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many pipelines running",
+                headers={"Retry-After": str(int(self.settings.PIPELINE_POLL_INTERVAL * 15))}
+            )
+        job = PipelineJob(query, limit, mode, self.settings)
+        job.task = asyncio.ensure_future(self._run(job))
+        self.jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get(self, pipeline_id: str) -> Optional[PipelineJob]:
+        return self.jobs.get(pipeline_id)
+
+    def list(self) -> List[PipelineJob]:
+        return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def _prune(self) -> None:
+        finished = [job for job in self.list() if job.done]
+        for job in finished[self.settings.PIPELINE_MAX_JOBS:]:
+            del self.jobs[job.id]
+
+    async def aclose(self) -> None:
+        tasks = [job.task for job in self.jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: PipelineJob) -> None:
+        settings = self.settings
+        workers: List[asyncio.Task] = []
+        try:
+            job.status = "running"
+            created = await self.upstreams.forward(
+                "ingestion", "POST", "/ingest", route="ingest.create",
+                json={"query": job.query, "limit": job.limit}
+            )
+            job.ingestion_job_id = created["job_id"]
+            logger.info(f"Pipeline {job.id} started ingestion job {job.ingestion_job_id}")
+
+            processors = [
+                asyncio.ensure_future(self._process_worker(job))
+                for _ in range(settings.PIPELINE_PROCESS_CONCURRENCY)
+            ]
+            indexers = [
+                asyncio.ensure_future(self._index_worker(job))
+                for _ in range(settings.PIPELINE_INDEX_CONCURRENCY)
+            ]
+            workers = processors + indexers
+
+            ingestion_error = await self._ingest(job)
+            # Each stage drains its queue, then tells the next one it is done
+            for _ in processors:
+                await job.queues["process"].put(None)
+            await asyncio.gather(*processors)
+            job.stages["process"].finished_at = time.monotonic()
+            for _ in indexers:
+                await job.queues["index"].put(None)
+            await asyncio.gather(*indexers)
+            job.stages["index"].finished_at = time.monotonic()
+
+            job.error = ingestion_error
+            job.status = "failed" if ingestion_error else "completed"
+            logger.info(f"Pipeline {job.id} {job.status}")
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Pipeline {job.id} failed: {job.error}")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            job.finished_at = datetime.utcnow()
+
+    async def _ingest(self, job: PipelineJob) -> Optional[str]:
+        """Feed stored papers to the process stage until the ingestion job ends.
+
+        Returns the ingestion job's error if it failed.
+        """
+        stats = job.stages["ingest"]
+        stats.started_at = time.monotonic()
+        seen: Set[str] = set()
+        cursor = None
+        while True:
+            # Read the status before the items, so nothing stored before the
+            # job finished is missed by the last pass
+            ingestion = await self.upstreams.forward(
+                "ingestion", "GET", f"/jobs/{job.ingestion_job_id}", route="ingest.jobs"
+            )
+            cursor = await self._feed(job, cursor, seen)
+            stats.received = ingestion["total_items"]
+            stats.failed = ingestion["failed_items"]
+            if ingestion["status"] in ("completed", "failed"):
+                # Items committed late can sort before the cursor; one pass from the start catches them
+                await self._feed(job, None, seen)
+                stats.finished_at = time.monotonic()
+                return ingestion["error"] if ingestion["status"] == "failed" else None
+            await asyncio.sleep(self.settings.PIPELINE_POLL_INTERVAL)
+
+    async def _feed(self, job: PipelineJob, cursor: Optional[str], seen: Set[str]) -> Optional[str]:
+        stats = job.stages["ingest"]
+        batch_size = self.settings.PIPELINE_BATCH_SIZE
+        page_size = max(batch_size, 500)
+        while True:
+            page = await self.upstreams.forward(
+                "ingestion", "GET", f"/jobs/{job.ingestion_job_id}/items", route="ingest.jobs",
+                params={"status": "done", "limit": page_size, **({"cursor": cursor} if cursor else {})}
+            )
+            cursor = page["cursor"]
+            pmids = [item["pmid"] for item in page["items"] if item["pmid"] not in seen]
+            seen.update(pmids)
+            stats.completed += len(pmids)
+            for start in range(0, len(pmids), batch_size):
+                stats.batches += 1
+                await self._put(job, stats, "process", pmids[start:start + batch_size])
+            if len(page["items"]) < page_size:
+                return cursor
+
+    async def _put(self, job: PipelineJob, stats: StageStats, queue: str, batch: List[str]) -> None:
+        # Blocks while the next stage is behind: that is the backpressure
+        started = time.monotonic()
+        await job.queues[queue].put(batch)
+        stats.blocked_seconds += time.monotonic() - started
+
+    async def _process_worker(self, job: PipelineJob) -> None:
+        stats = job.stages["process"]
+        while True:
+            batch = await job.queues["process"].get()
+            if batch is None:
+                return
+            started = stats.begin(len(batch))
+            try:
+                await self.upstreams.forward(
+                    "processor", "POST", "/process/batch", route="pipeline.process",
+                    json={"pmids": batch, "mode": job.mode}
+                )
+            except HTTPException as e:
+                # A failed batch is not indexed; the rest of the pipeline goes on
+                stats.end(len(batch), started, failed=True)
+                stats.last_error = str(e.detail)
+                logger.error(f"Pipeline {job.id}: processing {len(batch)} papers failed: {e.detail}")
+                continue
+            stats.end(len(batch), started)
+            await self._put(job, stats, "index", batch)
+
+    async def _index_worker(self, job: PipelineJob) -> None:
+        stats = job.stages["index"]
+        while True:
+            batch = await job.queues["index"].get()
+            if batch is None:
+                return
+            started = stats.begin(len(batch))
+            try:
+                result = await self.upstreams.forward(
+                    "rag", "POST", "/rag/index/papers", route="pipeline.index",
+                    json={"pmids": batch, "skip_current": True}
+                )
+            except HTTPException as e:
+                stats.end(len(batch), started, failed=True)
+                stats.last_error = str(e.detail)
+                logger.error(f"Pipeline {job.id}: indexing {len(batch)} papers failed: {e.detail}")
+                continue
+            # Near-duplicates of an indexed paper, and papers the RAG service's
+            # event consumer already embedded, are skipped
+            skipped = len(result.get("skipped", [])) + len(result.get("current", []))
+            stats.end(len(batch), started, skipped=skipped)
+
+pipelines = PipelineRunner(get_settings(), upstreams)
@@ -1,9 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import contextlib
 import logging
 
-from src.routers import ingestion, processor, rag
+from src.routers import ingestion, processor, rag, citations, entities, papers, pipeline
 from src.core.config import get_settings
+from src.core.admission import AdmissionMiddleware, admission
+from src.core.cache import response_cache
+from src.core.http import upstreams
+from src.core.pipeline import pipelines
 
 # Configure logging
 logging.basicConfig(
@@ -15,12 +20,28 @@ logger = logging.getLogger(__name__)
 # Initialize settings
 settings = get_settings()
 
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the upstream connection pools and rate limit backend for the lifetime of the app"""
+    upstreams.start()
+    await admission.start()
+    try:
+        yield
+    finally:
+        await pipelines.aclose()
+        await admission.aclose()
+        await upstreams.aclose()
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
-    description="API Gateway for Citation Finder Services"
+    description="API Gateway for Citation Finder Services",
+    lifespan=lifespan
 )
 
+# Admission control inside CORS, so rejections still carry CORS headers
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +55,10 @@ app.add_middleware(
 app.include_router(ingestion.router)
 app.include_router(processor.router)
 app.include_router(rag.router)
+app.include_router(citations.router)
+app.include_router(entities.router)
+app.include_router(papers.router)
+app.include_router(pipeline.router)
 
 @app.get("/health")
 async def health_check():
@@ -43,6 +68,15 @@ async def health_check():
         "service": settings.app_name
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Upstream request counters, connection pool utilization, cache and admission counters"""
+    return {
+        "upstreams": upstreams.metrics(),
+        "cache": response_cache.stats(),
+        "admission": admission.stats(),
+    }
+
 @app.get("/")
 async def root():
     """Root endpoint"""
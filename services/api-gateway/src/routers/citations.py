@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Query
+from typing import Dict, Any, List
+
+from ..core.http import upstreams
+
+router = APIRouter(prefix="/api/v1/citations", tags=["citations"])
+
+async def _forward(method: str, path: str, **kwargs) -> Any:
+    return await upstreams.proxy("ingestion", method, f"/citations{path}", route="citations", **kwargs)
+
+@router.post("/resolve", response_model=Dict[str, Any])
+async def resolve_citations():
+    """
+    Link pending citation edges to papers ingested since
+    """
+    return await _forward("POST", "/resolve")
+
+@router.post("/graph/refresh", response_model=Dict[str, Any])
+async def refresh_graph(full: bool = False):
+    """
+    Refresh the in-memory citation graph
+    """
+    return await _forward("POST", "/graph/refresh", params={"full": full})
+
+@router.get("/graph/stats", response_model=Dict[str, Any])
+async def graph_stats():
+    """
+    Citation graph size and freshness
+    """
+    return await _forward("GET", "/graph/stats")
+
+@router.get("/graph/pagerank", response_model=List[Dict[str, Any]])
+async def top_pagerank(limit: int = Query(20, ge=1, le=1000), damping: float = 0.85):
+    """
+    Most important papers by PageRank
+    """
+    return await _forward("GET", "/graph/pagerank", params={"limit": limit, "damping": damping})
+
+@router.post("/graph/rank", response_model=Dict[str, Any])
+async def rank_papers(request: Dict[str, Any]):
+    """
+    Order a set of PMIDs by citation count or PageRank
+    """
+    return await _forward("POST", "/graph/rank", json=request)
+
+@router.get("/graph/{pmid}/degree", response_model=Dict[str, Any])
+async def paper_degree(pmid: str):
+    """
+    In- and out-degree of a paper
+    """
+    return await _forward("GET", f"/graph/{pmid}/degree")
+
+@router.get("/graph/{pmid}/neighborhood", response_model=Dict[str, Any])
+async def paper_neighborhood(
+    pmid: str,
+    hops: int = 2,
+    direction: str = "both",
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Papers within k citation hops
+    """
+    return await _forward(
+        "GET", f"/graph/{pmid}/neighborhood",
+        params={"hops": hops, "direction": direction, "limit": limit}
+    )
+
+@router.get("/graph/{pmid}/co-citations", response_model=List[Dict[str, Any]])
+async def paper_co_citations(pmid: str, limit: int = Query(20, ge=1, le=1000)):
+    """
+    Papers most often co-cited with a paper
+    """
+    return await _forward("GET", f"/graph/{pmid}/co-citations", params={"limit": limit})
+
+@router.get("/graph/{pmid}/coupling", response_model=List[Dict[str, Any]])
+async def paper_coupling(pmid: str, limit: int = Query(20, ge=1, le=1000)):
+    """
+    Papers bibliographically coupled with a paper
+    """
+    return await _forward("GET", f"/graph/{pmid}/coupling", params={"limit": limit})
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Query
+from typing import Dict, Any, List, Optional
+
+from ..core.http import upstreams
+
+router = APIRouter(prefix="/api/v1/entities", tags=["entities"])
+
+async def _forward(method: str, path: str, **kwargs) -> Any:
+    return await upstreams.proxy("processor", method, f"/entities{path}", route="entities", **kwargs)
+
+@router.get("/search", response_model=Dict[str, Any])
+async def search_entities(
+    terms: List[str] = Query(...),
+    match: str = "all",
+    category: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    limit: int = 50,
+    offset: int = 0,
+    facets: int = 0
+):
+    """
+    Papers mentioning all or any of the given entities
+    """
+    params = {
+        "terms": terms, "match": match, "category": category,
+        "year_from": year_from, "year_to": year_to,
+        "limit": limit, "offset": offset, "facets": facets
+    }
+    return await _forward(
+        "GET",
+        "/search",
+        params={key: value for key, value in params.items() if value is not None}
+    )
+
+@router.post("/facets", response_model=Dict[str, Any])
+async def entity_facets(request: Dict[str, Any]):
+    """
+    Top entities per category for a set of PMIDs, an entity query, or a RAG
+    query under ``rag_query`` whose sources form the result set
+    """
+    request = dict(request)
+    rag_query = request.pop("rag_query", None)
+    if rag_query is not None:
+        answer = await upstreams.forward("rag", "POST", "/rag/query", route="rag.query", json=rag_query)
+        request["pmids"] = [source["pmid"] for source in answer.get("sources", []) if source.get("pmid")]
+    return await _forward("POST", "/facets", json=request)
+
+@router.get("/index/stats", response_model=Dict[str, Any])
+async def index_stats():
+    """
+    Entity index size and freshness
+    """
+    return await _forward("GET", "/index/stats")
+
+@router.post("/index/refresh", response_model=Dict[str, Any])
+async def refresh_index():
+    """
+    Rebuild the entity index from the latest processing results
+    """
+    return await _forward("POST", "/index/refresh")
@@ -1,27 +1,30 @@
-from fastapi import APIRouter, HTTPException
-import httpx
-from typing import Dict, Any
+from fastapi import APIRouter
+from typing import Dict, Any, List, Optional
 
-from ..core.config import get_settings
+from ..core.http import upstreams
 
-settings = get_settings()
 router = APIRouter(prefix="/api/v1/ingest", tags=["ingestion"])
 
 @router.post("/", response_model=Dict[str, Any])
 async def ingest_data(query: Dict[str, Any]):
     """
-    Ingest data from PubMed based on query
+    Queue an ingestion job for a PubMed query
     """
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{settings.DATA_INGESTION_URL}/ingest",
-                json=query
-            )
-            response.raise_for_status()
-            return response.json()
-    except httpx.HTTPError as e:
-        raise HTTPException(status_code=e.response.status_code if hasattr(e, 'response') else 500, 
-                          detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    return await upstreams.proxy("ingestion", "POST", "/ingest", route="ingest.create", json=query)
+
+@router.get("/jobs", response_model=List[Dict[str, Any]])
+async def list_jobs(status: Optional[str] = None, limit: int = 20):
+    """
+    List recent ingestion jobs
+    """
+    params = {"limit": limit}
+    if status:
+        params["status"] = status
+    return await upstreams.proxy("ingestion", "GET", "/jobs", route="ingest.jobs", params=params)
+
+@router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_job(job_id: int):
+    """
+    Progress, throughput and ETA of an ingestion job
+    """
+    return await upstreams.proxy("ingestion", "GET", f"/jobs/{job_id}", route="ingest.jobs")
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Header
+from typing import Dict, Any, List, Optional
+
+from ..core.http import upstreams
+
+router = APIRouter(prefix="/api/v1/papers", tags=["papers"])
+
+@router.get("", response_model=List[Dict[str, Any]])
+async def list_papers(
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    fields: Optional[str] = None,
+    cache_control: Optional[str] = Header(None)
+):
+    """
+    Page through ingested papers; pass X-Next-Cursor back as ``cursor``
+    """
+    params = {"limit": limit, "cursor": cursor, "order_by": order_by, "fields": fields}
+    return await upstreams.forward_cached(
+        "ingestion", "GET", "/papers", route="papers.list",
+        refresh="no-cache" in (cache_control or ""),
+        params={key: value for key, value in params.items() if value is not None}
+    )
+
+@router.get("/search", response_model=Dict[str, Any])
+async def search_papers(
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    journal: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    cache_control: Optional[str] = Header(None)
+):
+    """
+    Ranked full-text search over paper titles and abstracts
+    """
+    params = {
+        "q": q, "limit": limit, "offset": offset,
+        "journal": journal, "year_from": year_from, "year_to": year_to
+    }
+    return await upstreams.forward_cached(
+        "ingestion", "GET", "/papers/search", route="papers.search",
+        refresh="no-cache" in (cache_control or ""),
+        params={key: value for key, value in params.items() if value is not None}
+    )
+
+@router.get("/{pmid}", response_model=Dict[str, Any])
+async def get_paper(pmid: str, cache_control: Optional[str] = Header(None)):
+    """
+    Get a paper by PMID
+    """
+    return await upstreams.forward_cached(
+        "ingestion", "GET", f"/papers/{pmid}", route="papers",
+        refresh="no-cache" in (cache_control or "")
+    )
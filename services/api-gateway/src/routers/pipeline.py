@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List
+
+from ..core.pipeline import pipelines
+
+router = APIRouter(prefix="/api/v1/pipeline", tags=["pipeline"])
+
+class PipelineRequest(BaseModel):
+    query: str
+    limit: int = Field(10, ge=1, le=10000)
+    mode: str = Field("abstract", pattern="^(abstract|full_text)$")
+
+@router.post("", response_model=Dict[str, Any], status_code=202)
+async def start_pipeline(request: PipelineRequest):
+    """
+    Ingest a PubMed query, process and index the papers as they arrive
+    """
+    job = pipelines.submit(request.query, request.limit, request.mode)
+    return job.status_dict()
+
+@router.get("", response_model=List[Dict[str, Any]])
+async def list_pipelines():
+    """
+    Pipelines run by this gateway, newest first
+    """
+    return [job.status_dict() for job in pipelines.list()]
+
+@router.get("/{pipeline_id}", response_model=Dict[str, Any])
+async def get_pipeline(pipeline_id: str):
+    """
+    Status and per-stage throughput of a pipeline
+    """
+    job = pipelines.get(pipeline_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    return job.status_dict()
@@ -1,10 +1,8 @@
-from fastapi import APIRouter, HTTPException
-import httpx
-from typing import Dict, Any
+from fastapi import APIRouter, Header
+from typing import Dict, Any, Optional
 
-from ..core.config import get_settings
+from ..core.http import upstreams
 
-settings = get_settings()
 router = APIRouter(prefix="/api/v1/rag", tags=["rag"])
 
 @router.post("/index", response_model=Dict[str, Any])
@@ -12,34 +10,15 @@ async def create_index():
     """
     Create RAG index from processed papers
     """
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.RAG_SERVICE_URL}/rag/index",
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
-    except httpx.HTTPError as e:
-        raise HTTPException(status_code=response.status_code, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await upstreams.proxy("rag", "POST", "/rag/index", route="rag.index")
 
 @router.post("/query", response_model=Dict[str, Any])
-async def query_papers(query: Dict[str, Any]):
+async def query_papers(query: Dict[str, Any], cache_control: Optional[str] = Header(None)):
     """
-    Query papers using RAG
+    Query papers using RAG; identical queries are served from the cache,
+    ``Cache-Control: no-cache`` forces a fresh answer
     """
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.RAG_SERVICE_URL}/rag/query",
-                json=query,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
-    except httpx.HTTPError as e:
-        raise HTTPException(status_code=response.status_code, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    return await upstreams.forward_cached(
+        "rag", "POST", "/rag/query", route="rag.query",
+        refresh="no-cache" in (cache_control or ""), json=query
+    )
@@ -0,0 +1,43 @@
+"""Pending citation edges keyed by cited PubMed ID
+
+Revision ID: 3f9c2a71d4e8
+Revises: cda1ea52eeb3
+Create Date: 2026-10-19 09:12:44.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a71d4e8'
+down_revision = 'cda1ea52eeb3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('papers', sa.Column('pubmed_id', sa.String(length=20), nullable=True))
+    op.create_index(op.f('ix_papers_pubmed_id'), 'papers', ['pubmed_id'], unique=True)
+
+    op.add_column('paper_citations', sa.Column('cited_pmid', sa.String(length=20), nullable=True))
+    op.add_column('paper_citations', sa.Column('resolved_at', sa.DateTime(), nullable=True))
+    op.create_unique_constraint(
+        'uq_paper_citations_citing_cited_pmid', 'paper_citations',
+        ['citing_paper_id', 'cited_pmid']
+    )
+    # Only pending edges are indexed, so the resolver never walks linked ones
+    op.create_index(
+        'ix_paper_citations_pending_cited_pmid', 'paper_citations', ['cited_pmid'],
+        postgresql_where=sa.text('cited_paper_id IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_paper_citations_pending_cited_pmid', table_name='paper_citations')
+    op.drop_constraint('uq_paper_citations_citing_cited_pmid', 'paper_citations', type_='unique')
+    op.drop_column('paper_citations', 'resolved_at')
+    op.drop_column('paper_citations', 'cited_pmid')
+
+    op.drop_index(op.f('ix_papers_pubmed_id'), table_name='papers')
+    op.drop_column('papers', 'pubmed_id')
@@ -0,0 +1,27 @@
+"""Index for keyset pagination of papers by publication date
+
+Revision ID: 5e2b8f4a91c6
+Revises: c47e9a13b5f0
+Create Date: 2026-10-19 15:22:51.630418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b8f4a91c6'
+down_revision = 'c47e9a13b5f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_papers_publication_date_id', 'papers',
+        [sa.text('publication_date DESC NULLS LAST'), sa.text('id DESC')]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_papers_publication_date_id', table_name='papers')
@@ -0,0 +1,56 @@
+"""Keys and foreign-key indexes on paper link tables, journal index, full-text search vector
+
+Revision ID: 7a3d9e5c1b84
+Revises: b6e4a0d93f17
+Create Date: 2026-10-19 22:37:09.514820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3d9e5c1b84'
+down_revision = 'b6e4a0d93f17'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(abstract, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    # Links were never unique; drop repeats and half-empty rows before keying them
+    op.execute("DELETE FROM paper_authors WHERE paper_id IS NULL OR author_id IS NULL")
+    op.execute("""
+        DELETE FROM paper_authors a
+        USING paper_authors b
+        WHERE a.paper_id = b.paper_id AND a.author_id = b.author_id AND a.ctid > b.ctid
+    """)
+    op.alter_column('paper_authors', 'paper_id', existing_type=sa.Integer(), nullable=False)
+    op.alter_column('paper_authors', 'author_id', existing_type=sa.Integer(), nullable=False)
+    op.create_primary_key('paper_authors_pkey', 'paper_authors', ['paper_id', 'author_id'])
+    op.create_index('ix_paper_authors_author_id', 'paper_authors', ['author_id'], unique=False)
+
+    op.create_index('ix_paper_citations_cited_paper_id', 'paper_citations', ['cited_paper_id'], unique=False)
+    op.create_index(op.f('ix_papers_journal'), 'papers', ['journal'], unique=False)
+
+    # A stored generated column rewrites papers once; run it in a maintenance window on large corpora
+    op.add_column('papers', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True
+    ))
+    op.create_index('ix_papers_search_vector', 'papers', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_papers_search_vector', table_name='papers')
+    op.drop_column('papers', 'search_vector')
+    op.drop_index(op.f('ix_papers_journal'), table_name='papers')
+    op.drop_index('ix_paper_citations_cited_paper_id', table_name='paper_citations')
+    op.drop_index('ix_paper_authors_author_id', table_name='paper_authors')
+    op.drop_constraint('paper_authors_pkey', 'paper_authors', type_='primary')
+    op.alter_column('paper_authors', 'author_id', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('paper_authors', 'paper_id', existing_type=sa.Integer(), nullable=True)
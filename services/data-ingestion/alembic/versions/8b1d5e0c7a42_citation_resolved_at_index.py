@@ -0,0 +1,23 @@
+"""Index resolved_at for incremental citation graph refresh
+
+Revision ID: 8b1d5e0c7a42
+Revises: 3f9c2a71d4e8
+Create Date: 2026-10-19 11:03:27.904116
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1d5e0c7a42'
+down_revision = '3f9c2a71d4e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_paper_citations_resolved_at', 'paper_citations', ['resolved_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_paper_citations_resolved_at', table_name='paper_citations')
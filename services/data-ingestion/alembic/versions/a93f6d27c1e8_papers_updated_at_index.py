@@ -0,0 +1,23 @@
+"""Index papers.updated_at for incremental export
+
+Revision ID: a93f6d27c1e8
+Revises: 5e2b8f4a91c6
+Create Date: 2026-10-19 16:48:03.117942
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93f6d27c1e8'
+down_revision = '5e2b8f4a91c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_papers_updated_at'), 'papers', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_papers_updated_at'), table_name='papers')
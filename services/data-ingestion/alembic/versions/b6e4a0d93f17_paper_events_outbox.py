@@ -0,0 +1,62 @@
+"""Paper events outbox with a NOTIFY trigger, and event consumer cursors
+
+Revision ID: b6e4a0d93f17
+Revises: f5c9d1a8e243
+Create Date: 2026-10-19 21:04:52.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e4a0d93f17'
+down_revision = 'f5c9d1a8e243'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('paper_events',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('txid', sa.BigInteger(), server_default=sa.text('txid_current()'), nullable=False),
+    sa.Column('paper_id', sa.Integer(), nullable=False),
+    sa.Column('pmid', sa.String(length=20), nullable=False),
+    sa.Column('event_type', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['paper_id'], ['papers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_paper_events_created_at'), 'paper_events', ['created_at'], unique=False)
+    op.create_index('ix_paper_events_txid_id', 'paper_events', ['txid', 'id'], unique=False)
+    op.create_table('event_consumers',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('last_txid', sa.BigInteger(), nullable=False),
+    sa.Column('last_event_id', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # One wake-up per inserting statement; NOTIFY is only delivered on commit
+    # and repeats within a transaction are folded, so bulk loads stay cheap
+    op.execute("""
+        CREATE FUNCTION notify_paper_events() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('paper_events', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER paper_events_notify
+        AFTER INSERT ON paper_events
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_paper_events()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS paper_events_notify ON paper_events")
+    op.execute("DROP FUNCTION IF EXISTS notify_paper_events()")
+    op.drop_table('event_consumers')
+    op.drop_index('ix_paper_events_txid_id', table_name='paper_events')
+    op.drop_index(op.f('ix_paper_events_created_at'), table_name='paper_events')
+    op.drop_table('paper_events')
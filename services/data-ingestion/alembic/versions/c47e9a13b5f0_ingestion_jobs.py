@@ -0,0 +1,59 @@
+"""Ingestion job queue and per-PMID checkpoints
+
+Revision ID: c47e9a13b5f0
+Revises: 8b1d5e0c7a42
+Create Date: 2026-10-19 13:41:09.275530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47e9a13b5f0'
+down_revision = '8b1d5e0c7a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ingestion_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('query', sa.Text(), nullable=False),
+    sa.Column('limit', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total_items', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('completed_items', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('failed_items', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('worker_id', sa.String(length=255), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('searched_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingestion_jobs_status'), 'ingestion_jobs', ['status'], unique=False)
+    op.create_table('ingestion_job_items',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('pmid', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('paper_id', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['ingestion_jobs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['paper_id'], ['papers.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('job_id', 'pmid')
+    )
+    op.create_index('ix_ingestion_job_items_ready', 'ingestion_job_items', ['job_id', 'status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ingestion_job_items_ready', table_name='ingestion_job_items')
+    op.drop_table('ingestion_job_items')
+    op.drop_index(op.f('ix_ingestion_jobs_status'), table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
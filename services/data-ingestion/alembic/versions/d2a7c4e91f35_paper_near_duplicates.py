@@ -0,0 +1,44 @@
+"""MinHash signatures, LSH buckets and near-duplicate clusters
+
+Revision ID: d2a7c4e91f35
+Revises: a93f6d27c1e8
+Create Date: 2026-10-19 16:02:47.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7c4e91f35'
+down_revision = 'a93f6d27c1e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('paper_signatures',
+    sa.Column('paper_id', sa.Integer(), nullable=False),
+    sa.Column('signature', sa.LargeBinary(), nullable=False),
+    sa.Column('cluster_id', sa.Integer(), nullable=False),
+    sa.Column('similarity', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['paper_id'], ['papers.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['cluster_id'], ['papers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('paper_id')
+    )
+    op.create_index(op.f('ix_paper_signatures_cluster_id'), 'paper_signatures', ['cluster_id'], unique=False)
+    # The primary key doubles as the (band, bucket) lookup index
+    op.create_table('paper_lsh_buckets',
+    sa.Column('band', sa.SmallInteger(), nullable=False),
+    sa.Column('bucket', sa.BigInteger(), nullable=False),
+    sa.Column('paper_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['paper_id'], ['papers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('band', 'bucket', 'paper_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('paper_lsh_buckets')
+    op.drop_index(op.f('ix_paper_signatures_cluster_id'), table_name='paper_signatures')
+    op.drop_table('paper_signatures')
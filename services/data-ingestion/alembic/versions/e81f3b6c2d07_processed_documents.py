@@ -0,0 +1,35 @@
+"""Entity extraction results of the document processor
+
+Revision ID: e81f3b6c2d07
+Revises: d2a7c4e91f35
+Create Date: 2026-10-19 16:48:12.530961
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81f3b6c2d07'
+down_revision = 'd2a7c4e91f35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('processed_documents',
+    sa.Column('paper_id', sa.Integer(), nullable=False),
+    sa.Column('pmid', sa.String(length=20), nullable=False),
+    sa.Column('entities', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('text_length', sa.Integer(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['paper_id'], ['papers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('paper_id')
+    )
+    op.create_index(op.f('ix_processed_documents_pmid'), 'processed_documents', ['pmid'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_processed_documents_pmid'), table_name='processed_documents')
+    op.drop_table('processed_documents')
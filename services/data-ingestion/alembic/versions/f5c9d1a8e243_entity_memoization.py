@@ -0,0 +1,70 @@
+"""Processor version and content hash on processed documents, normalized entities
+
+Revision ID: f5c9d1a8e243
+Revises: e81f3b6c2d07
+Create Date: 2026-10-19 18:21:36.402157
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c9d1a8e243'
+down_revision = 'e81f3b6c2d07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows get a version no processor reports, so they are redone once
+    op.add_column('processed_documents', sa.Column('processor_version', sa.String(length=64), nullable=False, server_default='legacy'))
+    op.add_column('processed_documents', sa.Column('content_hash', sa.String(length=64), nullable=False, server_default=''))
+    op.add_column('processed_documents', sa.Column('mode', sa.String(length=20), nullable=False, server_default='abstract'))
+    op.add_column('processed_documents', sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.alter_column('processed_documents', 'processor_version', server_default=None)
+    op.alter_column('processed_documents', 'content_hash', server_default=None)
+    op.alter_column('processed_documents', 'mode', server_default=None)
+    op.drop_constraint('processed_documents_pkey', 'processed_documents', type_='primary')
+    op.create_primary_key('processed_documents_pkey', 'processed_documents', ['paper_id', 'processor_version', 'content_hash'])
+    op.create_index('ix_processed_documents_paper_mode', 'processed_documents', ['paper_id', 'mode'], unique=False)
+
+    op.create_table('entities',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('category', 'text', name='uq_entities_category_text')
+    )
+    op.create_table('paper_entities',
+    sa.Column('paper_id', sa.Integer(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('mention_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['entity_id'], ['entities.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['paper_id'], ['papers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('paper_id', 'entity_id')
+    )
+    op.create_index(op.f('ix_paper_entities_entity_id'), 'paper_entities', ['entity_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_paper_entities_entity_id'), table_name='paper_entities')
+    op.drop_table('paper_entities')
+    op.drop_table('entities')
+    op.drop_index('ix_processed_documents_paper_mode', table_name='processed_documents')
+    op.drop_constraint('processed_documents_pkey', 'processed_documents', type_='primary')
+    # Keep the newest row of each paper before restoring the single-column key
+    op.execute("""
+        DELETE FROM processed_documents d
+        USING processed_documents newer
+        WHERE newer.paper_id = d.paper_id
+          AND (newer.processed_at, newer.processor_version, newer.content_hash)
+            > (d.processed_at, d.processor_version, d.content_hash)
+    """)
+    op.create_primary_key('processed_documents_pkey', 'processed_documents', ['paper_id'])
+    op.drop_column('processed_documents', 'details')
+    op.drop_column('processed_documents', 'mode')
+    op.drop_column('processed_documents', 'content_hash')
+    op.drop_column('processed_documents', 'processor_version')
@@ -0,0 +1,170 @@
+# Data ingestion service query plan benchmark for the paper indexes and full-text search
+"""EXPLAIN ANALYZE the author, citation, journal, date and keyword queries.
+
+Usage (from services/data-ingestion, against a populated database):
+    python -m benchmarks.bench_queries --save before.json
+    alembic upgrade head
+    python -m benchmarks.bench_queries --compare before.json
+
+Parameters are sampled from the data on the first run and reused from the
+saved file, so both runs plan exactly the same statements. Values are
+inlined as literals, the way the plans read in psql. Each query runs
+``--repeat`` times and the median execution time is reported with the
+plan's scan nodes and buffer counts. Before the search_vector column
+exists, keyword search falls back to the ILIKE scan it replaces.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from shared.database import get_database
+from src.core.search import SEARCH_SQL
+
+QUERIES = {
+    "authors_of_paper": """
+        SELECT a.name FROM paper_authors pa JOIN authors a ON a.id = pa.author_id
+        WHERE pa.paper_id = :paper_id
+    """,
+    "papers_of_author": """
+        SELECT p.pmid, p.title FROM paper_authors pa JOIN papers p ON p.id = pa.paper_id
+        WHERE pa.author_id = :author_id
+    """,
+    "cited_by": """
+        SELECT p.pmid FROM paper_citations pc JOIN papers p ON p.id = pc.citing_paper_id
+        WHERE pc.cited_paper_id = :cited_paper_id
+    """,
+    "journal_papers": """
+        SELECT pmid, title FROM papers WHERE journal = :journal ORDER BY id LIMIT 50
+    """,
+    "published_in_year": """
+        SELECT pmid FROM papers
+        WHERE publication_date >= :date_from AND publication_date < :date_to
+        ORDER BY publication_date DESC NULLS LAST, id DESC LIMIT 50
+    """,
+}
+
+_KEYWORD_ILIKE = """
+    SELECT pmid, title FROM papers
+    WHERE title ILIKE :pattern OR abstract ILIKE :pattern
+    ORDER BY id LIMIT 20
+"""
+
+_SAMPLE = text("""
+    SELECT pa.paper_id, pa.author_id, p.journal, p.publication_date
+    FROM paper_authors pa JOIN papers p ON p.id = pa.paper_id
+    WHERE pa.paper_id IS NOT NULL AND pa.author_id IS NOT NULL
+    ORDER BY pa.paper_id DESC
+    LIMIT 1 OFFSET (SELECT count(*) / 2 FROM paper_authors)
+""")
+_MOST_CITED = text("""
+    SELECT cited_paper_id FROM paper_citations
+    WHERE cited_paper_id IS NOT NULL
+    GROUP BY cited_paper_id ORDER BY count(*) DESC LIMIT 1
+""")
+_HAS_SEARCH_VECTOR = text("""
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'papers' AND column_name = 'search_vector'
+""")
+
+async def sample_params(session, query: str) -> Dict[str, Any]:
+    row = (await session.execute(_SAMPLE)).first()
+    if row is None:
+        raise SystemExit("paper_authors is empty; load some papers first")
+    year = row.publication_date.year if row.publication_date else 2020
+    return {
+        "paper_id": row.paper_id,
+        "author_id": row.author_id,
+        "cited_paper_id": (await session.execute(_MOST_CITED)).scalar() or row.paper_id,
+        "journal": row.journal or "",
+        "date_from": datetime(year, 1, 1).isoformat(),
+        "date_to": datetime(year + 1, 1, 1).isoformat(),
+        "query": query,
+    }
+
+def literal_sql(sql: str, params: Dict[str, Any]) -> str:
+    # Dates stay ISO strings; Postgres reads the quoted literal as a timestamp
+    statement = text(sql).bindparams(**{key: value for key, value in params.items() if f":{key}" in sql})
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+def plan_nodes(plan: Dict[str, Any]) -> List[str]:
+    node = plan["Node Type"]
+    if "Relation Name" in plan:
+        node += f" on {plan['Relation Name']}"
+    if "Index Name" in plan:
+        node += f" using {plan['Index Name']}"
+    nodes = [node] if "Scan" in plan["Node Type"] else []
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+async def explain(session, sql: str, repeat: int) -> Dict[str, Any]:
+    timings = []
+    for _ in range(repeat):
+        result = await session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"))
+        output = result.scalar()
+        report = (json.loads(output) if isinstance(output, str) else output)[0]
+        timings.append(report["Execution Time"])
+    plan = report["Plan"]
+    return {
+        "execution_ms": statistics.median(timings),
+        "planning_ms": report["Planning Time"],
+        "scans": plan_nodes(plan),
+        "shared_hit": plan.get("Shared Hit Blocks", 0),
+        "shared_read": plan.get("Shared Read Blocks", 0),
+    }
+
+async def run(args) -> Dict[str, Any]:
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    async with get_database().session() as session:
+        params = previous["params"] if previous else await sample_params(session, args.query)
+        has_search_vector = (await session.execute(_HAS_SEARCH_VECTOR)).first() is not None
+        queries = dict(QUERIES)
+        if has_search_vector:
+            queries["keyword_search"] = SEARCH_SQL.format(filters="")
+            params = {**params, "limit": 20, "offset": 0}
+        else:
+            queries["keyword_search"] = _KEYWORD_ILIKE
+            params = {**params, "pattern": f"%{params['query']}%"}
+
+        results = {}
+        for name, sql in queries.items():
+            results[name] = await explain(session, literal_sql(sql, params), args.repeat)
+            results[name]["variant"] = "full_text" if name == "keyword_search" and has_search_vector else None
+
+    saved_params = {key: value for key, value in params.items() if key not in ("limit", "offset", "pattern")}
+    report = {"params": saved_params, "results": results}
+    for name, result in results.items():
+        line = f"{name:20s} {result['execution_ms']:10.2f} ms"
+        if previous and name in previous["results"]:
+            before = previous["results"][name]["execution_ms"]
+            speedup = before / result["execution_ms"] if result["execution_ms"] else float("inf")
+            line += f"  (before {before:.2f} ms, {speedup:.1f}x)"
+        print(line)
+        print(f"{'':20s} {', '.join(result['scans']) or 'no scans'}; "
+              f"buffers hit={result['shared_hit']} read={result['shared_read']}")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--query", default="protein folding", help="Keyword search terms")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="Write parameters and results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier --save run")
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,29 @@
 # Data ingestion service main FastAPI application
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import text
 from sqlalchemy.orm import selectinload
+import asyncio
 import logging
+import os
+import time
 from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, ConfigDict
 import contextlib
 
-from src.core.database import get_db, AsyncSessionLocal
-from shared.models import Paper, Author
+from shared.database import get_database, get_db
+from shared.models import Paper, IngestionJob
 from src.core.pubmed_service import PubMedService
+from src.core.citations import resolve_pending_citations
+from src.core.jobs import IngestionWorker, enqueue_job, job_items, job_progress
+from src.core.pagination import CursorError, fetch_page, parse_fields
+from src.core.export import export_stream, MEDIA_TYPES
+from src.core.response_cache import get_response_cache
+from src.core.search import search_papers
+from src.routers import citation_graph
 
 
 # Configure logging
@@ -22,6 +33,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+database = get_database()
+
 # FastAPI Models
 class AuthorResponse(BaseModel):
     name: str
@@ -36,18 +49,104 @@ class PaperResponse(BaseModel):
     authors: List[AuthorResponse]
     model_config = ConfigDict(from_attributes=True)
 
+class PaperPageItem(BaseModel):
+    pmid: Optional[str] = None
+    pubmed_id: Optional[str] = None
+    title: Optional[str] = None
+    abstract: Optional[str] = None
+    publication_date: Optional[datetime] = None
+    journal: Optional[str] = None
+    full_text: Optional[str] = None
+    authors: Optional[List[AuthorResponse]] = None
+
+class SearchHit(BaseModel):
+    pmid: str
+    title: str
+    journal: Optional[str]
+    publication_date: Optional[datetime]
+    rank: float
+    snippet: str
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    results: List[SearchHit]
+    took_ms: float
+
 class IngestRequest(BaseModel):
     query: str
     limit: int = 10
 
-class IngestResponse(BaseModel):
-    message: str
-    ingested_count: int
-    papers: List[PaperResponse]
+class JobResponse(BaseModel):
+    job_id: int
+    query: str
+    limit: int
+    status: str
+    total_items: int
+    completed_items: int
+    failed_items: int
+    processed_items: int
+    remaining_items: int
+    elapsed_seconds: float
+    papers_per_second: Optional[float]
+    eta_seconds: Optional[float]
+    error: Optional[str]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+class JobItemResponse(BaseModel):
+    pmid: str
+    status: str
+    attempts: int
+    paper_id: Optional[int]
+    last_error: Optional[str]
+    updated_at: Optional[datetime]
+    model_config = ConfigDict(from_attributes=True)
+
+class JobItemsResponse(BaseModel):
+    items: List[JobItemResponse]
+    cursor: Optional[str]
+
+class ResolveCitationsResponse(BaseModel):
+    resolved_count: int
+
+def _job_response(job: IngestionJob) -> JobResponse:
+    return JobResponse(
+        job_id=job.id,
+        query=job.query,
+        limit=job.limit,
+        status=job.status,
+        total_items=job.total_items or 0,
+        completed_items=job.completed_items or 0,
+        failed_items=job.failed_items or 0,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        **job_progress(job)
+    )
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the ingestion workers for as long as the app is up, then close the pool"""
+    worker_count = int(os.getenv("INGESTION_WORKERS", "1"))
+    workers = [
+        asyncio.create_task(IngestionWorker.from_env(database.session_factory).run())
+        for _ in range(worker_count)
+    ]
+    try:
+        yield
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await database.dispose()
 
 # FastAPI App
-app = FastAPI(title="Data Ingestion Service")
+app = FastAPI(title="Data Ingestion Service", lifespan=lifespan)
 pubmed_service = PubMedService()
+app.include_router(citation_graph.router)
 
 @app.get("/health")
 async def health_check(db: AsyncSession = Depends(get_db)):
@@ -57,6 +156,7 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         return {
             "status": "healthy",
             "database": "connected",
+            "pool": database.metrics(),
             "timestamp": datetime.utcnow()
         }
     except Exception as e:
@@ -64,57 +164,10 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         return {
             "status": "unhealthy",
             "error": str(e),
+            "pool": database.metrics(),
             "timestamp": datetime.utcnow()
         }
 
-async def store_paper(db: AsyncSession, paper_data: dict) -> Paper:
-    try:
-        # Check if the paper already exists
-        query = select(Paper).options(selectinload(Paper.authors)).where(Paper.pmid == paper_data['pmid'])
-        result = await db.execute(query)
-        existing_paper = result.scalar_one_or_none()
-        
-        if existing_paper:
-            return existing_paper
-        
-        # Create a new paper object
-        paper = Paper(
-            pmid=paper_data['pmid'],
-            title=paper_data['title'],
-            abstract=paper_data['abstract'],
-            publication_date=paper_data['publication_date'],
-            journal=paper_data['journal'],
-            full_text=paper_data.get('full_text', '')
-        )
-        
-        # Add authors
-        for author_name in paper_data['authors']:
-            query = select(Author).where(Author.name == author_name)
-            result = await db.execute(query)
-            existing_author = result.scalar_one_or_none()
-            
-            if existing_author:
-                author = existing_author
-            else:
-                author = Author(name=author_name)
-                db.add(author)
-            paper.authors.append(author)
-        
-        # Add and flush the paper to the session
-        db.add(paper)
-        await db.flush()
-        
-        # Refresh the paper (relationships will be lazy-loaded or eagerly loaded)
-        await db.refresh(paper)
-        
-        return paper
-
-    except Exception as e:
-        logger.error(f"Error storing paper: {str(e)}")
-        raise
-
-
-
 @contextlib.asynccontextmanager
 async def transaction(session):
     if not session.in_transaction():
@@ -123,82 +176,174 @@ async def transaction(session):
     else:
         yield
 
-@app.post("/ingest", response_model=IngestResponse)
+@app.post("/ingest", response_model=JobResponse, status_code=202)
 async def ingest_data(request: IngestRequest, db: AsyncSession = Depends(get_db)):
-    stored_papers = []
+    """Queue an ingestion job; workers search, fetch and store in the background"""
     try:
-        logger.info(f"Starting ingestion for query: {request.query}, limit: {request.limit}")
-        
-        # Initialize PubMed service
-        async with PubMedService() as pubmed:  # Use context manager if not already initialized
-            logger.info("Searching PubMed for papers...")
-            pmids = await pubmed.search_papers(request.query, request.limit)
-            logger.info(f"Found {len(pmids)} papers: {pmids}")
-            
-            for pmid in pmids:
-                try:
-                    logger.info(f"Fetching details for PMID: {pmid}")
-                    paper_details = await pubmed.fetch_paper_details(pmid)
-                    
-                    if paper_details:
-                        logger.info(f"Processing paper: {paper_details.get('title', '')[:50]}...")
-                        async with AsyncSessionLocal() as session:
-                            async with session.begin():
-                                paper = await store_paper(session, paper_details)
-                                logger.info(f"Stored paper with PMID: {paper.pmid}")
-                                
-                                # Explicitly load authors
-                                await session.refresh(paper, ['authors'])
-                                authors = [AuthorResponse(name=author.name) for author in paper.authors]
-                                
-                                paper_response = PaperResponse(
-                                    pmid=paper.pmid,
-                                    title=paper.title,
-                                    abstract=paper.abstract,
-                                    publication_date=paper.publication_date,
-                                    journal=paper.journal,
-                                    authors=authors
-                                )
-                                stored_papers.append(paper_response)
-                                logger.info(f"Added paper to response: {paper.pmid}")
-                except Exception as e:
-                    logger.error(f"Error processing paper {pmid}: {str(e)}")
-                    continue
-        
-        logger.info(f"Completed ingestion. Total papers stored: {len(stored_papers)}")
-        return IngestResponse(
-            message=f"Successfully ingested papers for query: {request.query}",
-            ingested_count=len(stored_papers),
-            papers=stored_papers
-        )
+        async with transaction(db):
+            job = await enqueue_job(db, request.query, request.limit)
+        logger.info(f"Queued ingestion job {job.id} for query: {request.query}, limit: {request.limit}")
+        return _job_response(job)
     except Exception as e:
         logger.error(f"Ingestion error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/papers", response_model=List[PaperResponse])
+@app.get("/jobs", response_model=List[JobResponse])
+async def list_jobs(
+    status: Optional[str] = None,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db)
+):
+    """List the most recent ingestion jobs"""
+    query = select(IngestionJob).order_by(IngestionJob.id.desc()).limit(limit)
+    if status:
+        query = query.where(IngestionJob.status == status)
+    result = await db.execute(query)
+    return [_job_response(job) for job in result.scalars().all()]
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Progress, throughput and ETA of an ingestion job"""
+    job = await db.get(IngestionJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+@app.get("/jobs/{job_id}/items", response_model=JobItemsResponse)
+async def get_job_items(
+    job_id: int,
+    status: Optional[str] = Query(None, pattern="^(pending|done|failed)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Items of a job in update order; pass the returned cursor back to tail new ones"""
+    if await db.get(IngestionJob, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        items, next_cursor = await job_items(db, job_id, status=status, cursor=cursor, limit=limit)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JobItemsResponse(items=items, cursor=next_cursor)
+
+@app.post("/citations/resolve", response_model=ResolveCitationsResponse)
+async def resolve_citations(db: AsyncSession = Depends(get_db)):
+    """Link all pending citation edges whose cited paper has been ingested"""
+    try:
+        async with transaction(db):
+            resolved = await resolve_pending_citations(db)
+        return ResolveCitationsResponse(resolved_count=resolved)
+    except Exception as e:
+        logger.error(f"Citation resolution error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and size of the E-utilities response cache"""
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@app.get("/papers", response_model=List[PaperPageItem], response_model_exclude_unset=True)
 async def list_papers(
+    response: Response,
     skip: int = 0,
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    fields: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """List all ingested papers with pagination"""
+    """List ingested papers with keyset pagination.
+
+    Pass the X-Next-Cursor header of a response as ``cursor`` to get the next
+    page. ``fields`` is a comma-separated projection; full_text is only loaded
+    when requested.
+    """
     try:
-        # Create a select statement
-        query = select(Paper).options(
-            selectinload(Paper.authors)
-        ).offset(skip).limit(limit)
-        
-        # Execute the query
-        result = await db.execute(query)
-        
-        # Get all papers
-        papers = result.scalars().all()
-        
-        # Convert to PaperResponse objects
-        return [PaperResponse.from_orm(paper) for paper in papers]
-        
+        projection = parse_fields(fields)
+        papers, next_cursor = await fetch_page(
+            db, projection, limit, order_by=order_by, cursor=cursor, skip=skip
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [
+        PaperPageItem(**{
+            field: (
+                [AuthorResponse(name=author.name) for author in paper.authors]
+                if field == "authors" else getattr(paper, field)
+            )
+            for field in projection
+        })
+        for paper in papers
+    ]
+
+@app.get("/papers/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    journal: Optional[str] = None,
+    year_from: Optional[int] = Query(None, ge=1000, le=9999),
+    year_to: Optional[int] = Query(None, ge=1000, le=9999),
+    db: AsyncSession = Depends(get_db)
+):
+    """Ranked full-text search over titles and abstracts; title matches weigh more.
+
+    ``q`` takes web search syntax: quoted phrases, ``or`` and ``-excluded``.
+    Declared before /papers/{pmid} so "search" is not taken for a PMID.
+    """
+    started = time.perf_counter()
+    try:
+        results, total = await search_papers(
+            db, q, limit=limit, offset=offset, journal=journal, year_from=year_from, year_to=year_to
+        )
     except Exception as e:
+        logger.error(f"Search error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    return SearchResponse(
+        query=q,
+        total=total,
+        results=results,
+        took_ms=(time.perf_counter() - started) * 1000
+    )
+
+@app.get("/export")
+async def export_papers(
+    format: str = "ndjson",
+    since: Optional[datetime] = None,
+    include_citations: bool = False,
+    include_full_text: bool = False,
+    batch_size: int = Query(1000, ge=1, le=10000)
+):
+    """Stream the corpus, or papers updated after ``since``, as NDJSON or Parquet.
+
+    Incremental exports overlap the previous one by a few minutes, so the
+    same paper can appear in both; upsert by pmid.
+    """
+    try:
+        stream = export_stream(
+            database.session_factory,
+            format=format,
+            since=since,
+            include_citations=include_citations,
+            include_full_text=include_full_text,
+            batch_size=batch_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    extension = "ndjson" if format == "ndjson" else "parquet"
+    return StreamingResponse(
+        stream,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="papers.{extension}"'}
+    )
 
 @app.get("/papers/{pmid}", response_model=PaperResponse)
 async def get_paper(
@@ -0,0 +1,216 @@
+# Data ingestion service offline loader for PMC Open Access XML dumps
+"""Load a local PMC OA dump without touching the network.
+
+Usage:
+    python -m src.cli.bulk_load /data/pmc-oa [--workers 8] [--batch-size 2000]
+
+Walks the directory for .xml/.nxml files and .tar.gz archives, parses the
+articles in a process pool with the same extraction code as PubMedService
+and writes them through the bulk persistence path. Each archive is opened,
+decompressed and parsed by one worker, which streams parsed chunks back
+through a bounded queue.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import tarfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from shared.database import get_database
+from src.core.pmc_parser import PMCArticleParser
+from src.core.storage import store_papers_bulk
+
+logger = logging.getLogger(__name__)
+
+XML_SUFFIXES = (".xml", ".nxml")
+ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar")
+
+_parser = PMCArticleParser()
+_results: Optional[multiprocessing.Queue] = None
+_chunk_size = 100
+
+def _init_worker(results: multiprocessing.Queue, chunk_size: int) -> None:
+    global _results, _chunk_size
+    _results, _chunk_size = results, chunk_size
+
+def _parse_documents(documents: List[Tuple[str, bytes]]) -> Tuple[List[dict], int, float]:
+    """Worker: parse raw article XML, returning (papers, failures, cpu seconds)"""
+    started = time.process_time()
+    papers, failures = [], 0
+    for name, content in documents:
+        try:
+            paper = _parser._parse_paper_xml(content)
+        except Exception as e:
+            logger.warning(f"Skipping {name}: {str(e)}")
+            failures += 1
+            continue
+        if paper and paper.get("pmid") not in (None, "Unknown"):
+            papers.append(paper)
+        else:
+            failures += 1
+    return papers, failures, time.process_time() - started
+
+def _parse_files(paths: List[str]) -> int:
+    """Worker: read and parse loose XML files, so file IO is parallel too"""
+    documents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            documents.append((path, f.read()))
+    _results.put(_parse_documents(documents))
+    return 1
+
+def _parse_archive(path: str) -> int:
+    """Worker: decompress and parse a whole archive, returning the chunks sent"""
+    logger.info(f"Reading {path}")
+    sent = 0
+    for chunk in _archive_chunks(path, _chunk_size):
+        _results.put(_parse_documents(chunk))
+        sent += 1
+    return sent
+
+def _next_result(results: multiprocessing.Queue, timeout: float = 0.5):
+    try:
+        return results.get(timeout=timeout)
+    except queue.Empty:
+        return None
+
+def _walk(root: str) -> Tuple[List[str], List[str]]:
+    files, archives = [], []
+    for directory, _, names in os.walk(root):
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            if name.endswith(XML_SUFFIXES):
+                files.append(path)
+            elif name.endswith(ARCHIVE_SUFFIXES):
+                archives.append(path)
+    return files, archives
+
+def _archive_chunks(path: str, chunk_size: int) -> Iterator[List[Tuple[str, bytes]]]:
+    """Stream article members out of a tar archive in chunks"""
+    with tarfile.open(path, "r:*") as archive:
+        chunk = []
+        for member in archive:
+            if not member.isfile() or not member.name.endswith(XML_SUFFIXES):
+                continue
+            extracted = archive.extractfile(member)
+            if extracted is None:
+                continue
+            chunk.append((member.name, extracted.read()))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+class BulkLoader:
+    """Keeps the process pool saturated while batches are written to Postgres"""
+
+    def __init__(self, workers: int, batch_size: int, chunk_size: int):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.pending: List[dict] = []
+        self.in_flight = set()
+        self.chunks_sent = 0
+        self.chunks_received = 0
+        self.parsed = 0
+        self.failed = 0
+        self.parse_cpu_seconds = 0.0
+        self.written = 0
+        self.stored = 0
+        self.db_seconds = 0.0
+
+    async def run(self, root: str) -> None:
+        files, archives = _walk(root)
+        logger.info(f"Found {len(files)} XML files and {len(archives)} archives under {root}")
+        started = time.perf_counter()
+        tasks = [(_parse_files, files[i:i + self.chunk_size]) for i in range(0, len(files), self.chunk_size)]
+        tasks += [(_parse_archive, path) for path in archives]
+
+        # Bounded, so workers wait for the database instead of buffering the dump
+        results = multiprocessing.Queue(maxsize=self.workers * 2)
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(results, self.chunk_size)
+        ) as pool:
+            try:
+                for fn, payload in tasks:
+                    # Two tasks per worker keeps every core busy
+                    while len(self.in_flight) >= self.workers * 2:
+                        await self._collect(results)
+                    self.in_flight.add(pool.submit(fn, payload))
+                while self.in_flight or self.chunks_received < self.chunks_sent:
+                    await self._collect(results)
+            except BaseException:
+                # Unblock workers waiting on a full queue so the pool can shut down
+                for future in self.in_flight:
+                    future.cancel()
+                while not all(future.done() for future in self.in_flight):
+                    _next_result(results)
+                raise
+        await self._flush(final=True)
+
+        wall = time.perf_counter() - started
+        logger.info(
+            f"Parsed {self.parsed} articles ({self.failed} failed) in {wall:.1f}s: "
+            f"{self.parsed / wall if wall else 0:.0f} articles/s overall, "
+            f"{self.parsed / self.parse_cpu_seconds if self.parse_cpu_seconds else 0:.0f} articles/s per core"
+        )
+        logger.info(
+            f"Wrote {self.written} articles ({self.stored} new) in {self.db_seconds:.1f}s of database time: "
+            f"{self.written / self.db_seconds if self.db_seconds else 0:.0f} articles/s"
+        )
+
+    async def _collect(self, results: multiprocessing.Queue) -> None:
+        """Store the next parsed chunk, if any, and account for finished tasks"""
+        result = await asyncio.get_running_loop().run_in_executor(None, _next_result, results)
+        if result is not None:
+            papers, failures, cpu_seconds = result
+            self.chunks_received += 1
+            self.parsed += len(papers)
+            self.failed += failures
+            self.parse_cpu_seconds += cpu_seconds
+            self.pending.extend(papers)
+            await self._flush()
+        done: List[Future] = [future for future in self.in_flight if future.done()]
+        for future in done:
+            self.in_flight.discard(future)
+            # Re-raises a worker failure, e.g. an unreadable archive
+            self.chunks_sent += future.result()
+
+    async def _flush(self, final: bool = False) -> None:
+        """Write full batches, and the remainder too once parsing is done"""
+        while len(self.pending) >= self.batch_size or (final and self.pending):
+            batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+            started = time.perf_counter()
+            async with get_database().session() as session:
+                async with session.begin():
+                    stored = await store_papers_bulk(session, batch)
+            self.db_seconds += time.perf_counter() - started
+            self.written += len(batch)
+            self.stored += len(stored)
+            logger.info(f"Wrote batch of {len(batch)} articles ({len(stored)} new), {self.stored} stored so far")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load a local PMC Open Access XML dump")
+    parser.add_argument("directory", help="Directory containing .xml/.nxml files or .tar.gz archives")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parser processes")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Papers per database transaction")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Articles per parser task")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    loader = BulkLoader(args.workers, args.batch_size, args.chunk_size)
+    asyncio.run(loader.run(args.directory))
+
+if __name__ == "__main__":
+    main()
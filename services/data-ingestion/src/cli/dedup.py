@@ -0,0 +1,69 @@
+# Data ingestion service near-duplicate backfill command
+"""Sign papers stored before near-duplicate detection existed.
+
+Usage:
+    python -m src.cli.dedup [--batch-size 2000]
+
+Papers are walked in id order, so earlier papers become the canonical
+member of their cluster exactly as they would have at ingest time.
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+
+from shared.database import get_database
+from src.core.dedup import DuplicateDetector
+
+logger = logging.getLogger(__name__)
+
+_UNSIGNED_PAPERS = text("""
+    SELECT p.id, p.title, p.abstract
+    FROM papers p
+    WHERE p.id > :after
+      AND NOT EXISTS (SELECT 1 FROM paper_signatures s WHERE s.paper_id = p.id)
+    ORDER BY p.id
+    LIMIT :batch_size
+""")
+
+async def run(args) -> None:
+    detector = DuplicateDetector.from_env() or DuplicateDetector()
+    signed = duplicates = 0
+    after = 0
+    started = time.perf_counter()
+    while True:
+        async with get_database().session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    _UNSIGNED_PAPERS, {"after": after, "batch_size": args.batch_size}
+                )
+                rows = result.all()
+                if not rows:
+                    break
+                clusters = await detector.assign(session, [
+                    (paper_id, DuplicateDetector.paper_text({"title": title, "abstract": abstract}))
+                    for paper_id, title, abstract in rows
+                ])
+        after = rows[-1][0]
+        signed += len(clusters)
+        duplicates += sum(1 for paper_id, cluster_id in clusters.items() if paper_id != cluster_id)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Signed {signed} papers ({signed / elapsed:.0f}/s), {duplicates} near-duplicates")
+
+    logger.info(f"Backfill done: {signed} papers signed, {duplicates} near-duplicates")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill MinHash signatures and duplicate clusters")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
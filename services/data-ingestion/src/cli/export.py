@@ -0,0 +1,70 @@
+# Data ingestion service corpus export command
+"""Export papers to a local NDJSON or Parquet file.
+
+Usage:
+    python -m src.cli.export papers.parquet [--since 2024-12-01T00:00:00] [--citations]
+
+The format follows the file extension. The last line of output is the
+updated_at watermark to pass as --since on the next incremental run.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from shared.database import get_database
+from src.core.export import iter_paper_batches, ndjson_stream, parquet_stream
+
+logger = logging.getLogger(__name__)
+
+async def run(args) -> None:
+    format = "parquet" if args.output.endswith(".parquet") else "ndjson"
+    since = datetime.fromisoformat(args.since) if args.since else None
+    watermark = since
+    exported = 0
+    started = time.perf_counter()
+
+    async def tracked(batches):
+        nonlocal watermark, exported
+        async for batch in batches:
+            exported += len(batch)
+            watermark = batch[-1]["updated_at"] or watermark
+            yield batch
+
+    batches = tracked(iter_paper_batches(
+        get_database().session_factory,
+        since=since,
+        include_citations=args.citations,
+        include_full_text=args.full_text,
+        batch_size=args.batch_size
+    ))
+    if format == "parquet":
+        stream = parquet_stream(batches, args.citations, args.full_text)
+    else:
+        stream = ndjson_stream(batches)
+    with open(args.output, "wb") as f:
+        async for chunk in stream:
+            f.write(chunk)
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Exported {exported} papers to {args.output} in {elapsed:.1f}s")
+    print(watermark.isoformat() if watermark else "")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the paper corpus")
+    parser.add_argument("output", help="Output file, .ndjson or .parquet")
+    parser.add_argument("--since", help="Only papers updated after this ISO timestamp")
+    parser.add_argument("--citations", action="store_true", help="Include cited PMIDs")
+    parser.add_argument("--full-text", action="store_true", help="Include full_text")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
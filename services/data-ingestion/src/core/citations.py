@@ -0,0 +1,85 @@
+# Data ingestion service citation edge persistence
+from typing import Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Edges whose cited paper is already stored are linked on insert, everything
+# else is written as pending and linked later by resolve_pending_citations.
+_INSERT_EDGES = text("""
+    INSERT INTO paper_citations (citing_paper_id, cited_pmid, cited_paper_id, resolved_at)
+    SELECT e.citing_paper_id, e.cited_pmid, p.id,
+           CASE WHEN p.id IS NULL THEN NULL ELSE now() END
+    FROM unnest(CAST(:citing_ids AS integer[]), CAST(:cited_pmids AS varchar[]))
+         AS e(citing_paper_id, cited_pmid)
+    LEFT JOIN papers p ON p.pubmed_id = e.cited_pmid
+    ON CONFLICT ON CONSTRAINT uq_paper_citations_citing_cited_pmid DO NOTHING
+""")
+
+_RESOLVE_EDGES = text("""
+    UPDATE paper_citations pc
+    SET cited_paper_id = p.id, resolved_at = now()
+    FROM papers p
+    WHERE pc.cited_paper_id IS NULL
+      AND pc.cited_pmid = ANY(CAST(:pubmed_ids AS varchar[]))
+      AND p.pubmed_id = pc.cited_pmid
+""")
+
+# Walks the partial pending index in key order, never the linked edges
+_PENDING_PMIDS = text("""
+    SELECT DISTINCT cited_pmid
+    FROM paper_citations
+    WHERE cited_paper_id IS NULL AND cited_pmid > :after
+    ORDER BY cited_pmid
+    LIMIT :batch_size
+""")
+
+
+async def store_citations(db: AsyncSession, edges: Iterable[Tuple[int, str]]) -> int:
+    """Bulk-write (citing_paper_id, cited_pmid) edges in a single statement"""
+    unique_edges = {(citing_id, cited_pmid) for citing_id, cited_pmid in edges if cited_pmid}
+    if not unique_edges:
+        return 0
+
+    citing_ids, cited_pmids = zip(*unique_edges)
+    result = await db.execute(
+        _INSERT_EDGES,
+        {"citing_ids": list(citing_ids), "cited_pmids": list(cited_pmids)}
+    )
+    return result.rowcount
+
+
+async def resolve_pending_citations(
+    db: AsyncSession,
+    pubmed_ids: Optional[List[str]] = None,
+    batch_size: int = 5000
+) -> int:
+    """Link pending edges to papers that have since been ingested.
+
+    With ``pubmed_ids`` only edges pointing at those papers are touched, which
+    is what ingestion calls after storing a batch. Without it every distinct
+    pending PubMed ID is swept in keyset batches over the pending index.
+    """
+    if pubmed_ids is not None:
+        pubmed_ids = [pubmed_id for pubmed_id in set(pubmed_ids) if pubmed_id]
+        if not pubmed_ids:
+            return 0
+        result = await db.execute(_RESOLVE_EDGES, {"pubmed_ids": pubmed_ids})
+        return result.rowcount
+
+    resolved = 0
+    after = ""
+    while True:
+        result = await db.execute(_PENDING_PMIDS, {"after": after, "batch_size": batch_size})
+        pending = result.scalars().all()
+        if not pending:
+            break
+        result = await db.execute(_RESOLVE_EDGES, {"pubmed_ids": pending})
+        resolved += result.rowcount
+        after = pending[-1]
+
+    logger.info(f"Resolved {resolved} pending citation edges")
+    return resolved
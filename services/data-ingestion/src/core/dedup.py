@@ -0,0 +1,257 @@
+# Data ingestion service near-duplicate detection with MinHash and LSH
+import logging
+import os
+import re
+import zlib
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Smallest prime above 2**32, so a*h+b with 32-bit a, b and h fits in uint64
+_PRIME = np.uint64(4294967311)
+_MASK = np.uint64(0xFFFFFFFF)
+_TOKEN = re.compile(r"\w+")
+
+_SELECT_SIGNED = text(
+    "SELECT paper_id FROM paper_signatures WHERE paper_id = ANY(CAST(:paper_ids AS integer[]))"
+)
+
+# Candidates are papers sharing at least one band bucket with a new paper
+_SELECT_CANDIDATES = text("""
+    SELECT DISTINCT q.idx, b.paper_id
+    FROM unnest(CAST(:idx AS integer[]), CAST(:bands AS smallint[]), CAST(:buckets AS bigint[]))
+         AS q(idx, band, bucket)
+    JOIN paper_lsh_buckets b ON b.band = q.band AND b.bucket = q.bucket
+""")
+
+_SELECT_SIGNATURES = text("""
+    SELECT paper_id, signature, cluster_id FROM paper_signatures
+    WHERE paper_id = ANY(CAST(:paper_ids AS integer[]))
+""")
+
+_INSERT_SIGNATURES = text("""
+    INSERT INTO paper_signatures (paper_id, signature, cluster_id, similarity, created_at)
+    SELECT *, now() AT TIME ZONE 'utc' FROM unnest(
+        CAST(:paper_ids AS integer[]), CAST(:signatures AS bytea[]),
+        CAST(:cluster_ids AS integer[]), CAST(:similarities AS double precision[])
+    )
+    ON CONFLICT (paper_id) DO NOTHING
+""")
+
+_INSERT_BUCKETS = text("""
+    INSERT INTO paper_lsh_buckets (band, bucket, paper_id)
+    SELECT * FROM unnest(
+        CAST(:bands AS smallint[]), CAST(:buckets AS bigint[]), CAST(:paper_ids AS integer[])
+    )
+    ON CONFLICT DO NOTHING
+""")
+
+
+class MinHasher:
+    """Vectorized MinHash over word shingles with banded LSH keys.
+
+    Shingle hashes of a whole batch are concatenated into one array, every
+    permutation is applied to it at once and per-document minima are taken
+    with ``np.minimum.reduceat``, so there is no Python loop per permutation
+    or per document pair. With ``bands * rows == num_perm`` two papers share
+    a bucket with probability ``1 - (1 - s**rows)**bands`` at Jaccard ``s``.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 3,
+        seed: int = 1,
+        perm_chunk: int = 32
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.perm_chunk = perm_chunk
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._shingle_mix = rng.randint(1, 2 ** 32, size=shingle_size, dtype=np.uint64) | np.uint64(1)
+        self._band_mix = rng.randint(1, 2 ** 62, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+    def shingle_hashes(self, text_value: str) -> np.ndarray:
+        """32-bit hashes of the distinct word k-grams of a text"""
+        tokens = _TOKEN.findall((text_value or "").lower())
+        if not tokens:
+            return np.empty(0, dtype=np.uint64)
+        token_hashes = np.fromiter(
+            (zlib.crc32(token.encode()) for token in tokens), dtype=np.uint64, count=len(tokens)
+        )
+        k = min(self.shingle_size, len(tokens))
+        count = len(tokens) - k + 1
+        mixed = np.zeros(count, dtype=np.uint64)
+        for offset in range(k):
+            mixed += token_hashes[offset:offset + count] * self._shingle_mix[offset]
+        return np.unique((mixed >> np.uint64(16)) & _MASK)
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), num_perm) uint32 signatures; empty texts get all-max rows"""
+        hashes = [self.shingle_hashes(text_value) for text_value in texts]
+        lengths = np.array([len(h) for h in hashes], dtype=np.int64)
+        result = np.full((len(texts), self.num_perm), 0xFFFFFFFF, dtype=np.uint32)
+        non_empty = np.flatnonzero(lengths)
+        if not len(non_empty):
+            return result
+
+        flat = np.concatenate([hashes[i] for i in non_empty])
+        starts = np.concatenate(([0], np.cumsum(lengths[non_empty])[:-1]))
+        for lo in range(0, self.num_perm, self.perm_chunk):
+            a = self._a[lo:lo + self.perm_chunk, None]
+            b = self._b[lo:lo + self.perm_chunk, None]
+            permuted = (a * flat[None, :] + b) % _PRIME
+            minima = np.minimum.reduceat(permuted, starts, axis=1)
+            result[non_empty, lo:lo + self.perm_chunk] = (minima & _MASK).T
+        return result
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """(n, bands) int64 bucket keys, one per band of ``rows`` minima"""
+        banded = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        return (banded * self._band_mix).sum(axis=2).view(np.int64)
+
+    @staticmethod
+    def similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+        """Estimated Jaccard similarity of one signature against a stack of others"""
+        return (others == signature).mean(axis=1)
+
+
+class DuplicateDetector:
+    """Assigns newly stored papers to near-duplicate clusters.
+
+    Each paper's signature and band buckets are persisted; a paper whose
+    best candidate reaches ``threshold`` joins that candidate's cluster,
+    otherwise it starts its own cluster with itself as canonical paper.
+    """
+
+    def __init__(self, hasher: Optional[MinHasher] = None, threshold: float = 0.8):
+        self.hasher = hasher or MinHasher()
+        self.threshold = threshold
+
+    @classmethod
+    def from_env(cls) -> Optional["DuplicateDetector"]:
+        """Build the detector from DEDUP_* settings, or None when disabled"""
+        if os.getenv("DEDUP_ENABLED", "true").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            MinHasher(
+                num_perm=int(os.getenv("DEDUP_NUM_PERM", "128")),
+                bands=int(os.getenv("DEDUP_BANDS", "16")),
+                shingle_size=int(os.getenv("DEDUP_SHINGLE_SIZE", "3"))
+            ),
+            threshold=float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+        )
+
+    @staticmethod
+    def paper_text(paper: dict) -> str:
+        return f"{paper.get('title') or ''} {paper.get('abstract') or ''}"
+
+    async def assign(self, db: AsyncSession, papers: List[Tuple[int, str]]) -> Dict[int, int]:
+        """Sign ``(paper_id, text)`` pairs and return their cluster ids.
+
+        Papers that already have a signature are left untouched, so calling
+        this again for re-ingested papers is a no-op.
+        """
+        if not papers:
+            return {}
+        result = await db.execute(_SELECT_SIGNED, {"paper_ids": [paper_id for paper_id, _ in papers]})
+        signed = set(result.scalars().all())
+        papers = [(paper_id, text_value) for paper_id, text_value in dict(papers).items()
+                  if paper_id not in signed]
+        if not papers:
+            return {}
+
+        signatures = self.hasher.signatures([text_value for _, text_value in papers])
+        keys = self.hasher.band_keys(signatures)
+        # Papers without any words get no buckets and stay in their own cluster
+        has_text = (signatures != 0xFFFFFFFF).any(axis=1)
+
+        candidates = await self._stored_candidates(db, keys, has_text)
+        candidate_ids = sorted({paper_id for ids in candidates.values() for paper_id in ids})
+        stored = {}
+        if candidate_ids:
+            result = await db.execute(_SELECT_SIGNATURES, {"paper_ids": candidate_ids})
+            stored = {
+                paper_id: (np.frombuffer(signature, dtype=np.uint32), cluster_id)
+                for paper_id, signature, cluster_id in result.all()
+            }
+
+        # Earlier papers of this batch are candidates for later ones as well
+        batch_buckets = defaultdict(list)
+        clusters, similarities = [], []
+        for idx, (paper_id, _) in enumerate(papers):
+            cluster_id, best = paper_id, None
+            if has_text[idx]:
+                pool = {
+                    stored_id: stored[stored_id]
+                    for stored_id in candidates.get(idx, ()) if stored_id in stored
+                }
+                for band, key in enumerate(keys[idx]):
+                    for other in batch_buckets[(band, key)]:
+                        pool[papers[other][0]] = (signatures[other], clusters[other])
+                    batch_buckets[(band, key)].append(idx)
+                if pool:
+                    pool_ids = list(pool)
+                    scores = self.hasher.similarity(
+                        signatures[idx], np.stack([pool[other][0] for other in pool_ids])
+                    )
+                    top = int(np.argmax(scores))
+                    if scores[top] >= self.threshold:
+                        cluster_id, best = pool[pool_ids[top]][1], float(scores[top])
+            clusters.append(cluster_id)
+            similarities.append(best)
+
+        await db.execute(_INSERT_SIGNATURES, {
+            "paper_ids": [paper_id for paper_id, _ in papers],
+            "signatures": [signature.tobytes() for signature in signatures],
+            "cluster_ids": clusters,
+            "similarities": similarities,
+        })
+        rows, bands = np.nonzero(np.broadcast_to(has_text[:, None], keys.shape))
+        if len(rows):
+            await db.execute(_INSERT_BUCKETS, {
+                "bands": bands.tolist(),
+                "buckets": keys[rows, bands].tolist(),
+                "paper_ids": [papers[row][0] for row in rows.tolist()],
+            })
+
+        duplicates = sum(1 for (paper_id, _), cluster_id in zip(papers, clusters) if paper_id != cluster_id)
+        if duplicates:
+            logger.info(f"Marked {duplicates} of {len(papers)} papers as near-duplicates")
+        return {paper_id: cluster_id for (paper_id, _), cluster_id in zip(papers, clusters)}
+
+    async def _stored_candidates(
+        self, db: AsyncSession, keys: np.ndarray, has_text: np.ndarray
+    ) -> Dict[int, List[int]]:
+        rows, bands = np.nonzero(np.broadcast_to(has_text[:, None], keys.shape))
+        if not len(rows):
+            return {}
+        result = await db.execute(_SELECT_CANDIDATES, {
+            "idx": rows.tolist(),
+            "bands": bands.tolist(),
+            "buckets": keys[rows, bands].tolist(),
+        })
+        candidates = defaultdict(list)
+        for idx, paper_id in result.all():
+            candidates[idx].append(paper_id)
+        return candidates
+
+
+@lru_cache()
+def get_duplicate_detector() -> Optional[DuplicateDetector]:
+    """Process-wide detector, None when DEDUP_ENABLED is off"""
+    return DuplicateDetector.from_env()
@@ -0,0 +1,193 @@
+# Data ingestion service streaming corpus export
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import select
+
+from shared.models import Paper, Author, paper_authors, paper_citations
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # columnar export is optional
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "parquet")
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# updated_at is stamped at flush, so a paper committed after an export can
+# carry an earlier timestamp than rows that export saw. Incremental exports
+# re-read this much history before ``since``.
+SINCE_OVERLAP = timedelta(minutes=5)
+
+def _columns(include_full_text: bool):
+    columns = [
+        Paper.id, Paper.pmid, Paper.pubmed_id, Paper.title, Paper.abstract,
+        Paper.publication_date, Paper.journal, Paper.updated_at
+    ]
+    if include_full_text:
+        columns.append(Paper.full_text)
+    return columns
+
+async def _authors_by_paper(session, paper_ids: List[int]) -> Dict[int, List[str]]:
+    result = await session.execute(
+        select(paper_authors.c.paper_id, Author.name)
+        .join(Author, Author.id == paper_authors.c.author_id)
+        .where(paper_authors.c.paper_id.in_(paper_ids))
+    )
+    authors: Dict[int, List[str]] = {}
+    for paper_id, name in result.all():
+        authors.setdefault(paper_id, []).append(name)
+    return authors
+
+async def _citations_by_paper(session, paper_ids: List[int]) -> Dict[int, List[str]]:
+    result = await session.execute(
+        select(paper_citations.c.citing_paper_id, paper_citations.c.cited_pmid)
+        .where(paper_citations.c.citing_paper_id.in_(paper_ids))
+    )
+    citations: Dict[int, List[str]] = {}
+    for paper_id, cited_pmid in result.all():
+        if cited_pmid:
+            citations.setdefault(paper_id, []).append(cited_pmid)
+    return citations
+
+async def iter_paper_batches(
+    session_factory,
+    since: Optional[datetime] = None,
+    include_citations: bool = False,
+    include_full_text: bool = False,
+    batch_size: int = 1000
+) -> AsyncIterator[List[dict]]:
+    """Yield papers in (updated_at, id) order, one batch at a time.
+
+    Papers are read through a server-side cursor on one session while
+    authors and citations for each batch are looked up on a second one, so
+    memory stays constant however large the corpus is. With ``since``,
+    papers from the SINCE_OVERLAP before it are included again, so
+    consumers should upsert records by pmid.
+    """
+    query = select(*_columns(include_full_text)).order_by(Paper.updated_at, Paper.id)
+    if since is not None:
+        query = query.where(Paper.updated_at > since - SINCE_OVERLAP)
+
+    async with session_factory() as stream_session, session_factory() as lookup_session:
+        result = await stream_session.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.mappings().partitions(batch_size):
+            paper_ids = [row["id"] for row in rows]
+            authors = await _authors_by_paper(lookup_session, paper_ids)
+            citations = await _citations_by_paper(lookup_session, paper_ids) if include_citations else {}
+
+            batch = []
+            for row in rows:
+                record = dict(row)
+                paper_id = record.pop("id")
+                record["authors"] = authors.get(paper_id, [])
+                if include_citations:
+                    record["citations"] = citations.get(paper_id, [])
+                batch.append(record)
+            yield batch
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Unserializable value: {value!r}")
+
+async def ndjson_stream(batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield "".join(
+            json.dumps(record, default=_json_default, ensure_ascii=False) + "\n" for record in batch
+        ).encode()
+
+class _ChunkSink:
+    """Write-only file object that hands Parquet output back in chunks"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.buffer.extend(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+def parquet_schema(include_citations: bool, include_full_text: bool):
+    fields = [
+        ("pmid", pa.string()),
+        ("pubmed_id", pa.string()),
+        ("title", pa.string()),
+        ("abstract", pa.string()),
+        ("publication_date", pa.timestamp("us")),
+        ("journal", pa.string()),
+        ("updated_at", pa.timestamp("us")),
+    ]
+    if include_full_text:
+        fields.append(("full_text", pa.string()))
+    fields.append(("authors", pa.list_(pa.string())))
+    if include_citations:
+        fields.append(("citations", pa.list_(pa.string())))
+    return pa.schema(fields)
+
+async def parquet_stream(
+    batches: AsyncIterator[List[dict]],
+    include_citations: bool,
+    include_full_text: bool
+) -> AsyncIterator[bytes]:
+    """Zstd-compressed Parquet, one row group per batch"""
+    if pq is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+    schema = parquet_schema(include_citations, include_full_text)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def export_stream(
+    session_factory,
+    format: str = "ndjson",
+    since: Optional[datetime] = None,
+    include_citations: bool = False,
+    include_full_text: bool = False,
+    batch_size: int = 1000
+) -> AsyncIterator[bytes]:
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    if format == "parquet" and pq is None:
+        raise ValueError("Parquet export requires pyarrow")
+    batches = iter_paper_batches(
+        session_factory,
+        since=since,
+        include_citations=include_citations,
+        include_full_text=include_full_text,
+        batch_size=batch_size
+    )
+    if format == "ndjson":
+        return ndjson_stream(batches)
+    return parquet_stream(batches, include_citations, include_full_text)
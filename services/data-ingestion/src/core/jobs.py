@@ -0,0 +1,383 @@
+# Data ingestion service durable ingestion jobs backed by Postgres tables
+import asyncio
+import base64
+import json
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+
+from shared.models import IngestionJob, IngestionJobItem
+from .citations import resolve_pending_citations
+from .pagination import CursorError
+from .pubmed_service import PubMedService
+from .storage import ingest_paper
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+class JobLost(Exception):
+    """The job was claimed by another worker after this one stopped heartbeating"""
+
+def _owned(job_id: int):
+    return (IngestionJob.id == job_id) & (IngestionJob.worker_id == WORKER_ID)
+
+async def enqueue_job(db, query: str, limit: int) -> IngestionJob:
+    """Record a queued job, picked up by whichever worker polls first"""
+    job = IngestionJob(query=query, limit=limit, status='queued')
+    db.add(job)
+    await db.flush()
+    return job
+
+def job_progress(job: IngestionJob) -> Dict[str, Optional[float]]:
+    """Throughput since the job started and the ETA at that rate"""
+    processed = job.completed_items + job.failed_items
+    remaining = max(job.total_items - processed, 0)
+    end = job.finished_at or datetime.utcnow()
+    elapsed = (end - job.started_at).total_seconds() if job.started_at else 0.0
+    throughput = processed / elapsed if elapsed > 0 else None
+    eta = remaining / throughput if throughput and job.status == 'running' else None
+    return {
+        "processed_items": processed,
+        "remaining_items": remaining,
+        "elapsed_seconds": elapsed,
+        "papers_per_second": throughput,
+        "eta_seconds": eta,
+    }
+
+def encode_item_cursor(item: IngestionJobItem) -> str:
+    payload = {"u": item.updated_at.isoformat(), "p": item.pmid}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+def decode_item_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(payload["u"]), str(payload["p"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {str(e)}")
+
+async def job_items(
+    db,
+    job_id: int,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 500
+) -> Tuple[List[IngestionJobItem], Optional[str]]:
+    """Items of a job in the order they were last updated, after ``cursor``.
+
+    Returns the items and the cursor to pass next time; when nothing new
+    has arrived the given cursor comes back, so callers can tail a running
+    job. Items committed late with an older timestamp can be skipped, so a
+    tailing caller should read once more from the start when the job ends.
+    """
+    query = (
+        select(IngestionJobItem)
+        .where(IngestionJobItem.job_id == job_id)
+        .order_by(IngestionJobItem.updated_at, IngestionJobItem.pmid)
+        .limit(limit)
+    )
+    if status:
+        query = query.where(IngestionJobItem.status == status)
+    if cursor:
+        query = query.where(
+            tuple_(IngestionJobItem.updated_at, IngestionJobItem.pmid) > decode_item_cursor(cursor)
+        )
+    items = list((await db.execute(query)).scalars().all())
+    return items, encode_item_cursor(items[-1]) if items else cursor
+
+class IngestionWorker:
+    """Claims queued or abandoned jobs and works through them in batches.
+
+    Every PMID of a job is a row in ``ingestion_job_items``, so progress is
+    checkpointed per paper. A job whose worker stops heartbeating is claimed
+    again and continues with the items that are still pending. Failed items
+    are retried with exponential backoff until ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        batch_size: int = 20,
+        poll_interval: float = 2.0,
+        max_attempts: int = 5,
+        backoff_base: float = 30.0,
+        backoff_max: float = 3600.0,
+        heartbeat_timeout: float = 120.0
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.heartbeat_timeout = heartbeat_timeout
+
+    @classmethod
+    def from_env(cls, session_factory) -> "IngestionWorker":
+        return cls(
+            session_factory,
+            batch_size=int(os.getenv("INGESTION_BATCH_SIZE", "20")),
+            poll_interval=float(os.getenv("INGESTION_POLL_INTERVAL", "2")),
+            max_attempts=int(os.getenv("INGESTION_MAX_ATTEMPTS", "5")),
+            backoff_base=float(os.getenv("INGESTION_BACKOFF_BASE", "30")),
+            backoff_max=float(os.getenv("INGESTION_BACKOFF_MAX", "3600")),
+            heartbeat_timeout=float(os.getenv("INGESTION_HEARTBEAT_TIMEOUT", "120"))
+        )
+
+    async def run(self) -> None:
+        """Poll for jobs until cancelled"""
+        logger.info(f"Ingestion worker {WORKER_ID} started")
+        while True:
+            job_id = None
+            try:
+                job_id = await self._claim_job()
+                if job_id is None:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                if job_id is not None:
+                    await asyncio.shield(self._release_job(job_id))
+                raise
+            except JobLost:
+                logger.warning(f"Job {job_id} was claimed by another worker, dropping it")
+            except Exception as e:
+                logger.error(f"Ingestion worker error on job {job_id}: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _claim_job(self) -> Optional[int]:
+        stale = datetime.utcnow() - timedelta(seconds=self.heartbeat_timeout)
+        async with self.session_factory() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(IngestionJob)
+                    .where(or_(
+                        IngestionJob.status == 'queued',
+                        (IngestionJob.status == 'running') & (IngestionJob.heartbeat_at < stale)
+                    ))
+                    .order_by(IngestionJob.id)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                job = result.scalar_one_or_none()
+                if job is None:
+                    return None
+                if job.status == 'running':
+                    logger.info(f"Resuming job {job.id} abandoned by {job.worker_id}")
+                now = datetime.utcnow()
+                job.status = 'running'
+                job.worker_id = WORKER_ID
+                job.heartbeat_at = now
+                job.started_at = job.started_at or now
+                return job.id
+
+    async def _release_job(self, job_id: int) -> None:
+        """Hand an interrupted job back to the queue so it resumes right away"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.execute(
+                    update(IngestionJob)
+                    .where(_owned(job_id))
+                    .values(status='queued', worker_id=None)
+                )
+        logger.info(f"Released job {job_id} back to the queue")
+
+    async def _run_job(self, job_id: int) -> None:
+        async with PubMedService() as pubmed:
+            if not await self._ensure_items(job_id, pubmed):
+                return
+
+            while True:
+                pmids = await self._ready_items(job_id)
+                if pmids:
+                    await self._process_batch(job_id, pmids, pubmed)
+                    continue
+
+                retry_at = await self._next_retry(job_id)
+                if retry_at is None:
+                    break
+                await self._checkpoint(job_id)
+                await self._wait(job_id, min((retry_at - datetime.utcnow()).total_seconds(), self.heartbeat_timeout))
+
+        await self._finish_job(job_id)
+
+    async def _wait(self, job_id: int, seconds: float) -> None:
+        """Sleep, heartbeating often enough that the job is not stolen meanwhile"""
+        deadline = datetime.utcnow() + timedelta(seconds=max(seconds, 0.0))
+        while True:
+            remaining = (deadline - datetime.utcnow()).total_seconds()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, self.heartbeat_timeout / 2))
+            await self._heartbeat(job_id)
+
+    async def _update_job(self, session, job_id: int, **values) -> None:
+        """Update the job only while this worker owns it, else raise JobLost.
+
+        The update also locks the job row until the transaction ends, so
+        the job cannot be claimed away while the rest of it is written.
+        """
+        result = await session.execute(update(IngestionJob).where(_owned(job_id)).values(**values))
+        if result.rowcount == 0:
+            raise JobLost(job_id)
+
+    async def _heartbeat(self, job_id: int, session=None) -> None:
+        if session is not None:
+            await self._update_job(session, job_id, heartbeat_at=datetime.utcnow())
+            return
+        async with self.session_factory() as session:
+            async with session.begin():
+                await self._update_job(session, job_id, heartbeat_at=datetime.utcnow())
+
+    async def _ensure_items(self, job_id: int, pubmed: PubMedService) -> bool:
+        """Run the search once per job and store its PMIDs as pending items"""
+        async with self.session_factory() as session:
+            job = await session.get(IngestionJob, job_id)
+            if job.searched_at is not None:
+                return True
+            query, limit = job.query, job.limit
+
+        pmids = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                delay = min(self.backoff_base * 2 ** (attempt - 1), self.backoff_max)
+                logger.warning(f"Job {job_id}: PubMed search failed, retrying in {delay}s")
+                await self._wait(job_id, delay)
+            pmids = await pubmed.search_papers(query, limit)
+            if pmids is not None:
+                break
+        async with self.session_factory() as session:
+            async with session.begin():
+                if not pmids:
+                    await self._update_job(
+                        session,
+                        job_id,
+                        status='failed',
+                        error=(
+                            'Search returned no papers' if pmids is not None
+                            else f'PubMed search failed after {self.max_attempts} attempts'
+                        ),
+                        finished_at=datetime.utcnow()
+                    )
+                    return False
+                await self._update_job(
+                    session,
+                    job_id,
+                    total_items=len(set(pmids)),
+                    searched_at=datetime.utcnow(),
+                    heartbeat_at=datetime.utcnow()
+                )
+                await session.execute(
+                    insert(IngestionJobItem)
+                    .values([{"job_id": job_id, "pmid": pmid} for pmid in dict.fromkeys(pmids)])
+                    .on_conflict_do_nothing()
+                )
+        logger.info(f"Job {job_id}: {len(pmids)} papers to ingest for query {query!r}")
+        return True
+
+    async def _ready_items(self, job_id: int) -> List[str]:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(IngestionJobItem.pmid)
+                .where(
+                    IngestionJobItem.job_id == job_id,
+                    IngestionJobItem.status == 'pending',
+                    IngestionJobItem.next_attempt_at <= datetime.utcnow()
+                )
+                .order_by(IngestionJobItem.pmid)
+                .limit(self.batch_size)
+            )
+            return result.scalars().all()
+
+    async def _next_retry(self, job_id: int) -> Optional[datetime]:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(func.min(IngestionJobItem.next_attempt_at))
+                .where(IngestionJobItem.job_id == job_id, IngestionJobItem.status == 'pending')
+            )
+            return result.scalar()
+
+    async def _process_batch(self, job_id: int, pmids: List[str], pubmed: PubMedService) -> None:
+        stored_pubmed_ids = []
+        for pmid in pmids:
+            try:
+                paper_details = await pubmed.fetch_paper_details(pmid)
+                if not paper_details:
+                    raise ValueError("No article in efetch response")
+                async with self.session_factory() as session:
+                    async with session.begin():
+                        # Per item, since a batch of efetches can outlast the heartbeat timeout
+                        await self._heartbeat(job_id, session)
+                        paper = await ingest_paper(session, paper_details)
+                        await session.execute(
+                            update(IngestionJobItem)
+                            .where(
+                                IngestionJobItem.job_id == job_id,
+                                IngestionJobItem.pmid == pmid,
+                                select(IngestionJob.id).where(_owned(job_id)).exists()
+                            )
+                            .values(
+                                status='done',
+                                attempts=IngestionJobItem.attempts + 1,
+                                paper_id=paper.id,
+                                last_error=None
+                            )
+                        )
+                        if paper.pubmed_id:
+                            stored_pubmed_ids.append(paper.pubmed_id)
+            except JobLost:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id}: error ingesting {pmid}: {str(e)}")
+                await self._record_failure(job_id, pmid, str(e))
+
+        if stored_pubmed_ids:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    await resolve_pending_citations(session, stored_pubmed_ids)
+        await self._checkpoint(job_id)
+
+    async def _record_failure(self, job_id: int, pmid: str, error: str) -> None:
+        async with self.session_factory() as session:
+            async with session.begin():
+                # First, so the item is only written while the job row is ours and locked
+                await self._heartbeat(job_id, session)
+                item = await session.get(IngestionJobItem, (job_id, pmid))
+                item.attempts += 1
+                item.last_error = error
+                if item.attempts >= self.max_attempts:
+                    item.status = 'failed'
+                else:
+                    delay = min(self.backoff_base * 2 ** (item.attempts - 1), self.backoff_max)
+                    item.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+    async def _checkpoint(self, job_id: int) -> None:
+        """Refresh the job's counters and heartbeat from its items"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(IngestionJobItem.status, func.count())
+                    .where(IngestionJobItem.job_id == job_id)
+                    .group_by(IngestionJobItem.status)
+                )
+                counts = dict(result.all())
+                await self._update_job(
+                    session,
+                    job_id,
+                    completed_items=counts.get('done', 0),
+                    failed_items=counts.get('failed', 0),
+                    heartbeat_at=datetime.utcnow()
+                )
+
+    async def _finish_job(self, job_id: int) -> None:
+        await self._checkpoint(job_id)
+        async with self.session_factory() as session:
+            async with session.begin():
+                await self._update_job(session, job_id, status='completed', finished_at=datetime.utcnow())
+        logger.info(f"Job {job_id} completed")
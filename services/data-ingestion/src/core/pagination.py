@@ -0,0 +1,119 @@
+# Data ingestion service keyset pagination and column projection for papers
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.future import select
+from sqlalchemy.orm import load_only, selectinload
+
+from shared.models import Paper
+
+ORDERINGS = ("id", "publication_date")
+
+# Columns a client may project; authors is a relationship, not a column
+PROJECTABLE_FIELDS = ("pmid", "pubmed_id", "title", "abstract", "publication_date", "journal", "full_text", "authors")
+DEFAULT_FIELDS = ("pmid", "title", "abstract", "publication_date", "journal", "authors")
+
+class CursorError(ValueError):
+    pass
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    if not fields:
+        return DEFAULT_FIELDS
+    requested = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in PROJECTABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+def encode_cursor(order_by: str, paper: Paper) -> str:
+    payload = {"o": order_by, "id": paper.id}
+    if order_by == "publication_date":
+        payload["d"] = paper.publication_date.isoformat() if paper.publication_date else None
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+def decode_cursor(cursor: str, order_by: str) -> Dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(payload, dict):
+            raise ValueError("cursor is not an object")
+        if payload.get("o") != order_by or not isinstance(payload.get("id"), int):
+            raise ValueError("cursor does not match order_by")
+        if payload.get("d"):
+            payload["d"] = datetime.fromisoformat(payload["d"])
+        return payload
+    except (ValueError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {str(e)}")
+
+def _projected(query, fields: Tuple[str, ...]):
+    # id and publication_date are always needed to build the next cursor;
+    # full_text and abstract stay unloaded unless asked for
+    columns = [Paper.id, Paper.publication_date] + [
+        getattr(Paper, field) for field in fields if field not in ("authors", "publication_date")
+    ]
+    query = query.options(load_only(*columns))
+    if "authors" in fields:
+        query = query.options(selectinload(Paper.authors))
+    return query
+
+async def fetch_page(
+    db,
+    fields: Tuple[str, ...],
+    limit: int,
+    order_by: str = "id",
+    cursor: Optional[str] = None,
+    skip: int = 0
+) -> Tuple[List[Paper], Optional[str]]:
+    """One page of papers plus the cursor for the next page (None at the end).
+
+    ``id`` pages ascend by id. ``publication_date`` pages go newest first with
+    undated papers last, matching ix_papers_publication_date_id, so each page
+    is an index range scan no matter how deep it is.
+    """
+    if order_by not in ORDERINGS:
+        raise ValueError(f"order_by must be one of {', '.join(ORDERINGS)}")
+    position = decode_cursor(cursor, order_by) if cursor else None
+
+    if order_by == "id":
+        query = _projected(select(Paper), fields).order_by(Paper.id).limit(limit)
+        if position:
+            query = query.where(Paper.id > position["id"])
+        elif skip:
+            # Legacy offset paging, still linear in skip
+            query = query.offset(skip)
+        papers = (await db.execute(query)).scalars().all()
+    else:
+        dated = _projected(select(Paper), fields).order_by(
+            Paper.publication_date.desc().nullslast(), Paper.id.desc()
+        )
+        undated = _projected(select(Paper), fields).where(Paper.publication_date.is_(None)).order_by(
+            Paper.publication_date.desc().nullslast(), Paper.id.desc()
+        )
+        papers = []
+        undated_skip = 0
+        if position is None or position.get("d") is not None:
+            if position:
+                dated = dated.where(tuple_(Paper.publication_date, Paper.id) < (position["d"], position["id"]))
+            else:
+                dated = dated.where(Paper.publication_date.isnot(None))
+                if skip:
+                    dated = dated.offset(skip)
+            papers = (await db.execute(dated.limit(limit))).scalars().all()
+            if skip and not position and not papers:
+                # The offset ran past every dated paper, the rest applies to the undated tail
+                dated_count = await db.scalar(
+                    select(func.count()).select_from(Paper).where(Paper.publication_date.isnot(None))
+                )
+                undated_skip = skip - dated_count
+            position = None
+        if len(papers) < limit:
+            if position:
+                undated = undated.where(Paper.id < position["id"])
+            elif undated_skip:
+                undated = undated.offset(undated_skip)
+            papers += (await db.execute(undated.limit(limit - len(papers)))).scalars().all()
+
+    next_cursor = encode_cursor(order_by, papers[-1]) if len(papers) == limit else None
+    return papers, next_cursor
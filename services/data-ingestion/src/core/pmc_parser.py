@@ -0,0 +1,114 @@
+# Data ingestion service PMC article XML parsing
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import List, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PMCArticleParser:
+    """Field extraction for PMC JATS article XML.
+
+    Holds no state, so it is shared by PubMedService and by the offline bulk
+    loader's worker processes.
+    """
+
+    def _parse_paper_xml(self, xml_content: bytes) -> Dict:
+        """Parse paper XML and extract relevant information"""
+        root = ET.fromstring(xml_content)
+        # efetch wraps articles in <pmc-articleset>, OA bulk .nxml files do not
+        article = root if root.tag == "article" else root.find(".//article")
+        
+        if article is None:
+            return {}
+            
+        # Extract basic metadata
+        paper_data = {
+            "pmid": self._get_pmid(root),
+            "pubmed_id": self._get_pubmed_id(article),
+            "title": self._get_title(article),
+            "abstract": self._get_abstract(article),
+            "publication_date": self._get_publication_date(article),
+            "journal": self._get_journal(article),
+            "authors": self._get_authors(article),
+            "citations": self._get_citations(article),
+            "full_text": self._get_full_text(article)
+        }
+        
+        return paper_data
+
+    def _get_pmid(self, root) -> str:
+        pmid = root.find(".//article-id[@pub-id-type='pmc']")
+        if pmid is None or not pmid.text:
+            return "Unknown"
+        # OA bulk files spell the ID as PMC1234567, efetch as 1234567
+        pmid = pmid.text.strip()
+        return pmid[3:] if pmid.upper().startswith("PMC") else pmid
+
+    def _get_pubmed_id(self, article) -> Optional[str]:
+        pubmed_id = article.find(".//article-meta/article-id[@pub-id-type='pmid']")
+        return pubmed_id.text if pubmed_id is not None else None
+
+    def _get_title(self, article) -> str:
+        title_elem = article.find(".//article-title")
+        return self._extract_text(title_elem) if title_elem is not None else "No title"
+
+    def _get_abstract(self, article) -> str:
+        abstract_elem = article.find(".//abstract")
+        return self._extract_text(abstract_elem) if abstract_elem is not None else ""
+
+    def _get_publication_date(self, article) -> Optional[datetime]:
+        try:
+            pub_date = article.find(".//pub-date")
+            if pub_date is not None:
+                year = pub_date.find("year")
+                month = pub_date.find("month")
+                day = pub_date.find("day")
+                
+                year = int(year.text) if year is not None else 1900
+                month = int(month.text) if month is not None else 1
+                day = int(day.text) if day is not None else 1
+                
+                return datetime(year, month, day)
+        except Exception as e:
+            logger.warning(f"Error parsing publication date: {str(e)}")
+        return None
+
+    def _get_journal(self, article) -> str:
+        journal_elem = article.find(".//journal-title")
+        return self._extract_text(journal_elem) if journal_elem is not None else ""
+
+    def _get_authors(self, article) -> List[str]:
+        authors = []
+        author_list = article.findall(".//contrib[@contrib-type='author']")
+        
+        for author_elem in author_list:
+            name_elem = author_elem.find(".//surname")
+            if name_elem is not None:
+                given_names = author_elem.find(".//given-names")
+                full_name = f"{self._extract_text(name_elem)}"
+                if given_names is not None:
+                    full_name = f"{self._extract_text(given_names)} {full_name}"
+                authors.append(full_name)
+                
+        return authors
+
+    def _get_citations(self, article) -> List[str]:
+        citations = []
+        ref_list = article.findall(".//ref")
+        
+        for ref in ref_list:
+            pub_id = ref.find(".//pub-id[@pub-id-type='pmid']")
+            if pub_id is not None:
+                citations.append(pub_id.text)
+                
+        return citations
+
+    def _get_full_text(self, article) -> str:
+        body_elem = article.find(".//body")
+        return self._extract_text(body_elem) if body_elem is not None else ""
+
+    def _extract_text(self, element) -> str:
+        if element is None:
+            return ""
+        return ' '.join(element.itertext()).strip()
\ No newline at end of file
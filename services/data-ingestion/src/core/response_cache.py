@@ -0,0 +1,189 @@
+# Data ingestion service persistent cache for E-utilities responses
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Parameters that do not change the response body
+IGNORED_PARAMS = {"api_key", "tool", "email"}
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    content_type: str
+
+class ResponseCache:
+    """Compressed on-disk cache of E-utilities responses.
+
+    Entries live in a single SQLite file keyed by endpoint and normalized
+    parameters. Each endpoint has its own TTL, and once the stored bodies
+    exceed ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 2 * 1024 ** 3,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 3600.0
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "eutils_cache.sqlite3")
+        self.max_bytes = max_bytes
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.metrics = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                content_type TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """Build the cache from PUBMED_CACHE_* settings, or None when disabled"""
+        directory = os.getenv("PUBMED_CACHE_DIR", "")
+        if not directory:
+            return None
+        try:
+            return cls(
+                directory,
+                max_bytes=int(os.getenv("PUBMED_CACHE_MAX_BYTES", str(2 * 1024 ** 3))),
+                ttls={
+                    # Search results change as PMC grows, article XML does not
+                    "esearch.fcgi": float(os.getenv("PUBMED_CACHE_ESEARCH_TTL", "3600")),
+                    "efetch.fcgi": float(os.getenv("PUBMED_CACHE_EFETCH_TTL", str(30 * 24 * 3600))),
+                },
+                default_ttl=float(os.getenv("PUBMED_CACHE_DEFAULT_TTL", "3600"))
+            )
+        except (OSError, sqlite3.Error) as e:
+            # The service works without the cache, so a bad directory must not stop it starting
+            logger.warning(f"E-utilities cache disabled, cannot use {directory}: {str(e)}")
+            return None
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict) -> str:
+        normalized = sorted(
+            (str(name), str(value).strip())
+            for name, value in params.items()
+            if name not in IGNORED_PARAMS and value is not None
+        )
+        payload = json.dumps([endpoint, normalized], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, endpoint: str, params: Dict) -> Optional[CachedResponse]:
+        return await asyncio.to_thread(self._get, self.make_key(endpoint, params))
+
+    async def set(self, endpoint: str, params: Dict, body: bytes, content_type: str) -> None:
+        ttl = self.ttls.get(endpoint, self.default_ttl)
+        if ttl <= 0:
+            return
+        await asyncio.to_thread(
+            self._set, self.make_key(endpoint, params), endpoint, body, content_type, ttl
+        )
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_type, body, size, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.metrics["misses"] += 1
+                return None
+            content_type, body, size, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._size -= size
+                self.metrics["expired"] += 1
+                self.metrics["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.metrics["hits"] += 1
+        return CachedResponse(body=zlib.decompress(body), content_type=content_type)
+
+    def _set(self, key: str, endpoint: str, body: bytes, content_type: str, ttl: float) -> None:
+        compressed = zlib.compress(body, 6)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, endpoint, content_type, body, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, content_type, compressed, len(compressed), now + ttl, now)
+            )
+            self._size += len(compressed) - (previous[0] if previous else 0)
+            self.metrics["stores"] += 1
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones down to 90% of the cap"""
+        target = int(self.max_bytes * 0.9)
+        self._conn.execute("BEGIN")
+        try:
+            self.metrics["evictions"] += self._conn.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at")
+            victims = []
+            for key, size in rows:
+                if self._size <= target:
+                    break
+                victims.append((key,))
+                self._size -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+            self.metrics["evictions"] += len(victims)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_ratio": self.metrics["hits"] / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+@lru_cache()
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache shared by every PubMedService instance"""
+    cache = ResponseCache.from_env()
+    if cache is not None:
+        logger.info(f"E-utilities response cache enabled at {cache.path}")
+    return cache
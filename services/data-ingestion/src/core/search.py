@@ -0,0 +1,71 @@
+# Data ingestion service ranked full-text search over paper titles and abstracts
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+# ts_rank_cd normalization 32 maps ranks into [0, 1) so they are comparable across queries
+SEARCH_SQL = """
+    WITH q AS (SELECT websearch_to_tsquery('english', :query) AS query),
+    matches AS (
+        SELECT p.id, ts_rank_cd(p.search_vector, q.query, 32) AS rank, count(*) OVER () AS total
+        FROM papers p, q
+        WHERE p.search_vector @@ q.query {filters}
+        ORDER BY rank DESC, p.id
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT p.pmid, p.title, p.journal, p.publication_date, m.rank, m.total,
+           ts_headline('english', coalesce(p.abstract, ''), q.query,
+                       'MaxFragments=2, MinWords=8, MaxWords=25') AS snippet
+    FROM matches m JOIN papers p ON p.id = m.id, q
+    ORDER BY m.rank DESC, p.id
+"""
+
+# The window count above rides on the page rows, an empty page needs its own count
+COUNT_SQL = """
+    SELECT count(*)
+    FROM papers p, websearch_to_tsquery('english', :query) AS q(query)
+    WHERE p.search_vector @@ q.query {filters}
+"""
+
+async def search_papers(
+    db,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    journal: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Papers matching a web-style query (quoted phrases, ``or``, ``-term``), best first.
+
+    Matches are found through the GIN index on papers.search_vector; only
+    the returned page is read back for snippets. Returns the page and the
+    total number of matches.
+    """
+    filters = []
+    params: Dict[str, Any] = {"query": query}
+    if journal:
+        filters.append("p.journal = :journal")
+        params["journal"] = journal
+    if year_from is not None:
+        filters.append("p.publication_date >= :date_from")
+        params["date_from"] = datetime(year_from, 1, 1)
+    if year_to is not None:
+        filters.append("p.publication_date < :date_to")
+        params["date_to"] = datetime(year_to + 1, 1, 1)
+    conditions = "".join(f" AND {condition}" for condition in filters)
+
+    result = await db.execute(
+        text(SEARCH_SQL.format(filters=conditions)), {**params, "limit": limit, "offset": offset}
+    )
+    rows = [dict(row._mapping) for row in result.all()]
+    if rows:
+        total = rows[0]["total"]
+    elif offset:
+        total = (await db.execute(text(COUNT_SQL.format(filters=conditions)), params)).scalar()
+    else:
+        total = 0
+    for row in rows:
+        row.pop("total")
+    return rows, total
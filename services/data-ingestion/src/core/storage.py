@@ -0,0 +1,168 @@
+# Data ingestion service paper persistence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy import text
+import logging
+from typing import Dict, List
+
+from shared.events import publish_paper_events
+from shared.models import Paper, Author
+from .citations import store_citations, resolve_pending_citations
+from .dedup import DuplicateDetector, get_duplicate_detector
+
+logger = logging.getLogger(__name__)
+
+# Bulk statements bind one array per column, so a batch of any size is a
+# single round trip and never hits the bind parameter limit.
+_BULK_INSERT_PAPERS = text("""
+    INSERT INTO papers (pmid, pubmed_id, title, abstract, publication_date, journal, full_text,
+                        created_at, updated_at)
+    SELECT p.pmid, p.pubmed_id, p.title, p.abstract, p.publication_date, p.journal, p.full_text,
+           now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'
+    FROM unnest(
+        CAST(:pmids AS varchar[]), CAST(:pubmed_ids AS varchar[]), CAST(:titles AS text[]),
+        CAST(:abstracts AS text[]), CAST(:publication_dates AS timestamp[]),
+        CAST(:journals AS varchar[]), CAST(:full_texts AS text[])
+    ) AS p(pmid, pubmed_id, title, abstract, publication_date, journal, full_text)
+    ON CONFLICT DO NOTHING
+    RETURNING id, pmid
+""")
+
+_BULK_INSERT_AUTHORS = text("""
+    INSERT INTO authors (name, created_at)
+    SELECT name, now() AT TIME ZONE 'utc' FROM unnest(CAST(:names AS varchar[])) AS a(name)
+    ON CONFLICT (name) DO NOTHING
+""")
+
+_SELECT_AUTHOR_IDS = text("SELECT id, name FROM authors WHERE name = ANY(CAST(:names AS varchar[]))")
+
+_BULK_INSERT_PAPER_AUTHORS = text("""
+    INSERT INTO paper_authors (paper_id, author_id)
+    SELECT * FROM unnest(CAST(:paper_ids AS integer[]), CAST(:author_ids AS integer[]))
+""")
+
+async def store_paper(db: AsyncSession, paper_data: dict) -> Paper:
+    try:
+        # Check if the paper already exists
+        query = select(Paper).options(selectinload(Paper.authors)).where(Paper.pmid == paper_data['pmid'])
+        result = await db.execute(query)
+        existing_paper = result.scalar_one_or_none()
+        
+        if existing_paper:
+            if existing_paper.pubmed_id is None and paper_data.get('pubmed_id'):
+                existing_paper.pubmed_id = paper_data['pubmed_id']
+            return existing_paper
+        
+        # Create a new paper object
+        paper = Paper(
+            pmid=paper_data['pmid'],
+            pubmed_id=paper_data.get('pubmed_id'),
+            title=paper_data['title'],
+            abstract=paper_data['abstract'],
+            publication_date=paper_data['publication_date'],
+            journal=paper_data['journal'],
+            full_text=paper_data.get('full_text', '')
+        )
+        
+        # Add authors; a name listed twice is one paper_authors row
+        for author_name in dict.fromkeys(paper_data['authors']):
+            query = select(Author).where(Author.name == author_name)
+            result = await db.execute(query)
+            existing_author = result.scalar_one_or_none()
+            
+            if existing_author:
+                author = existing_author
+            else:
+                author = Author(name=author_name)
+                db.add(author)
+            paper.authors.append(author)
+        
+        # Add and flush the paper to the session
+        db.add(paper)
+        await db.flush()
+        
+        # Refresh the paper (relationships will be lazy-loaded or eagerly loaded)
+        await db.refresh(paper)
+        
+        return paper
+
+    except Exception as e:
+        logger.error(f"Error storing paper: {str(e)}")
+        raise
+
+
+async def ingest_paper(db: AsyncSession, paper_data: dict) -> Paper:
+    """Store a parsed paper together with its outgoing citation edges"""
+    paper = await store_paper(db, paper_data)
+    edge_count = await store_citations(
+        db,
+        ((paper.id, cited) for cited in paper_data.get('citations', []))
+    )
+    logger.info(f"Stored paper {paper.pmid} with {edge_count} new citation edges")
+    detector = get_duplicate_detector()
+    if detector is not None:
+        await detector.assign(db, [(paper.id, DuplicateDetector.paper_text(paper_data))])
+    # Processing and indexing pick the paper up once this transaction commits
+    await publish_paper_events(db, [(paper.id, paper.pmid)])
+    return paper
+
+
+async def store_papers_bulk(db: AsyncSession, papers: List[dict]) -> Dict[str, int]:
+    """Insert parsed papers with authors and citations in a handful of statements.
+
+    Papers whose PMID is already stored are skipped entirely. Returns the new
+    papers' ids keyed by PMID.
+    """
+    unique_papers = list({paper['pmid']: paper for paper in papers if paper.get('pmid')}.values())
+    if not unique_papers:
+        return {}
+
+    result = await db.execute(_BULK_INSERT_PAPERS, {
+        "pmids": [paper['pmid'] for paper in unique_papers],
+        "pubmed_ids": [paper.get('pubmed_id') for paper in unique_papers],
+        "titles": [paper['title'] for paper in unique_papers],
+        "abstracts": [paper.get('abstract') for paper in unique_papers],
+        "publication_dates": [paper.get('publication_date') for paper in unique_papers],
+        "journals": [(paper.get('journal') or '')[:255] for paper in unique_papers],
+        "full_texts": [paper.get('full_text', '') for paper in unique_papers],
+    })
+    paper_ids = {pmid: paper_id for paper_id, pmid in result.all()}
+    new_papers = [paper for paper in unique_papers if paper['pmid'] in paper_ids]
+    if not new_papers:
+        return paper_ids
+
+    names = sorted({name[:255] for paper in new_papers for name in paper.get('authors', [])})
+    if names:
+        await db.execute(_BULK_INSERT_AUTHORS, {"names": names})
+        result = await db.execute(_SELECT_AUTHOR_IDS, {"names": names})
+        author_ids = {name: author_id for author_id, name in result.all()}
+
+        links = {
+            (paper_ids[paper['pmid']], author_ids[name[:255]])
+            for paper in new_papers
+            for name in paper.get('authors', [])
+        }
+        if links:
+            linked_papers, linked_authors = zip(*links)
+            await db.execute(_BULK_INSERT_PAPER_AUTHORS, {
+                "paper_ids": list(linked_papers),
+                "author_ids": list(linked_authors)
+            })
+
+    await store_citations(db, (
+        (paper_ids[paper['pmid']], cited)
+        for paper in new_papers
+        for cited in paper.get('citations', [])
+    ))
+    await resolve_pending_citations(
+        db, [paper['pubmed_id'] for paper in new_papers if paper.get('pubmed_id')]
+    )
+    detector = get_duplicate_detector()
+    if detector is not None:
+        await detector.assign(db, [
+            (paper_ids[paper['pmid']], DuplicateDetector.paper_text(paper))
+            for paper in new_papers
+        ])
+    await publish_paper_events(db, ((paper_ids[paper['pmid']], paper['pmid']) for paper in new_papers))
+    return paper_ids
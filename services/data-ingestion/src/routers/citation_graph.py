@@ -0,0 +1,171 @@
+# Data ingestion service citation graph endpoints
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+import os
+from typing import List, Optional
+from pydantic import BaseModel
+import numpy as np
+
+from shared.citation_graph import CitationGraph, DIRECTIONS
+from shared.database import get_db
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/citations/graph", tags=["citation-graph"])
+
+# One graph per worker process, refreshed incrementally once it is this old
+citation_graph = CitationGraph()
+GRAPH_MAX_AGE = float(os.getenv("CITATION_GRAPH_MAX_AGE", "300"))
+
+class GraphPaper(BaseModel):
+    pmid: str
+    in_degree: int
+    out_degree: int
+    hops: Optional[int] = None
+    shared: Optional[int] = None
+    pagerank: Optional[float] = None
+
+class DegreeResponse(BaseModel):
+    pmid: str
+    in_degree: int
+    out_degree: int
+
+class NeighborhoodResponse(BaseModel):
+    pmid: str
+    hops: int
+    direction: str
+    total: int
+    papers: List[GraphPaper]
+
+class RankRequest(BaseModel):
+    pmids: List[str]
+    by: str = "in_degree"
+
+class RankResponse(BaseModel):
+    papers: List[GraphPaper]
+    missing: List[str]
+
+async def get_graph(db: AsyncSession = Depends(get_db)) -> CitationGraph:
+    await citation_graph.ensure_loaded(db, max_age=GRAPH_MAX_AGE)
+    return citation_graph
+
+def _node_or_404(graph: CitationGraph, pmid: str) -> int:
+    node = graph.node(pmid)
+    if node is None:
+        raise HTTPException(status_code=404, detail="Paper not found in citation graph")
+    return node
+
+def _papers(graph: CitationGraph, nodes, **columns) -> List[GraphPaper]:
+    in_degree = graph.in_degree(nodes)
+    out_degree = graph.out_degree(nodes)
+    papers = []
+    for i, pmid in enumerate(graph.pmids_of(nodes)):
+        extra = {name: values[i].item() for name, values in columns.items()}
+        papers.append(GraphPaper(
+            pmid=pmid,
+            in_degree=int(in_degree[i]),
+            out_degree=int(out_degree[i]),
+            **extra
+        ))
+    return papers
+
+@router.post("/refresh")
+async def refresh_graph(full: bool = False, db: AsyncSession = Depends(get_db)):
+    """Pull new papers and resolved edges into the in-memory graph"""
+    try:
+        return await citation_graph.refresh(db, full=full)
+    except Exception as e:
+        logger.error(f"Citation graph refresh failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stats")
+async def graph_stats(graph: CitationGraph = Depends(get_graph)):
+    """Size and freshness of the in-memory graph"""
+    return graph.stats()
+
+@router.get("/pagerank", response_model=List[GraphPaper])
+async def top_pagerank(
+    limit: int = Query(20, ge=1, le=1000),
+    damping: float = 0.85,
+    graph: CitationGraph = Depends(get_graph)
+):
+    """Papers with the highest PageRank across the whole graph"""
+    if not 0.0 < damping < 1.0:
+        raise HTTPException(status_code=400, detail="damping must be between 0 and 1")
+    rank = await graph.pagerank_async(damping=damping)
+    limit = min(limit, graph.node_count)
+    if limit <= 0:
+        return []
+    top = np.argpartition(-rank, limit - 1)[:limit]
+    top = top[np.argsort(-rank[top], kind="stable")]
+    return _papers(graph, top, pagerank=rank[top])
+
+@router.post("/rank", response_model=RankResponse)
+async def rank_papers(request: RankRequest, graph: CitationGraph = Depends(get_graph)):
+    """Order a result set by in-degree or PageRank, e.g. most-cited first"""
+    if request.by not in ("in_degree", "pagerank"):
+        raise HTTPException(status_code=400, detail="by must be in_degree or pagerank")
+    nodes = graph.nodes(request.pmids)
+    known = set(graph.pmids_of(nodes))
+    rank = (await graph.pagerank_async())[nodes]
+    score = graph.in_degree(nodes) if request.by == "in_degree" else rank
+    order = np.argsort(-score, kind="stable")
+    return RankResponse(
+        papers=_papers(graph, nodes[order], pagerank=rank[order]),
+        missing=[pmid for pmid in request.pmids if pmid not in known]
+    )
+
+@router.get("/{pmid}/degree", response_model=DegreeResponse)
+async def paper_degree(pmid: str, graph: CitationGraph = Depends(get_graph)):
+    """Number of papers citing (in) and cited by (out) a paper"""
+    node = _node_or_404(graph, pmid)
+    return DegreeResponse(
+        pmid=pmid,
+        in_degree=int(graph.in_degree()[node]),
+        out_degree=int(graph.out_degree()[node])
+    )
+
+@router.get("/{pmid}/neighborhood", response_model=NeighborhoodResponse)
+async def paper_neighborhood(
+    pmid: str,
+    hops: int = 2,
+    direction: str = "both",
+    limit: int = Query(100, ge=1, le=1000),
+    graph: CitationGraph = Depends(get_graph)
+):
+    """Papers within ``hops`` citation steps, nearest and most-cited first"""
+    if direction not in DIRECTIONS:
+        raise HTTPException(status_code=400, detail=f"direction must be one of {', '.join(DIRECTIONS)}")
+    if not 1 <= hops <= 5:
+        raise HTTPException(status_code=400, detail="hops must be between 1 and 5")
+    node = _node_or_404(graph, pmid)
+    nodes, distances = graph.neighborhood(node, hops=hops, direction=direction)
+    order = np.lexsort((-graph.in_degree(nodes), distances))[:limit]
+    return NeighborhoodResponse(
+        pmid=pmid,
+        hops=hops,
+        direction=direction,
+        total=len(nodes),
+        papers=_papers(graph, nodes[order], hops=distances[order])
+    )
+
+@router.get("/{pmid}/co-citations", response_model=List[GraphPaper])
+async def paper_co_citations(
+    pmid: str,
+    limit: int = Query(20, ge=1, le=1000),
+    graph: CitationGraph = Depends(get_graph)
+):
+    """Papers most often cited alongside this one"""
+    nodes, shared = graph.co_citations(_node_or_404(graph, pmid), limit=limit)
+    return _papers(graph, nodes, shared=shared)
+
+@router.get("/{pmid}/coupling", response_model=List[GraphPaper])
+async def paper_coupling(
+    pmid: str,
+    limit: int = Query(20, ge=1, le=1000),
+    graph: CitationGraph = Depends(get_graph)
+):
+    """Papers sharing the most references with this one (bibliographic coupling)"""
+    nodes, shared = graph.bibliographic_coupling(_node_or_404(graph, pmid), limit=limit)
+    return _papers(graph, nodes, shared=shared)
@@ -0,0 +1,85 @@
+# Document processor nlp.pipe throughput benchmark
+"""Measure docs/sec of DocumentProcessor.process_batch for several n_process values.
+
+Usage (from services/document-processor):
+    python -m benchmarks.bench_pipe [--input papers.ndjson] [--docs 2000]
+                                    [--n-process 1,2,4,8] [--batch-size 64]
+                                    [--components ner]
+
+--input takes an NDJSON export of the ingestion service (GET /export); without
+it the abstracts are synthesized. The single-document path (one self.nlp call
+per paper, as POST /process/{pmid} does) is measured as the baseline.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from src.core.processor import DocumentProcessor
+
+_WORDS = (
+    "cells protein expression BRCA1 mutation patients cohort treatment therapy "
+    "in vivo signaling pathway receptor enzyme analysis sequencing microscopy "
+    "inhibition tumor cancer disease model mice significant increase reduced "
+    "Harvard University National Institutes of Health study results showed"
+).split()
+
+def load_papers(path, docs):
+    if path:
+        papers = []
+        with open(path) as f:
+            for line in f:
+                paper = json.loads(line)
+                papers.append({"pmid": paper["pmid"], "title": paper["title"], "abstract": paper.get("abstract")})
+                if len(papers) == docs:
+                    break
+        return papers
+    rng = random.Random(0)
+    return [
+        {
+            "pmid": str(i),
+            "title": " ".join(rng.choices(_WORDS, k=12)),
+            "abstract": ". ".join(" ".join(rng.choices(_WORDS, k=20)) for _ in range(10)),
+        }
+        for i in range(docs)
+    ]
+
+def bench(processor, papers, batch_size, n_process):
+    started = time.perf_counter()
+    count = sum(1 for _ in processor.process_batch(papers, batch_size=batch_size, n_process=n_process))
+    return count / (time.perf_counter() - started)
+
+def bench_single(processor, papers):
+    started = time.perf_counter()
+    for paper in papers:
+        text = processor.document_text(paper)
+        processor._extract_entities(processor.parse(text), text)
+    return len(papers) / (time.perf_counter() - started)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="nlp.pipe throughput benchmark")
+    parser.add_argument("--input", help="NDJSON export to read abstracts from")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--n-process", default=f"1,2,4,{os.cpu_count()}")
+    parser.add_argument("--components", help="Comma-separated pipeline components, default NLP_COMPONENTS")
+    args = parser.parse_args()
+
+    papers = load_papers(args.input, args.docs)
+    processor = DocumentProcessor(components=args.components.split(",") if args.components else None)
+    print(f"{len(papers)} documents, {os.cpu_count()} cores")
+
+    baseline = bench_single(processor, papers)
+    print(f"{'single':>10} {baseline:10.1f} docs/s")
+    for n_process in sorted({int(n) for n in args.n_process.split(",")}):
+        rate = bench(processor, papers, args.batch_size, n_process)
+        print(f"{'n_process=' + str(n_process):>10} {rate:10.1f} docs/s  {rate / baseline:5.2f}x")
+
+    # In-process runs only, spaCy worker processes keep their own timings
+    print(f"components: {processor.components}")
+    for name, timing in processor.timing_stats()["timings"].items():
+        print(f"{name:>20} {timing['ms_per_doc']:8.3f} ms/doc")
+
+if __name__ == "__main__":
+    main()
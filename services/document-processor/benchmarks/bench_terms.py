@@ -0,0 +1,100 @@
+# Document processor term matching benchmark
+"""Compare the compiled TermMatcher with the per-pattern regex loop it replaced.
+
+Usage (from services/document-processor):
+    python -m benchmarks.bench_terms [--input papers.ndjson] [--docs 200]
+                                     [--vocabulary terms.tsv] [--repeat 3]
+
+--input takes an NDJSON export with full text (GET /export?include_full_text=true);
+without it long synthetic bodies of about 40k characters are generated.
+Documents where the results differ are counted and a few are printed. The
+separate scans of the old loop could also return overlapping fragments such
+as "vivo syndrome" out of "in vivo syndrome"; a single scan never does.
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from src.core.term_matcher import TermMatcher
+
+# The implementation before TermMatcher, kept verbatim as the baseline
+LEGACY_PATTERNS = [
+    r"[A-Z]+\d+",
+    r"\b[A-Z][A-Za-z]+ (syndrome|disease|disorder|cancer|therapy|treatment)\b",
+    r"\b(in vitro|in vivo|ex vivo)\b",
+    r"\b(p-value|confidence interval|statistical significance)\b",
+    r"\b(DNA|RNA|mRNA|tRNA|miRNA|protein|enzyme|receptor)\b",
+    r"\b(pathways?|signaling|mechanism)\b"
+]
+
+def legacy_extract(text):
+    terms = set()
+    for pattern in LEGACY_PATTERNS:
+        matches = re.finditer(pattern, text, re.IGNORECASE)
+        terms.update(match.group() for match in matches)
+    methods = set(re.findall(r'\b\w+(?:sis|ing|tion|graphy|scopy|metry)\b', text))
+    return terms, methods
+
+_WORDS = (
+    "the BRCA1 mutation in vivo and p53 protein signaling pathways Breast cancer therapy "
+    "Down syndrome analysis imaging spectroscopy confidence interval mRNA receptor "
+    "mechanism cells tumor HER2 expression was measured with mass spectrometry sequencing "
+    "in vitro statistical significance enzyme DNA RNA characterization of patients were"
+).split()
+
+def load_texts(path, docs):
+    if path:
+        texts = []
+        with open(path) as f:
+            for line in f:
+                paper = json.loads(line)
+                texts.append(paper.get("full_text") or f"{paper['title']}\n\n{paper.get('abstract') or ''}")
+                if len(texts) == docs:
+                    break
+        return texts
+    rng = random.Random(0)
+    return [" ".join(rng.choices(_WORDS, k=6000)) for _ in range(docs)]
+
+def timed(fn, texts, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [fn(text) for text in texts]
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Term matching benchmark")
+    parser.add_argument("--input", help="NDJSON export to read full texts from")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--vocabulary", help="term<TAB>category file for the matcher")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_texts(args.input, args.docs)
+    megabytes = sum(len(text) for text in texts) / 1e6
+    started = time.perf_counter()
+    matcher = TermMatcher.from_vocabulary_file(args.vocabulary)
+    print(f"{len(texts)} documents, {megabytes:.1f} MB, matcher built in {time.perf_counter() - started:.3f}s "
+          f"({matcher.term_count} vocabulary terms)")
+
+    legacy_seconds, legacy_results = timed(legacy_extract, texts, args.repeat)
+    matcher_seconds, matcher_results = timed(matcher.extract, texts, args.repeat)
+    print(f"{'legacy':>10} {legacy_seconds:8.3f}s {megabytes / legacy_seconds:8.2f} MB/s")
+    print(f"{'matcher':>10} {matcher_seconds:8.3f}s {megabytes / matcher_seconds:8.2f} MB/s  "
+          f"{legacy_seconds / matcher_seconds:5.2f}x")
+
+    mismatches = 0
+    for (terms, methods), found in zip(legacy_results, matcher_results):
+        if terms != found.get("scientific_terms", set()) or methods != found.get("methods", set()):
+            mismatches += 1
+            if mismatches <= 5:
+                print("  differs:", terms ^ found.get("scientific_terms", set()),
+                      methods ^ found.get("methods", set()))
+    print(f"{mismatches} of {len(texts)} documents differ")
+
+if __name__ == "__main__":
+    main()
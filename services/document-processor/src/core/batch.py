@@ -0,0 +1,258 @@
+# Document processor batch processing of stored papers
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.future import select
+
+from shared.models import Paper
+from .full_text import FullTextProcessor
+from .processor import DocumentProcessor
+from .workers import NLPWorkerPool, process_papers
+from .results import content_hash, is_current, result_row, store_results
+
+logger = logging.getLogger(__name__)
+
+class BatchProcessor:
+    """Streams papers from the database through ``nlp.pipe`` and upserts results.
+
+    Papers are read in id-ordered chunks of ``chunk_size`` and written back
+    in bulk. With a ``pool`` each chunk is split into ``batch_size`` tasks
+    for the NLP worker processes, so the caller's process needs no model;
+    otherwise ``processor`` parses the chunk in a worker thread (spaCy fans
+    out to ``n_process`` processes itself). Papers whose stored result
+    matches the processor version and the hash of their current text are
+    skipped in the query itself unless ``force`` is set.
+    """
+
+    def __init__(
+        self,
+        processor: Optional[DocumentProcessor],
+        session_factory,
+        batch_size: int = 64,
+        n_process: int = 1,
+        chunk_size: int = 1000,
+        components: Optional[List[str]] = None,
+        full_text_processor: Optional[FullTextProcessor] = None,
+        force: bool = False,
+        pool: Optional[NLPWorkerPool] = None
+    ):
+        if processor is None and pool is None:
+            raise ValueError("BatchProcessor needs a processor or a worker pool")
+        self.processor = processor
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.chunk_size = chunk_size
+        self.components = components
+        # Set for full-text runs: each body is chunked over the worker pool
+        self.full_text_processor = full_text_processor
+        self.force = force
+        self.pool = pool
+        self.mode = "full_text" if full_text_processor is not None else "abstract"
+        # Set by prepare; full-text workers always run the default pipeline
+        self.version: Optional[str] = None
+        # Progress of the current run, read by BatchJob
+        self.processed = 0
+        self.started_at: Optional[float] = None
+
+    async def prepare(self) -> None:
+        """Resolve the result version, raising ``ValueError`` for unknown components"""
+        if self.version is not None:
+            return
+        components = None if self.full_text_processor is not None else self.components
+        if self.pool is not None:
+            self.version = await self.pool.version(components)
+        else:
+            self.version = self.processor.version(components)
+
+    def _paper_query(self, pmids: Optional[List[str]], after: int):
+        columns = [Paper.id, Paper.pmid, Paper.title, Paper.abstract]
+        if self.full_text_processor is not None:
+            columns.append(Paper.full_text)
+        query = (
+            select(*columns)
+            .where(Paper.id > after)
+            .order_by(Paper.id)
+            .limit(self.chunk_size)
+        )
+        if pmids is not None:
+            query = query.where(Paper.pmid.in_(pmids))
+        if pmids is None or not self.force:
+            query = query.where(~is_current(self.version, self.mode))
+        return query
+
+    async def run(self, pmids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Process the given PMIDs, or every paper without an up-to-date result"""
+        await self.prepare()
+        self.processed = processed = 0
+        parse_seconds = 0.0
+        after = 0
+        self.started_at = started = time.perf_counter()
+        while True:
+            async with self.session_factory() as session:
+                result = await session.execute(self._paper_query(pmids, after))
+                papers = [dict(row._mapping) for row in result.all()]
+            if not papers:
+                break
+            after = papers[-1]["id"]
+
+            parse_started = time.perf_counter()
+            if self.full_text_processor is not None:
+                rows = await self._parse_full_texts(papers)
+            elif self.pool is not None:
+                rows = await self._parse_in_pool(papers)
+            else:
+                rows = await asyncio.to_thread(self._parse_chunk, papers)
+            parse_seconds += time.perf_counter() - parse_started
+
+            async with self.session_factory() as session:
+                async with session.begin():
+                    await store_results(session, rows)
+            processed += len(rows)
+            self.processed = processed
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Processed {processed} documents ({processed / elapsed:.1f} docs/s, "
+                f"{processed / parse_seconds:.1f} docs/s in NLP)"
+            )
+
+        elapsed = time.perf_counter() - started
+        return {
+            "processed": processed,
+            "requested": len(pmids) if pmids is not None else None,
+            "skipped": len(set(pmids)) - processed if pmids is not None else None,
+            "elapsed_seconds": elapsed,
+            "docs_per_second": processed / elapsed if elapsed > 0 else 0.0,
+            "nlp_docs_per_second": processed / parse_seconds if parse_seconds > 0 else 0.0,
+        }
+
+    def _row(self, paper: Dict[str, Any], text_value: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        return result_row(
+            paper["id"], paper["pmid"], self.version, content_hash(text_value), self.mode, result
+        )
+
+    def _parse_chunk(self, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            self._row(paper, self.processor.document_text(paper), {
+                "processed_entities": self.processor.group_entities(mentions),
+                "entity_counts": self.processor.count_entities(mentions),
+                "text_length": text_length,
+            })
+            for paper, mentions, text_length in self.processor.process_batch(
+                papers,
+                batch_size=self.batch_size,
+                n_process=self.n_process,
+                components=self.components
+            )
+        ]
+
+    async def _parse_in_pool(self, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Already admitted work, so the pool's max_bulk bounds these tasks
+        batches = [papers[i:i + self.batch_size] for i in range(0, len(papers), self.batch_size)]
+        results = await asyncio.gather(*(
+            self.pool.run(process_papers, batch, self.batch_size, self.components, timeout=0, shed=False)
+            for batch in batches
+        ))
+        return [
+            self._row(paper, DocumentProcessor.document_text(paper), result)
+            for batch, batch_results in zip(batches, results)
+            for paper, result in zip(batch, batch_results)
+        ]
+
+    async def _parse_full_texts(self, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # A few papers at a time, so short bodies still keep every worker busy
+        semaphore = asyncio.Semaphore(self.full_text_processor.pool.workers)
+
+        async def run(paper: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                result = await self.full_text_processor.process(paper)
+            return self._row(paper, self.full_text_processor.document_text(paper), result)
+
+        return await asyncio.gather(*(run(paper) for paper in papers))
+
+class BatchJob:
+    """A BatchProcessor run in the background of the service"""
+
+    def __init__(self, batch: BatchProcessor, pmids: Optional[List[str]] = None):
+        self.id = uuid.uuid4().hex
+        self.batch = batch
+        self.pmids = pmids
+        self.status = "running"
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    async def run(self) -> None:
+        try:
+            self.result = await self.batch.run(self.pmids)
+            self.status = "completed"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.error(f"Batch job {self.id} failed: {str(e)}")
+        finally:
+            self.finished_at = datetime.utcnow()
+
+    def status_dict(self) -> Dict[str, Any]:
+        started = self.batch.started_at
+        elapsed = time.perf_counter() - started if started is not None and not self.done else None
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "mode": self.batch.mode,
+            "error": self.error,
+            "processed": self.batch.processed,
+            "docs_per_second": self.batch.processed / elapsed if elapsed else None,
+            "result": self.result,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+class BatchJobs:
+    """Background batch runs, kept in memory by the replica that runs them.
+
+    Only one run at a time, since two runs over the unprocessed papers would
+    parse the same documents. The last ``max_jobs`` finished runs are kept
+    for their status.
+    """
+
+    def __init__(self, max_jobs: int = 20):
+        self.max_jobs = max_jobs
+        self.jobs: Dict[str, BatchJob] = {}
+
+    def running(self) -> Optional[BatchJob]:
+        return next((job for job in self.jobs.values() if not job.done), None)
+
+    def submit(self, batch: BatchProcessor, pmids: Optional[List[str]] = None) -> BatchJob:
+        job = BatchJob(batch, pmids)
+        job.task = asyncio.ensure_future(job.run())
+        self.jobs[job.id] = job
+        finished = sorted((job for job in self.jobs.values() if job.done), key=lambda job: job.created_at)
+        for old in finished[:max(len(finished) - self.max_jobs, 0)]:
+            del self.jobs[old.id]
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[BatchJob]:
+        return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    async def aclose(self) -> None:
+        tasks = [job.task for job in self.jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
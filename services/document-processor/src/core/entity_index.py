@@ -0,0 +1,357 @@
+# Document processor in-memory entity inverted index over paper_entities
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.citation_graph import _csr, _gather
+
+logger = logging.getLogger(__name__)
+
+MATCH_MODES = ("all", "any")
+
+_LOAD_ENTITIES = text("SELECT id, category, text FROM entities ORDER BY id")
+_LOAD_PAPERS = text("""
+    SELECT p.id, p.pmid, CAST(EXTRACT(YEAR FROM p.publication_date) AS integer)
+    FROM papers p
+    WHERE EXISTS (SELECT 1 FROM paper_entities pe WHERE pe.paper_id = p.id)
+    ORDER BY p.id
+""")
+_LOAD_POSTINGS = text("SELECT entity_id, paper_id FROM paper_entities")
+
+_WIDTHS = ((np.uint8, 0xFF), (np.uint16, 0xFFFF), (np.uint32, 0xFFFFFFFF))
+
+
+def _compress(indptr: np.ndarray, docs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Delta-encode each sorted posting list at the narrowest width that fits it.
+
+    Returns the first document of every list, byte offsets into the blob,
+    the byte width per list and the blob of gaps after the first document.
+    """
+    count = len(indptr) - 1
+    lengths = np.diff(indptr)
+    starts = indptr[:-1]
+    nonempty = lengths > 0
+    first = np.full(count, -1, dtype=np.int32)
+    first[nonempty] = docs[starts[nonempty]]
+
+    # Gaps within each list; the first document of a list is kept apart
+    owners = np.repeat(np.arange(count), lengths)
+    gaps = np.diff(docs.astype(np.int64), prepend=0)
+    keep = np.ones(len(docs), dtype=bool)
+    keep[starts[nonempty]] = False
+    gaps, owners = gaps[keep], owners[keep]
+    within = np.flatnonzero(keep) - starts[owners] - 1
+
+    max_gap = np.zeros(count, dtype=np.int64)
+    np.maximum.at(max_gap, owners, gaps)
+    widths = np.full(count, 4, dtype=np.uint8)
+    widths[max_gap <= _WIDTHS[1][1]] = 2
+    widths[max_gap <= _WIDTHS[0][1]] = 1
+
+    stored = np.maximum(lengths - 1, 0)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(stored * widths, out=offsets[1:])
+    blob = np.zeros(int(offsets[-1]), dtype=np.uint8)
+    for dtype, _ in _WIDTHS:
+        width = np.dtype(dtype).itemsize
+        selected = widths[owners] == width
+        if not selected.any():
+            continue
+        positions = offsets[owners[selected]] + within[selected] * width
+        byte_positions = (positions[:, None] + np.arange(width)).ravel()
+        blob[byte_positions] = gaps[selected].astype(dtype).view(np.uint8)
+    return first, offsets, widths, blob
+
+
+def _intersect(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Sorted intersection, binary-searching the shorter list in the longer"""
+    if left.size > right.size:
+        left, right = right, left
+    if not left.size or not right.size:
+        return left[:0]
+    positions = np.minimum(np.searchsorted(right, left), right.size - 1)
+    return left[right[positions] == left]
+
+
+class EntityIndex:
+    """Inverted index from extracted entities to the papers mentioning them.
+
+    Papers are numbered in ``papers.id`` order, so every posting list is a
+    sorted run of integers stored as gaps at 1, 2 or 4 bytes depending on the
+    largest gap in the list. A forward CSR from paper to entities serves
+    facet counts. The index is rebuilt from ``paper_entities`` on refresh.
+    """
+
+    def __init__(self):
+        self.entity_ids = np.empty(0, dtype=np.int64)
+        self.entity_texts: List[str] = []
+        self.categories: List[str] = []
+        self.entity_categories = np.empty(0, dtype=np.uint16)
+        self._entities_by_text: Dict[str, List[int]] = {}
+
+        self.paper_ids = np.empty(0, dtype=np.int64)
+        self.pmids: List[str] = []
+        self.years = np.empty(0, dtype=np.int16)
+        self._doc_by_pmid: Dict[str, int] = {}
+
+        self.posting_first = np.empty(0, dtype=np.int32)
+        self.posting_offsets = np.zeros(1, dtype=np.int64)
+        self.posting_widths = np.empty(0, dtype=np.uint8)
+        self.posting_lengths = np.empty(0, dtype=np.int64)
+        self.posting_blob = np.empty(0, dtype=np.uint8)
+        self.forward_indptr = np.zeros(1, dtype=np.int64)
+        self.forward_indices = np.empty(0, dtype=np.int32)
+
+        self.version = 0
+        self.refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.refreshed_at is not None
+
+    @property
+    def paper_count(self) -> int:
+        return len(self.paper_ids)
+
+    @property
+    def entity_count(self) -> int:
+        return len(self.entity_ids)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _fresh(self, max_age: Optional[float]) -> bool:
+        return self.loaded and (max_age is None or time.time() - self.refreshed_at < max_age)
+
+    async def ensure_loaded(self, db: AsyncSession, max_age: Optional[float] = None) -> None:
+        """Load on first use and rebuild once older than ``max_age`` seconds"""
+        if self._fresh(max_age):
+            return
+        async with self._lock:
+            # Requests that queued behind a rebuild find the index fresh
+            if self._fresh(max_age):
+                return
+            await self._refresh(db)
+
+    async def refresh(self, db: AsyncSession) -> Dict[str, float]:
+        async with self._lock:
+            return await self._refresh(db)
+
+    async def _refresh(self, db: AsyncSession) -> Dict[str, float]:
+        started = time.perf_counter()
+        result = await db.execute(_LOAD_ENTITIES)
+        entity_rows = result.all()
+        result = await db.execute(_LOAD_PAPERS)
+        paper_rows = result.all()
+        entity_refs, paper_refs = await self._fetch_postings(db)
+
+        loop = asyncio.get_running_loop()
+        built = await loop.run_in_executor(None, self._build, entity_rows, paper_rows, entity_refs, paper_refs)
+        self._install(built)
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Entity index refreshed: {self.entity_count} entities, {self.paper_count} papers, "
+            f"{len(self.forward_indices)} postings in {elapsed:.2f}s"
+        )
+        return {
+            "entities": self.entity_count,
+            "papers": self.paper_count,
+            "postings": len(self.forward_indices),
+            "seconds": elapsed,
+        }
+
+    def _install(self, built) -> None:
+        """Swap in the arrays returned by ``_build``"""
+        (
+            self.entity_ids, self.entity_texts, self.categories, self.entity_categories,
+            self.paper_ids, self.pmids, self.years,
+            self.posting_first, self.posting_offsets, self.posting_widths,
+            self.posting_lengths, self.posting_blob,
+            self.forward_indptr, self.forward_indices,
+        ) = built
+
+        entities_by_text: Dict[str, List[int]] = defaultdict(list)
+        for entity, entity_text in enumerate(self.entity_texts):
+            entities_by_text[entity_text.lower()].append(entity)
+        self._entities_by_text = dict(entities_by_text)
+        self._doc_by_pmid = {pmid: doc for doc, pmid in enumerate(self.pmids)}
+        self.version += 1
+        self.refreshed_at = time.time()
+
+    @staticmethod
+    async def _fetch_postings(db: AsyncSession) -> Tuple[np.ndarray, np.ndarray]:
+        """Stream postings in partitions so millions of rows never sit in tuples at once"""
+        entity_parts, paper_parts = [], []
+        result = await db.stream(_LOAD_POSTINGS)
+        async for partition in result.partitions(100_000):
+            entity_parts.append(np.fromiter((row[0] for row in partition), dtype=np.int64, count=len(partition)))
+            paper_parts.append(np.fromiter((row[1] for row in partition), dtype=np.int64, count=len(partition)))
+        if not entity_parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(entity_parts), np.concatenate(paper_parts)
+
+    @staticmethod
+    def _build(entity_rows, paper_rows, entity_refs, paper_refs):
+        entity_ids = np.fromiter((row[0] for row in entity_rows), dtype=np.int64, count=len(entity_rows))
+        entity_texts = [row[2] for row in entity_rows]
+        categories = sorted({row[1] for row in entity_rows})
+        category_index = {category: i for i, category in enumerate(categories)}
+        entity_categories = np.fromiter(
+            (category_index[row[1]] for row in entity_rows), dtype=np.uint16, count=len(entity_rows)
+        )
+
+        paper_ids = np.fromiter((row[0] for row in paper_rows), dtype=np.int64, count=len(paper_rows))
+        pmids = [row[1] for row in paper_rows]
+        years = np.fromiter((row[2] or 0 for row in paper_rows), dtype=np.int16, count=len(paper_rows))
+
+        # Rows added between the queries above are left for the next refresh
+        entities, docs = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        if len(entity_ids) and len(paper_ids):
+            entity_pos = np.minimum(np.searchsorted(entity_ids, entity_refs), len(entity_ids) - 1)
+            doc_pos = np.minimum(np.searchsorted(paper_ids, paper_refs), len(paper_ids) - 1)
+            valid = (entity_ids[entity_pos] == entity_refs) & (paper_ids[doc_pos] == paper_refs)
+            entities, docs = entity_pos[valid], doc_pos[valid]
+
+        inverted_indptr, inverted_docs = _csr(entities, docs, len(entity_ids))
+        first, offsets, widths, blob = _compress(inverted_indptr, inverted_docs)
+        forward_indptr, forward_indices = _csr(docs, entities, len(paper_ids))
+        return (
+            entity_ids, entity_texts, categories, entity_categories,
+            paper_ids, pmids, years,
+            first, offsets, widths, np.diff(inverted_indptr), blob,
+            forward_indptr, forward_indices,
+        )
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def resolve(self, term: str, category: Optional[str] = None) -> List[int]:
+        """Entities whose text equals ``term`` ignoring case, optionally in one category"""
+        entities = self._entities_by_text.get(term.strip().lower(), [])
+        if category is None:
+            return entities
+        return [entity for entity in entities if self.categories[self.entity_categories[entity]] == category]
+
+    def postings(self, entity: int) -> np.ndarray:
+        """Decoded, sorted papers mentioning ``entity``"""
+        length = int(self.posting_lengths[entity])
+        if not length:
+            return np.empty(0, dtype=np.int32)
+        dtype = {1: np.uint8, 2: np.uint16, 4: np.uint32}[int(self.posting_widths[entity])]
+        gaps = self.posting_blob[self.posting_offsets[entity]:self.posting_offsets[entity + 1]].view(dtype)
+        docs = np.empty(length, dtype=np.int32)
+        docs[0] = self.posting_first[entity]
+        docs[1:] = self.posting_first[entity] + np.cumsum(gaps, dtype=np.int64)
+        return docs
+
+    def union(self, entities: Sequence[int]) -> np.ndarray:
+        if not entities:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate([self.postings(entity) for entity in entities]))
+
+    def search(
+        self,
+        terms: Sequence[str],
+        match: str = "all",
+        category: Optional[str] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> Tuple[np.ndarray, List[str]]:
+        """Papers mentioning all (or any) of ``terms``, newest first.
+
+        A term matching the same text in several categories counts as a
+        mention of any of them. Returns the papers and the terms that did
+        not match an entity.
+        """
+        if match not in MATCH_MODES:
+            raise ValueError(f"match must be one of {', '.join(MATCH_MODES)}")
+        lists, unmatched = [], []
+        for term in terms:
+            entities = self.resolve(term, category)
+            if not entities:
+                unmatched.append(term)
+            lists.append(self.union(entities))
+
+        if not lists:
+            docs = np.empty(0, dtype=np.int32)
+        elif match == "all":
+            # Smallest lists first keep every intermediate result small
+            lists.sort(key=len)
+            docs = lists[0]
+            for other in lists[1:]:
+                docs = _intersect(docs, other)
+        else:
+            docs = np.unique(np.concatenate(lists))
+
+        docs = self.filter_years(docs, year_from, year_to)
+        order = np.lexsort((-docs.astype(np.int64), -self.years[docs].astype(np.int64)))
+        return docs[order], unmatched
+
+    def filter_years(self, docs: np.ndarray, year_from: Optional[int], year_to: Optional[int]) -> np.ndarray:
+        """Papers published within the range; without a date they only pass an open range"""
+        if year_from is not None:
+            docs = docs[self.years[docs] >= year_from]
+        if year_to is not None:
+            years = self.years[docs]
+            docs = docs[(years <= year_to) & (years > 0)]
+        return docs
+
+    def docs(self, pmids: Sequence[str]) -> np.ndarray:
+        """Papers for the PMIDs present in the index, others are skipped"""
+        found = (self._doc_by_pmid.get(pmid) for pmid in pmids)
+        return np.unique(np.array([doc for doc in found if doc is not None], dtype=np.int32))
+
+    def pmids_of(self, docs: np.ndarray) -> List[str]:
+        return [self.pmids[doc] for doc in docs]
+
+    def facets(
+        self,
+        docs: np.ndarray,
+        limit: int = 10,
+        categories: Optional[Sequence[str]] = None
+    ) -> Dict[str, List[Tuple[str, int]]]:
+        """Most frequent entities per category among ``docs``, by number of papers"""
+        entities = _gather(self.forward_indptr, self.forward_indices, docs)[0]
+        if entities.size == 0:
+            return {}
+        unique, counts = np.unique(entities, return_counts=True)
+        unique_categories = self.entity_categories[unique]
+        facets = {}
+        for index, category in enumerate(self.categories):
+            if categories and category not in categories:
+                continue
+            selected = np.flatnonzero(unique_categories == index)
+            if not selected.size:
+                continue
+            top = selected[np.argsort(-counts[selected], kind="stable")[:limit]]
+            facets[category] = [(self.entity_texts[unique[i]], int(counts[i])) for i in top]
+        return facets
+
+    def stats(self) -> Dict[str, object]:
+        posting_bytes = (
+            self.posting_first.nbytes + self.posting_offsets.nbytes + self.posting_widths.nbytes
+            + self.posting_lengths.nbytes + self.posting_blob.nbytes
+        )
+        return {
+            "entities": self.entity_count,
+            "papers": self.paper_count,
+            "postings": len(self.forward_indices),
+            "categories": self.categories,
+            "version": self.version,
+            "refreshed_at": datetime.utcfromtimestamp(self.refreshed_at) if self.refreshed_at else None,
+            "posting_bytes": int(posting_bytes),
+            "uncompressed_posting_bytes": int(len(self.forward_indices) * 4),
+            "forward_bytes": int(self.forward_indptr.nbytes + self.forward_indices.nbytes),
+        }
@@ -0,0 +1,108 @@
+# Document processor chunked full-text processing
+import asyncio
+import logging
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+from .processor import DocumentProcessor
+from .workers import NLPWorkerPool, process_chunk
+
+logger = logging.getLogger(__name__)
+
+# Preferred split points, strongest first
+_BOUNDARIES = (re.compile(r"\n\s*\n"), re.compile(r"\n"), re.compile(r"(?<=[.!?])\s+"), re.compile(r"\s+"))
+
+def split_chunks(text: str, max_chars: int = 10000) -> List[Tuple[int, str]]:
+    """Cut ``text`` into (offset, chunk) pieces of at most ``max_chars``.
+
+    Each chunk ends at the last paragraph break inside the window, else the
+    last line break, sentence end or whitespace, and only as a last resort
+    in the middle of a word. Offsets point into the original text.
+    """
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            window = text[start:end]
+            for boundary in _BOUNDARIES:
+                cuts = [match.end() for match in boundary.finditer(window) if match.end() > max_chars // 2]
+                if cuts:
+                    end = start + cuts[-1]
+                    break
+        chunk = text[start:end]
+        if chunk.strip():
+            chunks.append((start, chunk))
+        start = end
+    return chunks
+
+class FullTextProcessor:
+    """Processes title, abstract and body as chunks spread over the worker pool.
+
+    Chunks are bounded by ``max_chunk_chars``, so the memory a worker needs
+    for one spaCy ``Doc`` does not depend on the length of the paper. At
+    most ``max_in_flight`` chunks of a paper are submitted at a time, and
+    the pool's ``max_bulk`` bounds the chunks of all papers together.
+
+    Chunks bypass the pool's load shedding, a paper is admitted or rejected
+    as a whole by the caller; ``timeout`` bounds the whole paper, and
+    cancelling ``process`` drops its chunks that have not started.
+    """
+
+    def __init__(
+        self,
+        pool: NLPWorkerPool,
+        max_chunk_chars: int = 10000,
+        max_in_flight: int = 0,
+        timeout: float = 300.0
+    ):
+        self.pool = pool
+        self.max_chunk_chars = max_chunk_chars
+        self.max_in_flight = max_in_flight or 2 * pool.workers
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls, pool: NLPWorkerPool) -> "FullTextProcessor":
+        return cls(
+            pool,
+            max_chunk_chars=int(os.getenv("FULL_TEXT_CHUNK_CHARS", "10000")),
+            timeout=float(os.getenv("FULL_TEXT_TIMEOUT", "300"))
+        )
+
+    @staticmethod
+    def document_text(paper: Dict[str, Any]) -> str:
+        return f"{DocumentProcessor.document_text(paper)}\n\n{paper.get('full_text') or ''}"
+
+    async def process(self, paper: Dict[str, Any]) -> Dict[str, Any]:
+        text = self.document_text(paper)
+        chunks = split_chunks(text, self.max_chunk_chars)
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        async def run(offset: int, chunk: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.pool.run(process_chunk, offset, chunk, timeout=0, shed=False)
+
+        results = await asyncio.gather(*(run(offset, chunk) for offset, chunk in chunks))
+        mentions = sorted(
+            (mention for result in results for mention in result["mentions"]),
+            key=lambda mention: (mention[2], mention[3])
+        )
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        offsets: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for category, mention, start, end in mentions:
+            counts[category][mention] += 1
+            offsets[category].append({"text": mention, "start": start, "end": end})
+
+        return {
+            'pmid': paper['pmid'],
+            'title': paper.get('title', ''),
+            'abstract': paper.get('abstract', ''),
+            'processed_entities': DocumentProcessor.group_entities(mentions),
+            'entity_counts': {category: dict(counter) for category, counter in counts.items()},
+            'entity_offsets': dict(offsets),
+            'text_length': sum(result["tokens"] for result in results),
+            'chunks': len(chunks),
+        }
+
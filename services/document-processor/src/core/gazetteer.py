@@ -0,0 +1,221 @@
+# Document processor dictionary entity matcher backed by a memory-mapped token trie
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+# Mixes the parent node into the token hash so every trie edge has one uint64 key
+_PARENT_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+_ARRAYS = (
+    "edge_keys", "edge_parents", "edge_children", "node_entries",
+    "entry_categories", "entry_concept_offsets", "entry_concept_blob",
+)
+
+def token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Lower-cased word and punctuation tokens with their character offsets"""
+    return [(match.group().lower(), match.start(), match.end()) for match in _TOKEN.finditer(text)]
+
+def _edge_keys(parents: np.ndarray, tokens: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        return ((parents.astype(np.uint64) + np.uint64(1)) * _PARENT_MIX) ^ tokens
+
+def build_gazetteer(rows: Iterable[Tuple[str, str, str]], directory: str) -> Dict[str, int]:
+    """Write the trie of ``(term, category, concept_id)`` rows to ``directory``.
+
+    Every row is one synonym. Tokens are hashed to 64 bits and each trie
+    edge is stored as a sorted key array, so lookups are a binary search
+    over a memory-mapped file instead of a Python dict built at startup.
+    When the same synonym appears twice the first concept wins.
+    """
+    edges: Dict[Tuple[int, int], int] = {}
+    node_entries = [-1]
+    categories: List[str] = []
+    category_ids: Dict[str, int] = {}
+    entry_categories: List[int] = []
+    concept_ids: List[bytes] = []
+    terms = duplicates = max_depth = 0
+    hashes: Dict[str, int] = {}
+
+    for term, category, concept_id in rows:
+        tokens = [token for token, _, _ in tokenize(term)]
+        if not tokens:
+            continue
+        node = 0
+        for token in tokens:
+            token_id = hashes.get(token)
+            if token_id is None:
+                token_id = hashes[token] = token_hash(token)
+            child = edges.get((node, token_id))
+            if child is None:
+                child = edges[(node, token_id)] = len(node_entries)
+                node_entries.append(-1)
+            node = child
+        terms += 1
+        max_depth = max(max_depth, len(tokens))
+        if node_entries[node] != -1:
+            duplicates += 1
+            continue
+        if category not in category_ids:
+            category_ids[category] = len(categories)
+            categories.append(category)
+        node_entries[node] = len(entry_categories)
+        entry_categories.append(category_ids[category])
+        concept_ids.append(concept_id.encode("utf-8"))
+
+    parents = np.fromiter((parent for parent, _ in edges), dtype=np.int32, count=len(edges))
+    tokens = np.fromiter((token for _, token in edges), dtype=np.uint64, count=len(edges))
+    children = np.fromiter(edges.values(), dtype=np.int32, count=len(edges))
+    keys = _edge_keys(parents, tokens)
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(len(concept_ids) + 1, dtype=np.int64)
+    np.cumsum([len(concept) for concept in concept_ids], out=offsets[1:])
+
+    os.makedirs(directory, exist_ok=True)
+    arrays = {
+        "edge_keys": keys[order],
+        "edge_parents": parents[order],
+        "edge_children": children[order],
+        "node_entries": np.asarray(node_entries, dtype=np.int32),
+        "entry_categories": np.asarray(entry_categories, dtype=np.uint8),
+        "entry_concept_offsets": offsets,
+        "entry_concept_blob": np.frombuffer(b"".join(concept_ids), dtype=np.uint8),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+
+    stats = {
+        "terms": terms,
+        "duplicates": duplicates,
+        "entries": len(entry_categories),
+        "nodes": len(node_entries),
+        "edges": len(edges),
+        "max_depth": max_depth,
+    }
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({"format_version": FORMAT_VERSION, "categories": categories, **stats}, f)
+    return stats
+
+def read_vocabulary(path: str) -> Iterable[Tuple[str, str, str]]:
+    """Rows of a ``term<TAB>category[<TAB>concept_id]`` file"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if len(row) < 2 or not row[0] or row[0].startswith("#"):
+                continue
+            yield row[0], row[1].strip().upper(), row[2].strip() if len(row) > 2 else ""
+
+class Gazetteer:
+    """Longest-match dictionary tagger over a memory-mapped token trie.
+
+    Loading maps the arrays without reading them, so startup cost does not
+    grow with the vocabulary. Matching walks the trie for every token start
+    at once, one numpy binary search per trie depth, which is linear in the
+    number of tokens times the depth of the longest term.
+    """
+
+    def __init__(self, directory: str):
+        started = time.perf_counter()
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported gazetteer format in {directory}")
+        self.directory = directory
+        self.categories: List[str] = self.meta["categories"]
+        for name in _ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+        self.load_seconds = time.perf_counter() - started
+
+    @classmethod
+    def from_env(cls) -> Optional["Gazetteer"]:
+        directory = os.getenv("GAZETTEER_PATH", "")
+        if not directory:
+            return None
+        gazetteer = cls(directory)
+        logger.info(
+            f"Gazetteer with {gazetteer.meta['entries']} entries mapped from {directory} "
+            f"in {gazetteer.load_seconds * 1000:.1f} ms"
+        )
+        return gazetteer
+
+    def _lookup(self, parents: np.ndarray, tokens: np.ndarray) -> np.ndarray:
+        """Child node per (parent, token) pair, -1 where there is no edge"""
+        keys = _edge_keys(parents, tokens)
+        positions = np.searchsorted(self.edge_keys, keys)
+        positions = np.minimum(positions, len(self.edge_keys) - 1)
+        found = (self.edge_keys[positions] == keys) & (self.edge_parents[positions] == parents)
+        return np.where(found, self.edge_children[positions], -1)
+
+    def match(self, text: str) -> List[Dict[str, object]]:
+        """Non-overlapping longest matches, left to right"""
+        tokens = tokenize(text)
+        if not tokens or not len(self.edge_keys):
+            return []
+        memo: Dict[str, int] = {}
+        hashes = np.fromiter(
+            (memo[token] if token in memo else memo.setdefault(token, token_hash(token))
+             for token, _, _ in tokens),
+            dtype=np.uint64,
+            count=len(tokens)
+        )
+
+        count = len(tokens)
+        starts = np.arange(count)
+        nodes = np.zeros(count, dtype=np.int32)
+        best_end = np.full(count, -1)
+        best_entry = np.full(count, -1)
+        depth = 0
+        while len(starts):
+            positions = starts + depth
+            in_text = positions < count
+            starts, nodes, positions = starts[in_text], nodes[in_text], positions[in_text]
+            nodes = self._lookup(nodes, hashes[positions])
+            alive = nodes >= 0
+            starts, nodes, positions = starts[alive], nodes[alive], positions[alive]
+            entries = self.node_entries[nodes]
+            terminal = entries >= 0
+            best_end[starts[terminal]] = positions[terminal]
+            best_entry[starts[terminal]] = entries[terminal]
+            depth += 1
+
+        matches = []
+        next_free = 0
+        for start in np.flatnonzero(best_end >= 0).tolist():
+            if start < next_free:
+                continue
+            end = int(best_end[start])
+            entry = int(best_entry[start])
+            lo, hi = self.entry_concept_offsets[entry], self.entry_concept_offsets[entry + 1]
+            matches.append({
+                "text": text[tokens[start][1]:tokens[end][2]],
+                "label": self.categories[self.entry_categories[entry]],
+                "concept_id": bytes(self.entry_concept_blob[lo:hi]).decode("utf-8"),
+                "start": tokens[start][1],
+                "end": tokens[end][2],
+            })
+            next_free = end + 1
+        return matches
+
+    def stats(self) -> Dict[str, object]:
+        mapped = sum(getattr(self, name).nbytes for name in _ARRAYS)
+        return {
+            "path": self.directory,
+            "entries": self.meta["entries"],
+            "nodes": self.meta["nodes"],
+            "edges": self.meta["edges"],
+            "categories": self.categories,
+            "mapped_bytes": mapped,
+            "load_ms": self.load_seconds * 1000,
+        }
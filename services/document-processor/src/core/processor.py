@@ -1,89 +1,287 @@
 import spacy
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import contextlib
+import hashlib
+import json
 import logging
-import re
+import os
+import resource
+import threading
+import time
+
+from .gazetteer import Gazetteer
+from .term_matcher import TermMatcher
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever a change to extraction logic should invalidate stored results
+PROCESSOR_VERSION = "5"
+
+ENTITY_CATEGORIES = ('organizations', 'scientific_terms', 'chemicals', 'diseases', 'methods')
+
+# spaCy labels and the entity category they are reported under
+NER_CATEGORIES = {
+    'ORG': 'organizations',
+    'CHEMICAL': 'chemicals',
+    'DISEASE': 'diseases',
+}
+
+# Gazetteer labels and the entity category they are reported under
+GAZETTEER_CATEGORIES = {
+    'DISEASE': 'diseases',
+    'CHEMICAL': 'chemicals',
+    'GENE': 'scientific_terms',
+    'PROTEIN': 'scientific_terms',
+}
+
 class DocumentProcessor:
-    def __init__(self):
-        """Initialize the document processor with spaCy model"""
-        self.nlp = spacy.load("en_core_web_sm")
-        
-        # Scientific terms patterns
-        self.scientific_patterns = [
-            r"[A-Z]+\d+",  # Gene patterns like BRCA1
-            r"\b[A-Z][A-Za-z]+ (syndrome|disease|disorder|cancer|therapy|treatment)\b",
-            r"\b(in vitro|in vivo|ex vivo)\b",
-            r"\b(p-value|confidence interval|statistical significance)\b",
-            r"\b(DNA|RNA|mRNA|tRNA|miRNA|protein|enzyme|receptor)\b",
-            r"\b(pathways?|signaling|mechanism)\b"
-        ]
-
-    def _extract_scientific_terms(self, text: str) -> List[str]:
-        """Extract scientific terms using patterns and NER"""
-        terms = set()
-        
-        # Pattern matching
-        for pattern in self.scientific_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            terms.update(match.group() for match in matches)
-        
+    def __init__(self, model: Optional[str] = None, components: Optional[List[str]] = None):
+        """Initialize the document processor with spaCy model.
+
+        Only ``components`` (NLP_COMPONENTS, default ``ner``) and whatever
+        they listen to run by default; the rest of the pipeline stays loaded
+        but disabled, so a run can still ask for it explicitly.
+        """
+        self.nlp = spacy.load(model or os.getenv("NLP_MODEL", "en_core_web_sm"))
+        if components is None:
+            components = [name for name in os.getenv("NLP_COMPONENTS", "ner").split(",") if name]
+        self.components = self.required_components(components)
+        for name in self.nlp.pipe_names:
+            if name not in self.components:
+                self.nlp.disable_pipe(name)
+        logger.info(f"NLP pipeline running {self.components} of {self.nlp.component_names}")
+
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._timings_lock = threading.Lock()
+        # Serializes runs that change which pipes nlp.pipe sees
+        self._pipes_lock = threading.Lock()
+
+        # Scientific terms, methods and vocabulary terms in one compiled regex
+        self.term_matcher = TermMatcher.from_vocabulary_file(os.getenv("TERM_VOCABULARY"))
+        # Dictionary tagger for the biomedical labels en_core_web_sm does not emit
+        self.gazetteer = Gazetteer.from_env()
+
+    def version(self, components: Optional[List[str]] = None) -> str:
+        """Identifies everything that shapes the output, stored with each result"""
+        components = self.components if components is None else self.required_components(components)
+        config = {
+            "code": PROCESSOR_VERSION,
+            "model": f"{self.nlp.meta.get('name')}-{self.nlp.meta.get('version')}",
+            "components": components,
+            "terms": hashlib.sha256(self.term_matcher.regex.pattern.encode("utf-8")).hexdigest(),
+            "gazetteer": self.gazetteer.meta if self.gazetteer is not None else None,
+        }
+        digest = hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+        return f"{PROCESSOR_VERSION}-{digest[:16]}"
+
+    def required_components(self, components: Iterable[str]) -> List[str]:
+        """Requested components plus any shared tok2vec/transformer they listen to"""
+        required = set(components)
+        unknown = required - set(self.nlp.component_names)
+        if unknown:
+            raise ValueError(f"Unknown pipeline components: {sorted(unknown)}")
+        for name, component in self.nlp.components:
+            listeners = getattr(component, "listening_components", None) or []
+            if required & set(listeners):
+                required.add(name)
+        # Keep pipeline order, components may depend on earlier annotations
+        return [name for name in self.nlp.component_names if name in required]
+
+    def _record(self, name: str, docs: int, seconds: float) -> None:
+        with self._timings_lock:
+            timing = self._timings.setdefault(name, {"calls": 0, "docs": 0, "seconds": 0.0})
+            timing["calls"] += 1
+            timing["docs"] += docs
+            timing["seconds"] += seconds
+
+    def timing_stats(self) -> Dict[str, Any]:
+        """Cumulative wall time per pipeline component since startup"""
+        with self._timings_lock:
+            timings = {name: dict(timing) for name, timing in self._timings.items()}
+        for timing in timings.values():
+            timing["ms_per_doc"] = 1000 * timing["seconds"] / timing["docs"] if timing["docs"] else 0.0
+        return {
+            "model": self.nlp.meta.get("name"),
+            "components": self.components,
+            "timings": timings,
+            "gazetteer": self.gazetteer.stats() if self.gazetteer is not None else None,
+            "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        }
+
+    def parse(self, text: str, components: Optional[List[str]] = None):
+        """Run the tokenizer and the enabled components once, timing each"""
+        components = self.components if components is None else self.required_components(components)
+        started = time.perf_counter()
+        doc = self.nlp.make_doc(text)
+        self._record("tokenizer", 1, time.perf_counter() - started)
+        for name in components:
+            started = time.perf_counter()
+            doc = self.nlp.get_pipe(name)(doc)
+            self._record(name, 1, time.perf_counter() - started)
+        return doc
+
+    def parse_batch(
+        self,
+        texts: List[str],
+        components: Optional[List[str]] = None,
+        batch_size: int = 64
+    ) -> list:
+        """Batched equivalent of ``parse``, each component sees ``batch_size`` docs at a time"""
+        components = self.components if components is None else self.required_components(components)
+        started = time.perf_counter()
+        docs = [self.nlp.make_doc(text) for text in texts]
+        self._record("tokenizer", len(docs), time.perf_counter() - started)
+        for name in components:
+            component = self.nlp.get_pipe(name)
+            started = time.perf_counter()
+            if hasattr(component, "pipe"):
+                docs = list(component.pipe(docs, batch_size=batch_size))
+            else:
+                docs = [component(doc) for doc in docs]
+            self._record(name, len(docs), time.perf_counter() - started)
+        return docs
+
+    @staticmethod
+    def document_text(paper: Dict[str, Any]) -> str:
+        return f"{paper.get('title') or ''}\n\n{paper.get('abstract') or ''}"
+
+    def extract_mentions(self, doc, full_text: str) -> List[Tuple[str, str, int, int]]:
+        """Every (category, text, start, end) entity mention of a parsed document"""
+        mentions = []
+
         # NER based extraction
-        doc = self.nlp(text)
         for ent in doc.ents:
+            if ent.label_ in NER_CATEGORIES:
+                mentions.append((NER_CATEGORIES[ent.label_], ent.text, ent.start_char, ent.end_char))
             if ent.label_ in ['DISEASE', 'CHEMICAL', 'GENE', 'PROTEIN']:
-                terms.add(ent.text)
-        
-        return list(terms)
+                mentions.append(('scientific_terms', ent.text, ent.start_char, ent.end_char))
+
+        # Gazetteer based extraction
+        if self.gazetteer is not None:
+            started = time.perf_counter()
+            for match in self.gazetteer.match(full_text):
+                category = GAZETTEER_CATEGORIES.get(match['label'])
+                if category:
+                    mentions.append((category, match['text'], match['start'], match['end']))
+            self._record("gazetteer", 1, time.perf_counter() - started)
+
+        # Scientific terms, methods and vocabulary terms from a single scan of the text
+        started = time.perf_counter()
+        for category, start, end, term in self.term_matcher.matches(full_text):
+            if category in ENTITY_CATEGORIES:
+                mentions.append((category, term, start, end))
+        self._record("term_matcher", 1, time.perf_counter() - started)
+        return mentions
+
+    @staticmethod
+    def group_entities(mentions: Iterable[Tuple[str, str, int, int]]) -> Dict[str, List[str]]:
+        """Distinct non-empty mention texts per category"""
+        entities = {category: set() for category in ENTITY_CATEGORIES}
+        for category, text, _, _ in mentions:
+            if text:
+                entities[category].add(text)
+        return {category: list(texts) for category, texts in entities.items()}
+
+    @staticmethod
+    def count_entities(mentions: Iterable[Tuple[str, str, int, int]]) -> Dict[str, Dict[str, int]]:
+        """Mention count per category and entity text"""
+        counts: Dict[str, Dict[str, int]] = {}
+        for category, text, _, _ in mentions:
+            if text:
+                category_counts = counts.setdefault(category, {})
+                category_counts[text] = category_counts.get(text, 0) + 1
+        return counts
+
+    def _extract_entities(self, doc, full_text: str) -> Dict[str, List[str]]:
+        """Group the entities of a parsed document into the response categories"""
+        return self.group_entities(self.extract_mentions(doc, full_text))
 
     async def process_document(self, paper: Dict[str, Any]) -> Dict[str, Any]:
         """Process a single document for entity extraction and analysis"""
+        return self.analyze(paper)
+
+    def analyze(self, paper: Dict[str, Any]) -> Dict[str, Any]:
+        """Synchronous body of ``process_document``, also run in NLP workers"""
         try:
             logger.info(f"Processing document {paper.get('pmid')}")
             abstract = paper.get('abstract', '')
             title = paper.get('title', '')
-            full_text = f"{title}\n\n{abstract}"
-            
-            doc = self.nlp(full_text)
-            
-            # Extract entities
-            entities = {
-                'organizations': [],
-                'scientific_terms': [],
-                'chemicals': [],
-                'diseases': [],
-                'methods': []
-            }
-            
-            # NER based extraction
-            for ent in doc.ents:
-                if ent.label_ == 'ORG':
-                    entities['organizations'].append(ent.text)
-                elif ent.label_ == 'CHEMICAL':
-                    entities['chemicals'].append(ent.text)
-                elif ent.label_ == 'DISEASE':
-                    entities['diseases'].append(ent.text)
-            
-            # Add scientific terms
-            entities['scientific_terms'] = self._extract_scientific_terms(full_text)
-            
-            # Extract methods
-            method_patterns = r'\b\w+(?:sis|ing|tion|graphy|scopy|metry)\b'
-            entities['methods'] = list(set(re.findall(method_patterns, full_text)))
-
-            # Remove duplicates and empty values
-            for category in entities:
-                entities[category] = list(set(filter(None, entities[category])))
-            
+            full_text = self.document_text(paper)
+
+            doc = self.parse(full_text)
+            mentions = self.extract_mentions(doc, full_text)
+
             return {
                 'pmid': paper['pmid'],
                 'title': title,
                 'abstract': abstract,
-                'processed_entities': entities,
+                'processed_entities': self.group_entities(mentions),
+                'entity_counts': self.count_entities(mentions),
                 'text_length': len(doc)
             }
-            
+
         except Exception as e:
             logger.error(f"Error processing document {paper.get('pmid')}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def process_batch(
+        self,
+        papers: Iterable[Dict[str, Any]],
+        batch_size: int = 64,
+        n_process: int = 1,
+        components: Optional[List[str]] = None
+    ) -> Iterator[Tuple[Dict[str, Any], List[Tuple[str, str, int, int]], int]]:
+        """Parse papers in batches and yield (paper, mentions, text_length).
+
+        In-process runs go through ``parse_batch`` so component timings are
+        recorded; with ``n_process`` above 1 the texts are handed to
+        ``nlp.pipe``, which spreads them over spaCy worker processes. Results
+        come back in input order.
+        """
+        enabled = self.components if components is None else self.required_components(components)
+        if n_process > 1:
+            texts = ((self.document_text(paper), paper) for paper in papers)
+            with self._enabled_pipes(enabled):
+                for doc, paper in self.nlp.pipe(
+                    texts, as_tuples=True, batch_size=batch_size, n_process=n_process
+                ):
+                    yield paper, self.extract_mentions(doc, doc.text), len(doc)
+            return
+
+        batch = []
+        for paper in papers:
+            batch.append(paper)
+            if len(batch) == batch_size:
+                yield from self._process_chunk(batch, enabled, batch_size)
+                batch = []
+        if batch:
+            yield from self._process_chunk(batch, enabled, batch_size)
+
+    @contextlib.contextmanager
+    def _enabled_pipes(self, components: List[str]):
+        """Enable exactly ``components`` for ``nlp.pipe``, then restore the defaults.
+
+        ``select_pipes`` only disables, it cannot turn back on the pipes that
+        ``__init__`` disabled. ``parse`` and ``parse_batch`` call components
+        directly and are unaffected.
+        """
+        with self._pipes_lock:
+            defaults = list(self.nlp.pipe_names)
+            self._set_enabled(components)
+            try:
+                yield
+            finally:
+                self._set_enabled(defaults)
+
+    def _set_enabled(self, components: List[str]) -> None:
+        enabled = set(self.nlp.pipe_names)
+        for name in self.nlp.component_names:
+            if name in components and name not in enabled:
+                self.nlp.enable_pipe(name)
+            elif name not in components and name in enabled:
+                self.nlp.disable_pipe(name)
+
+    def _process_chunk(self, papers, components, batch_size):
+        texts = [self.document_text(paper) for paper in papers]
+        for paper, text, doc in zip(papers, texts, self.parse_batch(texts, components, batch_size)):
+            yield paper, self.extract_mentions(doc, text), len(doc)
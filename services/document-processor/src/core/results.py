@@ -0,0 +1,148 @@
+# Document processor persistence and memoization of extraction results
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, func, literal, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from shared.models import Paper, ProcessedDocument
+
+# Entity texts are unique per category, keep them well inside the btree row limit
+MAX_ENTITY_CHARS = 500
+
+# Only the newest result per paper and mode is kept
+_DELETE_STALE = text("""
+    DELETE FROM processed_documents d
+    USING unnest(
+        CAST(:paper_ids AS integer[]), CAST(:modes AS varchar[]),
+        CAST(:versions AS varchar[]), CAST(:hashes AS varchar[])
+    ) AS n(paper_id, mode, processor_version, content_hash)
+    WHERE d.paper_id = n.paper_id AND d.mode = n.mode
+      AND (d.processor_version, d.content_hash) <> (n.processor_version, n.content_hash)
+""")
+
+_INSERT_ENTITIES = text("""
+    INSERT INTO entities (category, text, created_at)
+    SELECT category, text, now() AT TIME ZONE 'utc'
+    FROM unnest(CAST(:categories AS varchar[]), CAST(:texts AS text[])) AS e(category, text)
+    ON CONFLICT ON CONSTRAINT uq_entities_category_text DO NOTHING
+""")
+
+_SELECT_ENTITY_IDS = text("""
+    SELECT e.id, e.category, e.text
+    FROM entities e
+    JOIN unnest(CAST(:categories AS varchar[]), CAST(:texts AS text[])) AS q(category, text)
+      ON e.category = q.category AND e.text = q.text
+""")
+
+_DELETE_PAPER_ENTITIES = text(
+    "DELETE FROM paper_entities WHERE paper_id = ANY(CAST(:paper_ids AS integer[]))"
+)
+
+_INSERT_PAPER_ENTITIES = text("""
+    INSERT INTO paper_entities (paper_id, entity_id, mention_count)
+    SELECT * FROM unnest(
+        CAST(:paper_ids AS integer[]), CAST(:entity_ids AS integer[]), CAST(:counts AS integer[])
+    )
+""")
+
+# Result keys kept next to the entity lists and returned again on cache hits
+DETAIL_KEYS = ("entity_counts", "entity_offsets", "chunks")
+
+def content_hash(text_value: str) -> str:
+    return hashlib.sha256(text_value.encode("utf-8")).hexdigest()
+
+def content_hash_expr(mode: str):
+    """SQL twin of ``content_hash`` over the text a mode processes"""
+    processed = func.coalesce(Paper.title, '') + literal('\n\n') + func.coalesce(Paper.abstract, '')
+    if mode == "full_text":
+        processed = processed + literal('\n\n') + func.coalesce(Paper.full_text, '')
+    return func.encode(func.sha256(func.convert_to(processed, 'UTF8')), 'hex')
+
+def is_current(version: str, mode: str):
+    """Whether a paper already has a result for this version and its current text"""
+    return select(ProcessedDocument.paper_id).where(and_(
+        ProcessedDocument.paper_id == Paper.id,
+        ProcessedDocument.processor_version == version,
+        ProcessedDocument.content_hash == content_hash_expr(mode)
+    )).exists()
+
+def result_row(
+    paper_id: int, pmid: str, version: str, digest: str, mode: str, result: Dict[str, Any]
+) -> Dict[str, Any]:
+    """The ``store_results`` row of a processing result"""
+    return {
+        "paper_id": paper_id,
+        "pmid": pmid,
+        "processor_version": version,
+        "content_hash": digest,
+        "mode": mode,
+        "entities": result["processed_entities"],
+        "details": {key: result[key] for key in DETAIL_KEYS if key in result},
+        "entity_counts": result["entity_counts"],
+        "text_length": result["text_length"],
+        "processed_at": datetime.utcnow(),
+    }
+
+async def get_cached(
+    db: AsyncSession, paper_id: int, version: str, digest: str
+) -> Optional[ProcessedDocument]:
+    return await db.get(ProcessedDocument, (paper_id, version, digest))
+
+async def store_results(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Upsert results and rewrite the papers' rows in ``paper_entities``.
+
+    Each row carries the ProcessedDocument columns plus ``entity_counts``,
+    mention counts per category and entity text.
+    """
+    if not rows:
+        return
+    stmt = insert(ProcessedDocument).values([
+        {key: value for key, value in row.items() if key != "entity_counts"} for row in rows
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[
+            ProcessedDocument.paper_id, ProcessedDocument.processor_version, ProcessedDocument.content_hash
+        ],
+        set_={
+            "mode": stmt.excluded.mode,
+            "entities": stmt.excluded.entities,
+            "details": stmt.excluded.details,
+            "text_length": stmt.excluded.text_length,
+            "processed_at": stmt.excluded.processed_at,
+        }
+    ))
+    await db.execute(_DELETE_STALE, {
+        "paper_ids": [row["paper_id"] for row in rows],
+        "modes": [row["mode"] for row in rows],
+        "versions": [row["processor_version"] for row in rows],
+        "hashes": [row["content_hash"] for row in rows],
+    })
+
+    # Normalized copy; a paper's entities reflect its latest result
+    counts = {}
+    for row in rows:
+        for category, texts in row["entity_counts"].items():
+            for entity_text, count in texts.items():
+                key = (row["paper_id"], category, entity_text[:MAX_ENTITY_CHARS])
+                counts[key] = counts.get(key, 0) + count
+    await db.execute(_DELETE_PAPER_ENTITIES, {"paper_ids": sorted({row["paper_id"] for row in rows})})
+    if not counts:
+        return
+
+    distinct = sorted({(category, entity_text) for _, category, entity_text in counts})
+    params = {
+        "categories": [category for category, _ in distinct],
+        "texts": [entity_text for _, entity_text in distinct],
+    }
+    await db.execute(_INSERT_ENTITIES, params)
+    result = await db.execute(_SELECT_ENTITY_IDS, params)
+    entity_ids = {(category, entity_text): entity_id for entity_id, category, entity_text in result.all()}
+    await db.execute(_INSERT_PAPER_ENTITIES, {
+        "paper_ids": [paper_id for paper_id, _, _ in counts],
+        "entity_ids": [entity_ids[(category, entity_text)] for _, category, entity_text in counts],
+        "counts": list(counts.values()),
+    })
@@ -0,0 +1,138 @@
+# Document processor single-scan term matching
+import csv
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (category, pattern, ignore_case) in priority order
+DEFAULT_PATTERNS: List[Tuple[str, str, bool]] = [
+    # Gene patterns like BRCA1; the lookbehind only skips starts inside a letter
+    # run, which could never be leftmost matches, so results are unchanged
+    ("scientific_terms", r"(?<![A-Z])[A-Z]+\d+", True),
+    ("scientific_terms", r"\b[A-Z][A-Za-z]+ (?:syndrome|disease|disorder|cancer|therapy|treatment)\b", True),
+    ("scientific_terms", r"\b(?:in vitro|in vivo|ex vivo)\b", True),
+    ("scientific_terms", r"\b(?:p-value|confidence interval|statistical significance)\b", True),
+    ("scientific_terms", r"\b(?:DNA|RNA|mRNA|tRNA|miRNA|protein|enzyme|receptor)\b", True),
+    ("scientific_terms", r"\b(?:pathways?|signaling|mechanism)\b", True),
+    ("methods", r"\b\w+(?:sis|ing|tion|graphy|scopy|metry)\b", False),
+]
+
+def trie_regex(terms: Iterable[str]) -> str:
+    """Regex alternation of ``terms`` factored into a prefix trie.
+
+    Shared prefixes are matched once, so the engine does not retry every
+    term at each position, and longer terms win over their prefixes.
+    """
+    root: dict = {}
+    for term in terms:
+        if not term:
+            continue
+        node = root
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        end = "" in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if end else body
+
+    return emit(root)
+
+def load_vocabulary(path: str) -> Dict[str, List[str]]:
+    """Read a ``term<TAB>category`` file into terms per category"""
+    vocabulary = defaultdict(list)
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f, delimiter="\t"):
+            if len(row) >= 2 and row[0].strip() and not row[0].startswith("#"):
+                vocabulary[row[1].strip()].append(row[0].strip())
+    return dict(vocabulary)
+
+class TermMatcher:
+    """All term patterns and vocabulary terms compiled into one regex.
+
+    Every pattern becomes a named group of a single alternation, so a text
+    is scanned once and each match reports its category through
+    ``lastgroup``. Vocabulary terms of a category are folded into one
+    trie-shaped group placed ahead of the patterns. Where the original
+    per-pattern loop would also have found the same span under another
+    category (``signaling`` is a scientific term and an -ing method), the
+    span is checked against that category's pattern so it lands in both.
+    """
+
+    def __init__(
+        self,
+        patterns: List[Tuple[str, str, bool]] = DEFAULT_PATTERNS,
+        vocabulary: Optional[Dict[str, List[str]]] = None
+    ):
+        self.categories: List[str] = []
+        alternatives: List[Tuple[str, str, bool]] = []
+        for category, terms in sorted((vocabulary or {}).items()):
+            alternatives.append((category, r"\b" + trie_regex(sorted(set(terms))) + r"\b", True))
+        alternatives.extend(patterns)
+
+        parts = []
+        by_category = defaultdict(list)
+        for index, (category, pattern, ignore_case) in enumerate(alternatives):
+            self.categories.append(category)
+            parts.append(f"(?P<g{index}>{pattern if ignore_case else f'(?-i:{pattern})'})")
+            by_category[category].append(pattern if ignore_case else f"(?-i:{pattern})")
+
+        self.regex = re.compile("|".join(parts), re.IGNORECASE)
+        # Only consulted for spans that already matched, so these never scan the text
+        self._category_regexes = {
+            category: re.compile("|".join(f"(?:{p})" for p in category_patterns), re.IGNORECASE)
+            for category, category_patterns in by_category.items()
+        }
+        self.term_count = sum(len(terms) for terms in (vocabulary or {}).values())
+
+    @classmethod
+    def from_vocabulary_file(cls, path: Optional[str]) -> "TermMatcher":
+        vocabulary = load_vocabulary(path) if path else None
+        matcher = cls(vocabulary=vocabulary)
+        if vocabulary:
+            logger.info(f"Term matcher loaded {matcher.term_count} vocabulary terms from {path}")
+        return matcher
+
+    def finditer(self, text: str) -> Iterator[Tuple[str, int, int, str]]:
+        """Yield (category, start, end, matched text) in one pass over ``text``"""
+        categories = self.categories
+        for match in self.regex.finditer(text):
+            category = categories[int(match.lastgroup[1:])]
+            yield category, match.start(), match.end(), match.group()
+
+    def _other_categories(self, category: str, term: str) -> List[str]:
+        return [
+            other for other, regex in self._category_regexes.items()
+            if other != category and regex.fullmatch(term)
+        ]
+
+    def matches(self, text: str) -> Iterator[Tuple[str, int, int, str]]:
+        """``finditer`` plus the same span under every other category it fully matches"""
+        others: Dict[Tuple[str, str], List[str]] = {}
+        for category, start, end, term in self.finditer(text):
+            yield category, start, end, term
+            key = (category, term)
+            if key not in others:
+                others[key] = self._other_categories(category, term)
+            for other in others[key]:
+                yield other, start, end, term
+
+    def extract(self, text: str) -> Dict[str, Set[str]]:
+        """Distinct matched terms per category"""
+        found = defaultdict(set)
+        for category, _, _, term in self.finditer(text):
+            found[category].add(term)
+        for category, terms in list(found.items()):
+            for term in terms:
+                for other in self._other_categories(category, term):
+                    found[other].add(term)
+        return found
@@ -0,0 +1,267 @@
+# Document processor NLP worker processes
+import asyncio
+import logging
+import multiprocessing
+import math
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from .processor import DocumentProcessor
+
+logger = logging.getLogger(__name__)
+
+# Set in each worker process by _init_worker
+_processor: Optional[DocumentProcessor] = None
+
+def _init_worker(components: Optional[List[str]]) -> None:
+    global _processor
+    _processor = DocumentProcessor(components=components)
+
+def process_chunk(offset: int, text: str) -> Dict[str, Any]:
+    """Parse one chunk in a worker; mention offsets are shifted to the full text"""
+    doc = _processor.parse(text)
+    mentions = [
+        (category, mention, start + offset, end + offset)
+        for category, mention, start, end in _processor.extract_mentions(doc, text)
+    ]
+    return {"mentions": mentions, "tokens": len(doc)}
+
+def process_paper(paper: Dict[str, Any]) -> Dict[str, Any]:
+    """``DocumentProcessor.process_document`` in a worker"""
+    return _processor.analyze(paper)
+
+def process_papers(
+    papers: List[Dict[str, Any]],
+    batch_size: int,
+    components: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """``DocumentProcessor.process_batch`` in a worker, results in input order"""
+    return [
+        {
+            "processed_entities": _processor.group_entities(mentions),
+            "entity_counts": _processor.count_entities(mentions),
+            "text_length": text_length,
+        }
+        for _, mentions, text_length in _processor.process_batch(
+            papers, batch_size=batch_size, components=components
+        )
+    ]
+
+def processor_version(components: Optional[List[str]] = None) -> str:
+    return _processor.version(components)
+
+def _ready() -> int:
+    return os.getpid()
+
+class PoolOverloaded(Exception):
+    """Raised instead of queueing when the pool already has its maximum backlog"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"NLP worker queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class PoolTimeout(Exception):
+    """Raised when a task does not finish within its timeout"""
+
+class NLPWorkerPool:
+    """Process pool whose workers each load the spaCy model once.
+
+    Workers are started with ``spawn`` so they never inherit the event
+    loop's threads. spaCy's string store only grows, so the pool is
+    replaced after ``recycle_after`` tasks to keep worker memory bounded.
+
+    At most ``workers + max_queue`` tasks are admitted at a time; further
+    requests fail fast with ``PoolOverloaded`` rather than growing an
+    unbounded backlog. Tasks of already admitted work (``shed=False``, the
+    chunks of full-text papers) are limited to ``max_bulk`` in flight
+    across all callers, so the rest of the capacity stays free for
+    interactive requests. A task that times out or is cancelled is dropped
+    if it is still queued; a running one raises ``PoolTimeout`` but keeps
+    its slot until the worker is done with it, since a running process
+    task cannot be cancelled. A worker that dies (e.g. OOM-killed) breaks
+    the whole executor; its tasks fail with ``BrokenProcessPool`` and the
+    next call starts fresh workers.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        components: Optional[List[str]] = None,
+        recycle_after: int = 10000,
+        max_queue: Optional[int] = None,
+        max_bulk: Optional[int] = None,
+        timeout: float = 30.0
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.components = components
+        self.recycle_after = recycle_after
+        self.max_queue = 4 * self.workers if max_queue is None else max_queue
+        # Never all of the capacity, interactive requests keep at least a worker's worth
+        self.max_bulk = min(max_bulk or 2 * self.workers, max(self.max_queue, 1))
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks = 0
+        self._running = 0
+        self._bulk_running = 0
+        # Created on first use, on the event loop that runs the tasks
+        self._bulk_slots: Optional[asyncio.Semaphore] = None
+        self._stats = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "busy_seconds": 0.0}
+        self._versions: Dict[Optional[tuple], str] = {}
+
+    @classmethod
+    def from_env(cls) -> "NLPWorkerPool":
+        max_queue = os.getenv("NLP_QUEUE_SIZE", "")
+        return cls(
+            workers=int(os.getenv("NLP_WORKERS", "0")) or None,
+            recycle_after=int(os.getenv("NLP_WORKER_RECYCLE_AFTER", "10000")),
+            max_queue=int(max_queue) if max_queue else None,
+            max_bulk=int(os.getenv("NLP_MAX_BULK_TASKS", "0")) or None,
+            timeout=float(os.getenv("NLP_TIMEOUT", "30"))
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        completed = self._stats["completed"] + self._stats["failed"]
+        average = self._stats["busy_seconds"] / completed if completed else 1.0
+        return max(1, math.ceil(average * self._running / self.workers))
+
+    def check_capacity(self) -> None:
+        if self._running >= self.capacity:
+            self._stats["rejected"] += 1
+            raise PoolOverloaded(self.retry_after())
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is not None and self._tasks >= self.recycle_after:
+            # Tasks already submitted finish on the old workers before they exit
+            logger.info(f"Recycling NLP workers after {self._tasks} tasks")
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.components,)
+            )
+            self._tasks = 0
+        return self._executor
+
+    async def start(self) -> None:
+        """Spawn the workers and wait until each has loaded the model"""
+        executor = self._ensure_executor()
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        pids = await asyncio.gather(*(loop.run_in_executor(executor, _ready) for _ in range(self.workers)))
+        logger.info(
+            f"{len(set(pids))} NLP workers ready in {time.perf_counter() - started:.1f}s "
+            f"(queue {self.max_queue}, timeout {self.timeout}s)"
+        )
+
+    async def version(self, components: Optional[List[str]] = None) -> str:
+        """``DocumentProcessor.version`` of the workers, asked once per component set.
+
+        Raises ``ValueError`` for unknown components, like the processor.
+        """
+        key = tuple(components) if components is not None else None
+        if key not in self._versions:
+            self._versions[key] = await self.run(processor_version, components, shed=False)
+        return self._versions[key]
+
+    async def run(self, fn, *args, timeout: Optional[float] = None, shed: bool = True):
+        """Run ``fn(*args)`` in a worker process.
+
+        With ``shed`` the call raises ``PoolOverloaded`` when the pool is at
+        capacity; tasks that belong to an already admitted request pass
+        ``shed=False``. ``timeout`` defaults to the pool's, 0 disables it.
+        """
+        if shed:
+            self.check_capacity()
+        else:
+            if self._bulk_slots is None:
+                self._bulk_slots = asyncio.Semaphore(self.max_bulk)
+            await self._bulk_slots.acquire()
+            self._bulk_running += 1
+        try:
+            executor = self._ensure_executor()
+            # The executor's own future, so the slot is freed when the worker is
+            # really done and cancelling only ever drops a task that has not started
+            task = executor.submit(fn, *args)
+        except BaseException as e:
+            if not shed:
+                self._release_bulk_slot()
+            if isinstance(e, BrokenProcessPool):
+                self._discard_executor(self._executor)
+            raise
+        self._tasks += 1
+        self._running += 1
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        task.add_done_callback(
+            lambda done: loop.call_soon_threadsafe(self._finished, done, started, not shed, executor)
+        )
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(task)), timeout or None)
+        except asyncio.TimeoutError:
+            self._stats["timed_out"] += 1
+            task.cancel()
+            raise PoolTimeout(f"NLP task did not finish within {timeout}s")
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+
+    def _release_bulk_slot(self) -> None:
+        self._bulk_running -= 1
+        self._bulk_slots.release()
+
+    def _discard_executor(self, executor: Optional[ProcessPoolExecutor]) -> None:
+        """Drop a broken executor so the next task spawns new workers"""
+        if executor is None or executor is not self._executor:
+            return
+        logger.warning("An NLP worker died, restarting the pool")
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def _finished(
+        self,
+        future: Future,
+        started: float,
+        bulk: bool = False,
+        executor: Optional[ProcessPoolExecutor] = None
+    ) -> None:
+        self._running -= 1
+        if bulk:
+            self._release_bulk_slot()
+        self._stats["busy_seconds"] += time.perf_counter() - started
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or error is not None:
+            self._stats["failed"] += 1
+        else:
+            self._stats["completed"] += 1
+        if isinstance(error, BrokenProcessPool):
+            self._discard_executor(executor)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "max_bulk": self.max_bulk,
+            "bulk_in_flight": self._bulk_running,
+            "timeout": self.timeout,
+            "running": min(self._running, self.workers),
+            "queued": max(0, self._running - self.workers),
+            "tasks_since_recycle": self._tasks,
+            **self._stats,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
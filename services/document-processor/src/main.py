@@ -1,15 +1,25 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy import text
+import asyncio
+import contextlib
 import logging
+import os
 from datetime import datetime
-from typing import Dict, Any
-from pydantic import BaseModel
+from typing import Dict, Any, List, Optional, Union
+from pydantic import BaseModel, Field
 
-from src.core.database import get_db
 from src.core.processor import DocumentProcessor
+from src.core.batch import BatchJobs, BatchProcessor
+from src.core.full_text import FullTextProcessor
+from src.core.workers import NLPWorkerPool, PoolOverloaded, PoolTimeout, process_paper
+from src.core.results import content_hash, get_cached, result_row, store_results
+from src.routers import entities
+from shared.database import get_database, get_db
+from shared.events import PaperEventSubscriber
 from shared.models import Paper
 
 # Configure logging
@@ -19,13 +29,89 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Document Processor Service")
-processor = DocumentProcessor()
+database = get_database()
+# All NLP runs in the pool's workers, this process loads no model
+worker_pool = NLPWorkerPool.from_env()
+full_text_processor = FullTextProcessor.from_env(worker_pool)
+batch_jobs = BatchJobs()
+
+PROCESS_MODES = ("abstract", "full_text")
+
+async def process_new_papers(pmids: List[str]) -> None:
+    """Process papers announced by the ingestion service; current results are skipped"""
+    await BatchProcessor(None, database.session_factory, pool=worker_pool).run(pmids)
+
+paper_events = PaperEventSubscriber.from_env(
+    "document-processor", process_new_papers, database.engine, database.session_factory
+)
+PAPER_EVENTS_ENABLED = os.getenv("PAPER_EVENTS_ENABLED", "true").lower() == "true"
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the NLP worker processes and the paper event consumer, stop them with the app"""
+    await worker_pool.start()
+    consumer = asyncio.create_task(paper_events.run()) if PAPER_EVENTS_ENABLED else None
+    try:
+        yield
+    finally:
+        if consumer is not None:
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+        await batch_jobs.aclose()
+        worker_pool.shutdown()
+        await database.dispose()
+
+app = FastAPI(title="Document Processor Service", lifespan=lifespan)
+app.include_router(entities.router)
+
+@app.exception_handler(PoolOverloaded)
+async def pool_overloaded_handler(request, exc: PoolOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request, exc: PoolTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
 
 class ProcessResponse(BaseModel):
     pmid: str
     processed_entities: Dict[str, list]
     text_length: int
+    entity_counts: Optional[Dict[str, Dict[str, int]]] = None
+    entity_offsets: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    chunks: Optional[int] = None
+    cached: bool = False
+
+class BatchProcessRequest(BaseModel):
+    pmids: Optional[List[str]] = None
+    all_unprocessed: bool = False
+    batch_size: int = Field(64, ge=1, le=10000)
+    n_process: int = Field(1, ge=1, le=64)
+    components: Optional[List[str]] = None
+    mode: str = "abstract"
+    force: bool = False
+
+class BatchProcessResponse(BaseModel):
+    processed: int
+    requested: Optional[int]
+    skipped: Optional[int]
+    elapsed_seconds: float
+    docs_per_second: float
+    nlp_docs_per_second: float
+
+class BatchJobResponse(BaseModel):
+    job_id: str
+    status: str
+    mode: str
+    error: Optional[str]
+    processed: int
+    docs_per_second: Optional[float]
+    result: Optional[BatchProcessResponse]
+    created_at: datetime
+    finished_at: Optional[datetime]
 
 @app.get("/health")
 async def health_check(db: AsyncSession = Depends(get_db)):
@@ -35,6 +121,7 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         return {
             "status": "healthy",
             "database": "connected",
+            "pool": database.metrics(),
             "timestamp": datetime.utcnow()
         }
     except Exception as e:
@@ -42,12 +129,88 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         return {
             "status": "unhealthy",
             "error": str(e),
+            "pool": database.metrics(),
             "timestamp": datetime.utcnow()
         }
 
+@app.get("/process/stats")
+async def processing_stats():
+    """Worker pool load and event lag"""
+    return {
+        "worker_pool": worker_pool.stats(),
+        "paper_events": paper_events.stats() if PAPER_EVENTS_ENABLED else None,
+    }
+
+@app.post("/process/batch", response_model=Union[BatchProcessResponse, BatchJobResponse])
+async def process_batch(request: BatchProcessRequest, response: Response):
+    """Process a list of PMIDs, or every unprocessed paper, and store the results.
+
+    A list of PMIDs is processed within the request. ``all_unprocessed``
+    can take hours, so it starts a background job and answers 202 with its
+    id; poll ``GET /process/batch/{job_id}`` for progress.
+    """
+    if request.pmids is None and not request.all_unprocessed:
+        raise HTTPException(status_code=400, detail="Pass pmids or set all_unprocessed")
+    if request.mode not in PROCESS_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(PROCESS_MODES)}")
+    try:
+        batch = BatchProcessor(
+            None,
+            database.session_factory,
+            batch_size=request.batch_size,
+            n_process=request.n_process,
+            components=request.components,
+            full_text_processor=full_text_processor if request.mode == "full_text" else None,
+            force=request.force,
+            pool=worker_pool
+        )
+        # Unknown components are a 400 here, not a failed background job
+        await batch.prepare()
+        if request.all_unprocessed:
+            running = batch_jobs.running()
+            if running is not None:
+                raise HTTPException(status_code=409, detail=f"Batch job {running.id} is already running")
+            job = batch_jobs.submit(batch)
+            response.status_code = 202
+            return BatchJobResponse(**job.status_dict())
+        return BatchProcessResponse(**await batch.run(request.pmids))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in batch processing: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/process/batch", response_model=List[BatchJobResponse])
+async def list_batch_jobs():
+    """Background batch jobs of this replica, newest first"""
+    return [BatchJobResponse(**job.status_dict()) for job in batch_jobs.list()]
+
+@app.get("/process/batch/{job_id}", response_model=BatchJobResponse)
+async def get_batch_job(job_id: str):
+    """Status and progress of a background batch job"""
+    job = batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return BatchJobResponse(**job.status_dict())
+
 @app.post("/process/{pmid}", response_model=ProcessResponse)
-async def process_document(pmid: str, db: AsyncSession = Depends(get_db)):
-    """Process a document and extract entities"""
+async def process_document(
+    pmid: str,
+    mode: str = "abstract",
+    force: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """Process a document and extract entities.
+
+    ``mode=full_text`` also processes the body, chunked across the worker
+    processes, and adds per-entity counts and character offsets. A stored
+    result for the same processor version and text is returned without
+    running NLP unless ``force`` is set.
+    """
+    if mode not in PROCESS_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(PROCESS_MODES)}")
     try:
         # Get paper from database
         stmt = (
@@ -70,12 +233,40 @@ async def process_document(pmid: str, db: AsyncSession = Depends(get_db)):
             "publication_date": paper.publication_date
         }
         
-        # Process the paper
-        result = await processor.process_document(paper_dict)
-        
+        if mode == "full_text":
+            paper_dict["full_text"] = paper.full_text
+            digest = content_hash(full_text_processor.document_text(paper_dict))
+        else:
+            digest = content_hash(DocumentProcessor.document_text(paper_dict))
+        version = await worker_pool.version()
+
+        cached = None if force else await get_cached(db, paper.id, version, digest)
+        if cached is not None:
+            return ProcessResponse(
+                pmid=cached.pmid,
+                processed_entities=cached.entities,
+                text_length=cached.text_length,
+                cached=True,
+                **(cached.details or {})
+            )
+
+        # Process the paper in the worker pool, keeping NLP off the event loop
+        if mode == "full_text":
+            worker_pool.check_capacity()
+            try:
+                result = await asyncio.wait_for(
+                    full_text_processor.process(paper_dict), full_text_processor.timeout
+                )
+            except asyncio.TimeoutError:
+                raise PoolTimeout(f"Full text of {pmid} not processed within {full_text_processor.timeout}s")
+        else:
+            result = await worker_pool.run(process_paper, paper_dict)
+
+        await store_results(db, [result_row(paper.id, paper.pmid, version, digest, mode, result)])
+        await db.commit()
         return ProcessResponse(**result)
         
-    except HTTPException:
+    except (HTTPException, PoolOverloaded, PoolTimeout):
         raise
     except Exception as e:
         logger.error(f"Error processing document: {str(e)}")
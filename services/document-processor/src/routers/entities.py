@@ -0,0 +1,125 @@
+# Document processor entity search and facet endpoints
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from shared.database import get_db
+from src.core.entity_index import EntityIndex, MATCH_MODES
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/entities", tags=["entities"])
+
+# One index per worker process, rebuilt once it is this old
+entity_index = EntityIndex()
+INDEX_MAX_AGE = float(os.getenv("ENTITY_INDEX_MAX_AGE", "300"))
+
+class FacetValue(BaseModel):
+    text: str
+    papers: int
+
+class SearchResponse(BaseModel):
+    total: int
+    pmids: List[str]
+    unmatched: List[str]
+    facets: Optional[Dict[str, List[FacetValue]]] = None
+    took_ms: float
+
+class FacetRequest(BaseModel):
+    # A result set, e.g. the pmids of RAG sources, or an entity query
+    pmids: Optional[List[str]] = None
+    terms: Optional[List[str]] = None
+    match: str = "all"
+    category: Optional[str] = None
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    categories: Optional[List[str]] = None
+    limit: int = Field(10, ge=1, le=1000)
+
+class FacetResponse(BaseModel):
+    papers: int
+    missing: List[str]
+    facets: Dict[str, List[FacetValue]]
+    took_ms: float
+
+async def get_index(db: AsyncSession = Depends(get_db)) -> EntityIndex:
+    await entity_index.ensure_loaded(db, max_age=INDEX_MAX_AGE)
+    return entity_index
+
+def _facet_values(facets) -> Dict[str, List[FacetValue]]:
+    return {
+        category: [FacetValue(text=entity_text, papers=papers) for entity_text, papers in values]
+        for category, values in facets.items()
+    }
+
+@router.post("/index/refresh")
+async def refresh_index(db: AsyncSession = Depends(get_db)):
+    """Rebuild the in-memory index from paper_entities"""
+    try:
+        return await entity_index.refresh(db)
+    except Exception as e:
+        logger.error(f"Entity index refresh failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/index/stats")
+async def index_stats(index: EntityIndex = Depends(get_index)):
+    """Size, compression and freshness of the in-memory index"""
+    return index.stats()
+
+@router.get("/search", response_model=SearchResponse)
+async def search_entities(
+    terms: List[str] = Query(...),
+    match: str = "all",
+    category: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    facets: int = Query(0, ge=0, le=1000),
+    index: EntityIndex = Depends(get_index)
+):
+    """Papers mentioning all (``match=all``) or any of the entity ``terms``, newest first.
+
+    ``facets`` > 0 adds that many top entities per category over the whole
+    result, not just the returned page.
+    """
+    if match not in MATCH_MODES:
+        raise HTTPException(status_code=400, detail=f"match must be one of {', '.join(MATCH_MODES)}")
+    started = time.perf_counter()
+    docs, unmatched = index.search(terms, match, category, year_from, year_to)
+    return SearchResponse(
+        total=len(docs),
+        pmids=index.pmids_of(docs[offset:offset + limit]),
+        unmatched=unmatched,
+        facets=_facet_values(index.facets(docs, limit=facets)) if facets else None,
+        took_ms=(time.perf_counter() - started) * 1000
+    )
+
+@router.post("/facets", response_model=FacetResponse)
+async def entity_facets(request: FacetRequest, index: EntityIndex = Depends(get_index)):
+    """Top entities per category across a result set or an entity query"""
+    if (request.pmids is None) == (request.terms is None):
+        raise HTTPException(status_code=400, detail="Pass either pmids or terms")
+    if request.match not in MATCH_MODES:
+        raise HTTPException(status_code=400, detail=f"match must be one of {', '.join(MATCH_MODES)}")
+    started = time.perf_counter()
+    missing = []
+    if request.pmids is not None:
+        docs = index.docs(request.pmids)
+        known = set(index.pmids_of(docs))
+        missing = [pmid for pmid in request.pmids if pmid not in known]
+        docs = index.filter_years(docs, request.year_from, request.year_to)
+    else:
+        docs, _ = index.search(
+            request.terms, request.match, request.category, request.year_from, request.year_to
+        )
+    return FacetResponse(
+        papers=len(docs),
+        missing=missing,
+        facets=_facet_values(index.facets(docs, limit=request.limit, categories=request.categories)),
+        took_ms=(time.perf_counter() - started) * 1000
+    )
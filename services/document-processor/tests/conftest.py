@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the service the way it runs, from its root: `from src.core ...`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
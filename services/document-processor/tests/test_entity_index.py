@@ -0,0 +1,100 @@
+import asyncio
+
+import numpy as np
+
+from src.core.entity_index import EntityIndex, _compress
+
+# Papers are numbered by position; widths follow the largest gap between them
+PAPER_COUNT = 70_001
+POSTINGS = {
+    "alpha": [0, 1, 5, 200],  # gaps fit in 1 byte
+    "beta": [5, 300, 1000],  # 2 bytes
+    "gamma": [5, 70_000],  # 4 bytes
+    "delta": [7],  # no gaps at all
+}
+
+
+def build(postings=POSTINGS, categories=None):
+    # Database ids are sparse and not equal to the index positions
+    paper_rows = [(10 * doc + 3, f"PMC{doc}", 2020) for doc in range(PAPER_COUNT)]
+    entity_rows = [
+        (100 + entity, categories[entity] if categories else "diseases", name)
+        for entity, name in enumerate(postings)
+    ]
+    entity_refs, paper_refs = [], []
+    for entity, docs in enumerate(postings.values()):
+        entity_refs.extend([100 + entity] * len(docs))
+        paper_refs.extend(10 * doc + 3 for doc in docs)
+    index = EntityIndex()
+    index._install(EntityIndex._build(
+        entity_rows, paper_rows, np.array(entity_refs, dtype=np.int64), np.array(paper_refs, dtype=np.int64)
+    ))
+    return index
+
+
+def test_postings_round_trip_at_each_gap_width():
+    index = build()
+
+    widths = {name: int(index.posting_widths[entity]) for entity, name in enumerate(POSTINGS)}
+    assert widths == {"alpha": 1, "beta": 2, "gamma": 4, "delta": 1}
+    for entity, docs in enumerate(POSTINGS.values()):
+        assert index.postings(entity).tolist() == docs
+
+
+def test_compress_mixed_widths_share_one_blob():
+    docs = np.array([0, 1, 5, 200, 5, 300, 1000, 5, 70_000, 7], dtype=np.int32)
+    indptr = np.array([0, 4, 7, 9, 10, 10], dtype=np.int64)
+
+    first, offsets, widths, blob = _compress(indptr, docs)
+
+    assert first.tolist() == [0, 5, 5, 7, -1]
+    assert widths.tolist()[:4] == [1, 2, 4, 1]
+    # 3 one-byte, 2 two-byte and 1 four-byte gaps
+    assert offsets.tolist() == [0, 3, 7, 11, 11, 11]
+    assert blob.size == 11
+
+
+def test_search_all_and_any():
+    index = build()
+
+    docs, unmatched = index.search(["alpha", "beta", "gamma"], match="all")
+    assert index.pmids_of(docs) == ["PMC5"]
+    assert unmatched == []
+
+    docs, _ = index.search(["Alpha", "gamma"], match="any")
+    # Same year, so newest (highest) paper first
+    assert docs.tolist() == [70_000, 200, 5, 1, 0]
+
+    docs, unmatched = index.search(["alpha", "missing"], match="all")
+    assert docs.size == 0
+    assert unmatched == ["missing"]
+
+    docs, unmatched = index.search(["alpha", "missing"], match="any")
+    assert docs.tolist() == [200, 5, 1, 0]
+
+
+def test_more_than_255_categories():
+    postings = {f"term{i}": [i] for i in range(300)}
+    categories = [f"category{i:03d}" for i in range(300)]
+    index = build(postings, categories)
+
+    assert index.resolve("term299", "category299") == [299]
+    assert index.resolve("term299", "category043") == []
+
+
+def test_ensure_loaded_rebuilds_once_for_concurrent_requests():
+    index = EntityIndex()
+    rebuilds = []
+
+    async def rebuild(db):
+        rebuilds.append(db)
+        await asyncio.sleep(0.01)
+        index.refreshed_at = 1e12
+
+    index._refresh = rebuild
+
+    async def requests():
+        await asyncio.gather(*(index.ensure_loaded(None, max_age=60) for _ in range(5)))
+
+    asyncio.run(requests())
+    assert len(rebuilds) == 1
@@ -0,0 +1,56 @@
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from src.core.processor import DocumentProcessor
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    # Rule-based pipeline, so the test needs no trained model download
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": "ORG", "pattern": "Acme Labs"}])
+    path = tmp_path_factory.mktemp("model")
+    nlp.to_disk(path)
+    return str(path)
+
+
+@pytest.fixture
+def processor(model_dir, monkeypatch):
+    monkeypatch.delenv("GAZETTEER_PATH", raising=False)
+    monkeypatch.delenv("TERM_VOCABULARY", raising=False)
+    return DocumentProcessor(model=model_dir, components=["sentencizer"])
+
+
+def papers(count):
+    return [
+        {"pmid": str(i), "title": f"Paper {i}", "abstract": "Samples were sequenced at Acme Labs."}
+        for i in range(count)
+    ]
+
+
+def organizations(mentions):
+    return {text for category, text, _, _ in mentions if category == "organizations"}
+
+
+@pytest.mark.parametrize("n_process", [1, 2])
+def test_process_batch_runs_requested_component(processor, n_process):
+    results = list(processor.process_batch(
+        papers(4), batch_size=2, n_process=n_process, components=["entity_ruler"]
+    ))
+
+    assert [paper["pmid"] for paper, _, _ in results] == ["0", "1", "2", "3"]
+    for _, mentions, _ in results:
+        assert organizations(mentions) == {"Acme Labs"}
+    # The run's components do not leak into later default runs
+    assert processor.nlp.pipe_names == ["sentencizer"]
+
+
+@pytest.mark.parametrize("n_process", [1, 2])
+def test_process_batch_default_components(processor, n_process):
+    results = list(processor.process_batch(papers(2), batch_size=2, n_process=n_process))
+
+    for _, mentions, _ in results:
+        assert organizations(mentions) == set()
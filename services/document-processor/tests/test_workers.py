@@ -0,0 +1,84 @@
+import asyncio
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from src.core.processor import PROCESSOR_VERSION
+from src.core.workers import NLPWorkerPool, process_papers
+
+
+def _pid():
+    return os.getpid()
+
+
+def _killed():
+    # What the OOM killer does to a worker
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    nlp.to_disk(tmp_path)
+    # Spawned workers load the model named in their inherited environment
+    monkeypatch.setenv("NLP_MODEL", str(tmp_path))
+    monkeypatch.delenv("GAZETTEER_PATH", raising=False)
+    monkeypatch.delenv("TERM_VOCABULARY", raising=False)
+    pool = NLPWorkerPool(workers=1, components=["sentencizer"], max_queue=2, max_bulk=1, timeout=60)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_recovers_from_killed_worker(pool):
+    async def scenario():
+        first = await pool.run(_pid)
+        with pytest.raises(BrokenProcessPool):
+            await pool.run(_killed, shed=False)
+        # Let the done callbacks settle the slots
+        await asyncio.sleep(0)
+        second = await pool.run(_pid, shed=False)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first != second
+    stats = pool.stats()
+    assert stats["running"] == 0
+    assert stats["bulk_in_flight"] == 0
+    assert stats["failed"] == 1
+    assert stats["completed"] == 2
+
+
+def test_failed_submit_releases_bulk_slot(pool, monkeypatch):
+    def broken():
+        raise BrokenProcessPool("pool is broken")
+
+    monkeypatch.setattr(pool, "_ensure_executor", broken)
+
+    async def scenario():
+        for _ in range(pool.max_bulk + 1):
+            with pytest.raises(BrokenProcessPool):
+                await asyncio.wait_for(pool.run(_pid, shed=False), 5)
+
+    asyncio.run(scenario())
+    assert pool.stats()["bulk_in_flight"] == 0
+    assert pool._running == 0
+
+
+def test_papers_are_processed_in_workers(pool):
+    papers = [{"pmid": str(i), "title": f"Paper {i}", "abstract": "One sentence. Two."} for i in range(3)]
+
+    async def scenario():
+        version = await pool.version()
+        results = await pool.run(process_papers, papers, 2, shed=False)
+        with pytest.raises(ValueError):
+            await pool.version(["parser"])
+        return version, results
+
+    version, results = asyncio.run(scenario())
+    assert version.startswith(f"{PROCESSOR_VERSION}-")
+    assert [result["text_length"] for result in results] == [8, 8, 8]
@@ -12,16 +12,17 @@ class Settings(BaseSettings):
     chunk_size: int = 512
     chunk_overlap: int = 64
     
-    # Database Configuration
-    DB_HOST: str = ""
-    DB_PORT: str = "25060"
-    DB_NAME: str = "defaultdb"
-    DB_USER: str = "doadmin"
-    DB_PASSWORD: str = ""
-    
-    # pgvector Configuration
+    # pgvector Configuration, the connection comes from shared.database (DB_* variables)
     PGVECTOR_TABLE: str = "paper_embeddings"
     
+    # Citation re-ranking Configuration
+    rerank_candidate_multiplier: int = 4
+    rerank_vector_weight: float = 0.7
+    rerank_in_degree_weight: float = 0.1
+    rerank_pagerank_weight: float = 0.1
+    rerank_co_citation_weight: float = 0.1
+    citation_graph_max_age: float = 300.0
+    
     
 
     class Config:
@@ -3,18 +3,27 @@ from datetime import datetime
 from openai import OpenAI
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import or_, text
 from llama_index.core import VectorStoreIndex, Document, StorageContext, Settings
 from llama_index.vector_stores.postgres import PGVectorStore
+import asyncio
+import hashlib
 import logging
-import ssl
+import time
 from sqlalchemy.exc import SQLAlchemyError
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 
 from .config import Settings as AppSettings
-from shared.models import Paper
+from .reranker import CitationReranker
+from ..models.schemas import RerankWeights
+from shared.database import get_database
+from shared.models import Paper, PaperSignature
 
 logger = logging.getLogger(__name__)
 
+# shared.database DB_SSL modes as psycopg2 sslmode / asyncpg ssl values
+SSL_PARAMS = {"disable": "disable", "require": "require", "verify": "verify-full"}
+
 # Global configuration using Settings
 Settings.embed_model = HuggingFaceEmbedding(model_name="all-MiniLM-L6-v2")  # Local embedding model
 
@@ -23,16 +32,17 @@ class RAGServiceError(Exception):
     pass
 
 class RAGService:
-    def __init__(self, settings: AppSettings, db: AsyncSession):
+    def __init__(self, settings: AppSettings, db: AsyncSession, reranker: Optional[CitationReranker] = None):
         """Initialize RAG service with database connection"""
         self.settings = self._validate_settings(settings)
         self.db = db
+        self.reranker = reranker
         self.vector_store: Optional[PGVectorStore] = None
         self._init_services()
 
     def _validate_settings(self, settings: AppSettings) -> AppSettings:
         """Validate settings and ensure required fields are present"""
-        required_fields = ['DB_HOST', 'DB_PORT', 'DB_NAME', 'DB_USER', 'DB_PASSWORD', 'PGVECTOR_TABLE']
+        required_fields = ['PGVECTOR_TABLE']
         missing_fields = [field for field in required_fields if not getattr(settings, field, None)]
         if missing_fields:
             raise RAGServiceError(f"Missing required settings: {', '.join(missing_fields)}")
@@ -41,18 +51,15 @@ class RAGService:
     def _init_services(self):
         """Initialize vector store and index"""
         try:
-            # Create SSL context
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-        
-            # URL encode the password
-            import urllib.parse
-            encoded_password = urllib.parse.quote_plus(self.settings.DB_PASSWORD)
-        
-            # Create connection strings directly
-            sync_connection_url = f"postgresql+psycopg2://{self.settings.DB_USER}:{encoded_password}@{self.settings.DB_HOST}:{self.settings.DB_PORT}/{self.settings.DB_NAME}?sslmode=require"
-            async_connection_url = f"postgresql+asyncpg://{self.settings.DB_USER}:{encoded_password}@{self.settings.DB_HOST}:{self.settings.DB_PORT}/{self.settings.DB_NAME}?ssl=require"
+            # Same server, credentials and SSL mode as every other connection
+            database = get_database()
+            ssl_param = SSL_PARAMS[database.ssl_mode]
+            sync_connection_url = database.url.set(
+                drivername="postgresql+psycopg2", query={"sslmode": ssl_param}
+            ).render_as_string(hide_password=False)
+            async_connection_url = database.url.set(
+                query={"ssl": ssl_param}
+            ).render_as_string(hide_password=False)
 
             # Set up settings to explicitly disable LLM
             from llama_index.core import Settings
@@ -86,34 +93,19 @@ class RAGService:
         if not self.vector_store:
             raise RAGServiceError("Vector store not initialized")
         try:
-            # Get all processed papers from database
-            stmt = select(Paper)
+            # Get all processed papers from database, one per near-duplicate cluster
+            stmt = (
+                select(Paper)
+                .outerjoin(PaperSignature, PaperSignature.paper_id == Paper.id)
+                .where(or_(PaperSignature.cluster_id.is_(None), PaperSignature.cluster_id == Paper.id))
+            )
             result = await self.db.execute(stmt)
             papers = result.scalars().all()
             if not papers:
                 logger.warning("No papers found in database")
                 return "No papers available for indexing"
             logger.info(f"Creating index from {len(papers)} papers")
-            documents = []
-            for paper in papers:
-                if not paper.title or not paper.pmid:
-                    logger.warning(f"Skipping paper with missing required fields: {paper.pmid}")
-                    continue
-                # Combine paper content
-                content = f"""
-                Title: {paper.title}
-                Abstract: {paper.abstract or ''}
-                """
-                # Create document with metadata
-                doc = Document(
-                    text=content,
-                    metadata={
-                        "pmid": paper.pmid,
-                        "title": paper.title,
-                        "indexed_at": datetime.utcnow().isoformat()
-                    }
-                )
-                documents.append(doc)
+            documents = [doc for doc in map(self._paper_document, papers) if doc is not None]
             # Create storage context and index (Settings automatically handles embed_model)
             storage_context = StorageContext.from_defaults(vector_store=self.vector_store)
             self.index = VectorStoreIndex.from_documents(
@@ -130,10 +122,110 @@ class RAGService:
             logger.error(f"Error creating index: {str(e)}")
             raise RAGServiceError(f"Index creation failed: {str(e)}")
 
-    async def query_papers(self, query: str, top_k: int = 5) -> Dict[str, Any]:
+    def _paper_document(self, paper: Paper) -> Optional[Document]:
+        """Index document of a paper, keyed by PMID so it can be replaced later"""
+        if not paper.title or not paper.pmid:
+            logger.warning(f"Skipping paper with missing required fields: {paper.pmid}")
+            return None
+        # Combine paper content
+        content = f"""
+        Title: {paper.title}
+        Abstract: {paper.abstract or ''}
+        """
+        return Document(
+            id_=paper.pmid,
+            text=content,
+            metadata={
+                "pmid": paper.pmid,
+                "title": paper.title,
+                "indexed_at": datetime.utcnow().isoformat(),
+                "content_hash": hashlib.sha256(content.encode("utf-8")).hexdigest()
+            },
+            excluded_embed_metadata_keys=["content_hash"],
+            excluded_llm_metadata_keys=["content_hash"]
+        )
+
+    async def _indexed_hashes(self, pmids: List[str]) -> Dict[str, str]:
+        """Content hash of the indexed copy of each paper, from the vector table's metadata"""
+        table = f"data_{self.settings.PGVECTOR_TABLE.lower()}"
+        exists = await self.db.execute(text("SELECT to_regclass(:table)"), {"table": f"public.{table}"})
+        if exists.scalar() is None:
+            return {}
+        result = await self.db.execute(
+            text(f"""
+                SELECT DISTINCT metadata_->>'pmid', metadata_->>'content_hash'
+                FROM public.{table}
+                WHERE metadata_->>'pmid' = ANY(:pmids)
+            """),
+            {"pmids": pmids}
+        )
+        return dict(result.all())
+
+    def _replace_documents(self, documents: List[Document]) -> None:
+        for doc in documents:
+            self.vector_store.delete(doc.doc_id)
+            self.index.insert(doc)
+
+    async def index_papers(self, pmids: List[str], skip_current: bool = False) -> Dict[str, Any]:
+        """Embed and add the given papers to the existing index.
+
+        Only these papers are embedded; rows already stored for them are
+        replaced, so re-indexing a paper never duplicates it. Papers that are
+        not the canonical copy of their near-duplicate cluster are skipped,
+        as in a full build. With ``skip_current``, papers whose indexed copy
+        was embedded from the same text are left alone and returned as
+        ``current``; the event consumer and the pipeline both index new
+        papers, so whichever comes second does no work.
+        """
+        if not self.vector_store:
+            raise RAGServiceError("Vector store not initialized")
         try:
+            stmt = (
+                select(Paper)
+                .outerjoin(PaperSignature, PaperSignature.paper_id == Paper.id)
+                .where(Paper.pmid.in_(pmids))
+                .where(or_(PaperSignature.cluster_id.is_(None), PaperSignature.cluster_id == Paper.id))
+            )
+            result = await self.db.execute(stmt)
+            documents = [doc for doc in map(self._paper_document, result.scalars().all()) if doc is not None]
+            current = []
+            if skip_current and documents:
+                hashes = await self._indexed_hashes([doc.doc_id for doc in documents])
+                current = [doc.doc_id for doc in documents if hashes.get(doc.doc_id) == doc.metadata["content_hash"]]
+                unchanged = set(current)
+                documents = [doc for doc in documents if doc.doc_id not in unchanged]
+            # Embedding is CPU bound; off the event loop, queries keep being served meanwhile
+            await asyncio.to_thread(self._replace_documents, documents)
+            indexed = {doc.doc_id for doc in documents}
+            logger.info(f"Indexed {len(documents)} of {len(pmids)} papers incrementally")
+            return {
+                "indexed": len(documents),
+                "skipped": [pmid for pmid in pmids if pmid not in indexed and pmid not in current],
+                "current": current,
+            }
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error during indexing: {str(e)}")
+            raise RAGServiceError(f"Failed to fetch papers: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error indexing papers: {str(e)}")
+            raise RAGServiceError(f"Incremental indexing failed: {str(e)}")
+
+    async def query_papers(
+        self,
+        query: str,
+        top_k: int = 5,
+        rerank: bool = False,
+        rerank_weights: Optional[RerankWeights] = None
+    ) -> Dict[str, Any]:
+        try:
+            if rerank and not self.reranker:
+                raise RAGServiceError("Citation re-ranking is not configured")
+
+            # Re-ranking needs a wider candidate pool to reorder
+            candidates = top_k * self.settings.rerank_candidate_multiplier if rerank else top_k
             query_engine = self.index.as_query_engine(
-                similarity_top_k=top_k,
+                similarity_top_k=candidates,
                 response_mode="no_text"
             )
             
@@ -148,14 +240,23 @@ class RAGService:
                     "score": float(node.score) if hasattr(node, 'score') else 0.0
                 })
 
+            metadata = {"papers_retrieved": len(sources)}
+            if rerank:
+                started = time.perf_counter()
+                sources = self.reranker.rerank(sources, top_k, rerank_weights)
+                metadata.update({
+                    "papers_retrieved": len(sources),
+                    "candidates": candidates,
+                    "reranked": True,
+                    "rerank_ms": (time.perf_counter() - started) * 1000
+                })
+
             return {
                 "query": query,
                 "sources": sources,
-                "metadata": {
-                    "papers_retrieved": len(sources)
-                }
+                "metadata": metadata
             }
 
         except Exception as e:
             logger.error(f"Error querying papers: {str(e)}")
-            raise
\ No newline at end of file
+            raise
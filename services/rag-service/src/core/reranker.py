@@ -0,0 +1,125 @@
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from shared.citation_graph import CitationGraph
+from .config import Settings as AppSettings
+from ..models.schemas import RerankWeights
+
+logger = logging.getLogger(__name__)
+
+class CitationFeatureTable:
+    """Per-paper citation features, recomputed only when the graph changes.
+
+    Values are normalised to [0, 1] and stored as float32 arrays indexed by
+    graph node, so looking up a candidate is a single array read. ``sync``
+    builds the arrays in an executor and swaps them in, so the event loop
+    only ever sees a complete table.
+    """
+
+    def __init__(self, graph: CitationGraph):
+        self.graph = graph
+        self.version = -1
+        self.in_degree = np.empty(0, dtype=np.float32)
+        self.pagerank = np.empty(0, dtype=np.float32)
+        self._lock = asyncio.Lock()
+
+    async def sync(self) -> None:
+        if self.version == self.graph.version:
+            return
+        async with self._lock:
+            if self.version == self.graph.version:
+                return
+            started = time.perf_counter()
+            rank = await self.graph.pagerank_async()
+            # No await since pagerank_async returned, so both match this version
+            version, in_degree = self.graph.version, self.graph.in_degree()
+            loop = asyncio.get_running_loop()
+            in_degree, rank = await loop.run_in_executor(None, _normalise, in_degree, rank)
+            self.in_degree, self.pagerank, self.version = in_degree, rank, version
+        logger.info(
+            f"Citation feature table rebuilt for {len(rank)} papers "
+            f"in {time.perf_counter() - started:.3f}s"
+        )
+
+def _normalise(in_degree: np.ndarray, rank: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    in_degree = np.log1p(in_degree.astype(np.float64))
+    return (
+        (in_degree / max(in_degree.max(initial=0.0), 1e-12)).astype(np.float32),
+        (rank / max(rank.max(initial=0.0), 1e-12)).astype(np.float32)
+    )
+
+class CitationReranker:
+    """Mixes vector similarity with citation-graph features of each candidate"""
+
+    def __init__(self, graph: CitationGraph, settings: AppSettings):
+        self.graph = graph
+        self.features = CitationFeatureTable(graph)
+        self.default_weights = RerankWeights(
+            vector=settings.rerank_vector_weight,
+            in_degree=settings.rerank_in_degree_weight,
+            pagerank=settings.rerank_pagerank_weight,
+            co_citation=settings.rerank_co_citation_weight
+        )
+
+    async def prepare(self) -> None:
+        """Bring the feature table up to the loaded graph, off the event loop"""
+        await self.features.sync()
+
+    def rerank(
+        self,
+        sources: List[Dict[str, Any]],
+        top_k: int,
+        weights: Optional[RerankWeights] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the ``top_k`` best sources, each annotated with its features"""
+        if not sources:
+            return sources
+        weights = weights or self.default_weights
+
+        # Papers added since the table was last synced have no features yet
+        tabled = len(self.features.pagerank)
+        found = [self.graph.node(source.get("pmid")) for source in sources]
+        found = [node if node is not None and node < tabled else None for node in found]
+        known = np.array([node is not None for node in found], dtype=bool)
+        known_nodes = np.array([node for node in found if node is not None], dtype=np.int32)
+
+        vector = np.array([source["score"] for source in sources], dtype=np.float32)
+        spread = vector.max() - vector.min()
+        vector = (vector - vector.min()) / spread if spread > 0 else np.ones_like(vector)
+
+        in_degree = np.zeros(len(sources), dtype=np.float32)
+        pagerank = np.zeros(len(sources), dtype=np.float32)
+        co_citation = np.zeros(len(sources), dtype=np.float32)
+        if known_nodes.size:
+            in_degree[known] = self.features.in_degree[known_nodes]
+            pagerank[known] = self.features.pagerank[known_nodes]
+            # Chunks of the same paper must not count as co-citations of it
+            unique_nodes, inverse = np.unique(known_nodes, return_inverse=True)
+            shared = self.graph.co_citation_within(unique_nodes).astype(np.float32)
+            if shared.max(initial=0) > 0:
+                co_citation[known] = (shared / shared.max())[inverse]
+
+        scores = (
+            weights.vector * vector
+            + weights.in_degree * in_degree
+            + weights.pagerank * pagerank
+            + weights.co_citation * co_citation
+        )
+        order = np.argsort(-scores, kind="stable")[:top_k]
+
+        reranked = []
+        for i in order:
+            source = dict(sources[i])
+            source["vector_score"] = source["score"]
+            source["score"] = float(scores[i])
+            source["citation_features"] = {
+                "in_degree": float(in_degree[i]),
+                "pagerank": float(pagerank[i]),
+                "co_citation": float(co_citation[i])
+            }
+            reranked.append(source)
+        return reranked
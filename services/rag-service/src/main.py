@@ -1,22 +1,62 @@
 from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+import contextlib
+import os
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 from sqlalchemy import text
-from typing import Dict, Any
-from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+from pydantic import BaseModel, Field
 from datetime import datetime
 
-from src.core.database import get_db
 from src.core.rag_service import RAGService
 from src.core.config import get_settings
+from src.core.reranker import CitationReranker
+from src.models.schemas import RerankWeights
+from shared.citation_graph import CitationGraph
+from shared.database import get_database, get_db
+from shared.events import PaperEventSubscriber
 
 logger = logging.getLogger(__name__)
-app = FastAPI(title="RAG Service")
 settings = get_settings()
+database = get_database()
+citation_graph = CitationGraph()
+reranker = CitationReranker(citation_graph, settings)
+
+async def index_new_papers(pmids: List[str]) -> None:
+    """Embed papers announced by the ingestion service into the existing index"""
+    async with database.session() as db:
+        await RAGService(settings, db).index_papers(pmids, skip_current=True)
+
+paper_events = PaperEventSubscriber.from_env(
+    "rag-service", index_new_papers, database.engine, database.session_factory
+)
+PAPER_EVENTS_ENABLED = os.getenv("PAPER_EVENTS_ENABLED", "true").lower() == "true"
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Index new papers as the ingestion service announces them; close the pool on shutdown"""
+    consumer = asyncio.create_task(paper_events.run()) if PAPER_EVENTS_ENABLED else None
+    try:
+        yield
+    finally:
+        if consumer is not None:
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+        await database.dispose()
+
+app = FastAPI(title="RAG Service", lifespan=lifespan)
 
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 5
+    rerank: bool = False
+    rerank_weights: Optional[RerankWeights] = None
+
+class IndexPapersRequest(BaseModel):
+    pmids: List[str] = Field(..., min_length=1, max_length=1000)
+    # Leave papers alone whose indexed copy was embedded from the same text
+    skip_current: bool = False
 
 @app.get("/health")
 async def health_check(db: AsyncSession = Depends(get_db)):
@@ -27,6 +67,7 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         return {
             "status": "healthy",
             "database": "connected",
+            "pool": database.metrics(),
             "timestamp": datetime.utcnow()
         }
     except Exception as e:
@@ -34,6 +75,7 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         return {
             "status": "unhealthy",
             "error": str(e),
+            "pool": database.metrics(),
             "timestamp": datetime.utcnow()
         }
 
@@ -48,14 +90,34 @@ async def create_index(db: AsyncSession = Depends(get_db)):
         logger.error(f"Error creating index: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/rag/index/papers")
+async def index_papers(request: IndexPapersRequest, db: AsyncSession = Depends(get_db)):
+    """Add or replace the given papers in the RAG index without rebuilding it"""
+    try:
+        rag_service = RAGService(settings, db)
+        return await rag_service.index_papers(list(dict.fromkeys(request.pmids)), request.skip_current)
+    except Exception as e:
+        logger.error(f"Error indexing papers: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/rag/events/stats")
+async def paper_event_stats():
+    """Position and lag of the incremental indexing consumer"""
+    return paper_events.stats() if PAPER_EVENTS_ENABLED else {"enabled": False}
+
 @app.post("/rag/query")
 async def query_papers(request: QueryRequest, db: AsyncSession = Depends(get_db)):
     """Query papers using RAG"""
     try:
-        rag_service = RAGService(settings, db)
+        if request.rerank:
+            await citation_graph.ensure_loaded(db, max_age=settings.citation_graph_max_age)
+            await reranker.prepare()
+        rag_service = RAGService(settings, db, reranker=reranker)
         result = await rag_service.query_papers(
             query=request.query,
-            top_k=request.top_k
+            top_k=request.top_k,
+            rerank=request.rerank,
+            rerank_weights=request.rerank_weights
         )
         return result
     except Exception as e:
@@ -49,4 +49,11 @@ class QueryRequest(BaseModel):
 class SearchResponse(BaseModel):
     total_results: int
     results: List[Paper]
-    metadata: dict
\ No newline at end of file
+    metadata: dict
+
+
+class RerankWeights(BaseModel):
+    vector: float = 0.7
+    in_degree: float = 0.1
+    pagerank: float = 0.1
+    co_citation: float = 0.1
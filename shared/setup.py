@@ -6,7 +6,9 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     install_requires=[
-        "sqlalchemy>=1.4.41",
-        "pydantic>=2.5.2"
+        "sqlalchemy[asyncio]>=1.4.41",
+        "asyncpg>=0.27.0",
+        "pydantic>=2.5.2",
+        "numpy>=1.26.2"
     ],
 )
\ No newline at end of file
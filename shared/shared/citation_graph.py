@@ -0,0 +1,431 @@
+# Description: In-memory citation graph stored as CSR integer arrays
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ("out", "in", "both")
+
+_LOAD_PAPERS = text("SELECT id, pmid FROM papers WHERE id > :after ORDER BY id")
+_LOAD_PAPERS_BY_ID = text("SELECT id, pmid FROM papers WHERE id = ANY(CAST(:ids AS integer[]))")
+_LOAD_ALL_EDGES = text("""
+    SELECT citing_paper_id, cited_paper_id, resolved_at
+    FROM paper_citations
+    WHERE citing_paper_id IS NOT NULL AND cited_paper_id IS NOT NULL
+""")
+_LOAD_NEW_EDGES = text("""
+    SELECT citing_paper_id, cited_paper_id, resolved_at
+    FROM paper_citations
+    WHERE cited_paper_id IS NOT NULL AND resolved_at >= :since
+""")
+
+
+def _csr(rows: np.ndarray, cols: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Build (indptr, indices) with each row's neighbours sorted"""
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32, copy=False)
+
+
+def _gather(indptr: np.ndarray, indices: np.ndarray, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate the neighbour lists of ``nodes`` without a Python loop.
+
+    Returns the neighbours and, aligned with them, the position in ``nodes``
+    each neighbour came from.
+    """
+    starts = indptr[nodes]
+    lengths = indptr[nodes + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+    owners = np.repeat(np.arange(len(nodes)), lengths)
+    return indices[offsets], owners
+
+
+def _top_counts(values: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct values ordered by how often they occur"""
+    if values.size == 0:
+        return values, np.empty(0, dtype=np.int64)
+    unique, counts = np.unique(values, return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:limit]
+    return unique[order], counts[order]
+
+
+def _power_iteration(
+    out_indptr: np.ndarray,
+    out_indices: np.ndarray,
+    damping: float,
+    tol: float = 1e-6,
+    max_iter: int = 100
+) -> np.ndarray:
+    """PageRank of a CSR graph; pure, so it can run in an executor"""
+    n = len(out_indptr) - 1
+    if n <= 0:
+        return np.empty(0, dtype=np.float64)
+
+    out_degree = np.diff(out_indptr)
+    dangling = out_degree == 0
+    inverse_degree = np.zeros(n, dtype=np.float64)
+    inverse_degree[~dangling] = 1.0 / out_degree[~dangling]
+    edge_src = np.repeat(np.arange(n, dtype=np.int32), out_degree)
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        contribution = (rank * inverse_degree)[edge_src]
+        updated = np.bincount(out_indices, weights=contribution, minlength=n)
+        updated = damping * (updated + rank[dangling].sum() / n) + (1.0 - damping) / n
+        delta = np.abs(updated - rank).sum()
+        rank = updated
+        if delta < tol:
+            break
+    return rank
+
+
+class CitationGraph:
+    """Citation graph over ``papers`` / ``paper_citations`` held in memory.
+
+    Nodes are numbered in the order papers are first seen, so incremental
+    refreshes only append. Edges point from the citing to the cited paper and
+    are kept twice, as out- and in-adjacency CSR arrays, so traversal in either
+    direction is a slice. Only resolved edges are part of the graph.
+    """
+
+    # Edges resolved in transactions that commit after a refresh carry an
+    # earlier resolved_at, so each refresh re-reads this much history.
+    REFRESH_OVERLAP = timedelta(minutes=5)
+    # PageRank vectors kept per damping factor, least recently used dropped
+    PAGERANK_CACHE_SIZE = 4
+
+    def __init__(self):
+        self.paper_ids = np.empty(0, dtype=np.int64)
+        self.pmids: List[str] = []
+        self._node_by_pmid: Dict[str, int] = {}
+        self._sorted_ids = np.empty(0, dtype=np.int64)
+        self._sorted_nodes = np.empty(0, dtype=np.int32)
+
+        self._edge_src = np.empty(0, dtype=np.int32)
+        self._edge_dst = np.empty(0, dtype=np.int32)
+        self.out_indptr = np.zeros(1, dtype=np.int64)
+        self.out_indices = np.empty(0, dtype=np.int32)
+        self.in_indptr = np.zeros(1, dtype=np.int64)
+        self.in_indices = np.empty(0, dtype=np.int32)
+
+        self._watermark: Optional[datetime] = None
+        self._pagerank: Dict[float, np.ndarray] = {}
+        self.version = 0
+        self.refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.paper_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.out_indices)
+
+    @property
+    def loaded(self) -> bool:
+        return self.refreshed_at is not None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _fresh(self, max_age: Optional[float]) -> bool:
+        return self.loaded and (max_age is None or time.time() - self.refreshed_at < max_age)
+
+    async def ensure_loaded(self, db: AsyncSession, max_age: Optional[float] = None) -> None:
+        """Load on first use and refresh once older than ``max_age`` seconds"""
+        if self._fresh(max_age):
+            return
+        async with self._lock:
+            # Requests that queued behind a refresh find the graph fresh
+            if self._fresh(max_age):
+                return
+            await self._refresh(db, full=False)
+
+    async def refresh(self, db: AsyncSession, full: bool = False) -> Dict[str, float]:
+        """Pull papers and resolved edges added since the last refresh.
+
+        ``full`` discards the current graph first, which is the only way to
+        drop edges or papers that were deleted from the database.
+        """
+        async with self._lock:
+            return await self._refresh(db, full)
+
+    async def _refresh(self, db: AsyncSession, full: bool) -> Dict[str, float]:
+        started = time.perf_counter()
+        if full or not self.loaded:
+            paper_ids, pmids = np.empty(0, dtype=np.int64), []
+            edge_src, edge_dst = np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+            watermark = None
+        else:
+            paper_ids, pmids = self.paper_ids, list(self.pmids)
+            edge_src, edge_dst = self._edge_src, self._edge_dst
+            watermark = self._watermark
+
+        after = int(paper_ids.max()) if len(paper_ids) else 0
+        new_ids, new_pmids = await self._fetch_papers(db, _LOAD_PAPERS, {"after": after})
+
+        if watermark is None:
+            citing, cited, latest = await self._fetch_edges(db, _LOAD_ALL_EDGES, {})
+        else:
+            citing, cited, latest = await self._fetch_edges(
+                db, _LOAD_NEW_EDGES, {"since": watermark - self.REFRESH_OVERLAP}
+            )
+
+        paper_ids = np.concatenate([paper_ids, new_ids])
+        pmids.extend(new_pmids)
+
+        # Papers committed out of id order are picked up via their edges
+        missing = np.setdiff1d(np.concatenate([citing, cited]), paper_ids)
+        if missing.size:
+            late_ids, late_pmids = await self._fetch_papers(
+                db, _LOAD_PAPERS_BY_ID, {"ids": missing.tolist()}
+            )
+            paper_ids = np.concatenate([paper_ids, late_ids])
+            pmids.extend(late_pmids)
+
+        loop = asyncio.get_running_loop()
+        built = await loop.run_in_executor(
+            None, self._build, paper_ids, citing, cited, edge_src, edge_dst
+        )
+
+        node_by_pmid = self._node_by_pmid if not full and self.loaded else {}
+        for node in range(len(node_by_pmid), len(pmids)):
+            node_by_pmid[pmids[node]] = node
+
+        (
+            self._sorted_ids, self._sorted_nodes,
+            self._edge_src, self._edge_dst,
+            self.out_indptr, self.out_indices,
+            self.in_indptr, self.in_indices,
+        ) = built
+        self.paper_ids = paper_ids
+        self.pmids = pmids
+        self._node_by_pmid = node_by_pmid
+        self._watermark = max(filter(None, (watermark, latest)), default=None)
+        self._pagerank = {}
+        self.version += 1
+        self.refreshed_at = time.time()
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Citation graph refreshed: {self.node_count} papers, "
+            f"{self.edge_count} edges in {elapsed:.2f}s"
+        )
+        return {
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "new_papers": len(new_ids),
+            "edges_read": len(citing),
+            "seconds": elapsed,
+        }
+
+    @staticmethod
+    async def _fetch_papers(db: AsyncSession, stmt, params) -> Tuple[np.ndarray, List[str]]:
+        result = await db.execute(stmt, params)
+        rows = result.all()
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        return ids, [row[1] for row in rows]
+
+    @staticmethod
+    async def _fetch_edges(db: AsyncSession, stmt, params) -> Tuple[np.ndarray, np.ndarray, Optional[datetime]]:
+        """Stream edges in partitions so millions of rows never sit in tuples at once"""
+        citing_parts, cited_parts = [], []
+        latest = None
+        result = await db.stream(stmt, params)
+        async for partition in result.partitions(100_000):
+            citing_parts.append(np.fromiter((row[0] for row in partition), dtype=np.int64, count=len(partition)))
+            cited_parts.append(np.fromiter((row[1] for row in partition), dtype=np.int64, count=len(partition)))
+            resolved = [row[2] for row in partition if row[2] is not None]
+            if resolved:
+                latest = max(latest, max(resolved)) if latest else max(resolved)
+        if not citing_parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, latest
+        return np.concatenate(citing_parts), np.concatenate(cited_parts), latest
+
+    @staticmethod
+    def _build(paper_ids, citing, cited, edge_src, edge_dst):
+        n = len(paper_ids)
+        sorted_order = np.argsort(paper_ids, kind="stable")
+        sorted_ids = paper_ids[sorted_order]
+
+        if n:
+            # Edges to papers deleted since they were read are dropped
+            src_pos = np.minimum(np.searchsorted(sorted_ids, citing), n - 1)
+            dst_pos = np.minimum(np.searchsorted(sorted_ids, cited), n - 1)
+            valid = (sorted_ids[src_pos] == citing) & (sorted_ids[dst_pos] == cited)
+            src = sorted_order[src_pos[valid]].astype(np.int64)
+            dst = sorted_order[dst_pos[valid]].astype(np.int64)
+
+            # Merge with existing edges and drop the ones the overlap re-read
+            keys = np.unique(np.concatenate([
+                edge_src.astype(np.int64) * n + edge_dst,
+                src * n + dst,
+            ]))
+            edge_src = (keys // n).astype(np.int32)
+            edge_dst = (keys % n).astype(np.int32)
+
+        out_indptr, out_indices = _csr(edge_src, edge_dst, n)
+        in_indptr, in_indices = _csr(edge_dst, edge_src, n)
+        return (
+            sorted_ids, sorted_order.astype(np.int32),
+            edge_src, edge_dst,
+            out_indptr, out_indices,
+            in_indptr, in_indices,
+        )
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def node(self, pmid: str) -> Optional[int]:
+        return self._node_by_pmid.get(pmid)
+
+    def nodes(self, pmids: List[str]) -> np.ndarray:
+        """Node ids for the PMIDs present in the graph, others are skipped"""
+        found = [self._node_by_pmid.get(pmid) for pmid in pmids]
+        return np.array([node for node in found if node is not None], dtype=np.int32)
+
+    def pmids_of(self, nodes: np.ndarray) -> List[str]:
+        return [self.pmids[node] for node in nodes]
+
+    def out_neighbors(self, node: int) -> np.ndarray:
+        return self.out_indices[self.out_indptr[node]:self.out_indptr[node + 1]]
+
+    def in_neighbors(self, node: int) -> np.ndarray:
+        return self.in_indices[self.in_indptr[node]:self.in_indptr[node + 1]]
+
+    def in_degree(self, nodes: Optional[np.ndarray] = None) -> np.ndarray:
+        degree = np.diff(self.in_indptr)
+        return degree if nodes is None else degree[nodes]
+
+    def out_degree(self, nodes: Optional[np.ndarray] = None) -> np.ndarray:
+        degree = np.diff(self.out_indptr)
+        return degree if nodes is None else degree[nodes]
+
+    # ------------------------------------------------------------------
+    # Traversal and ranking
+    # ------------------------------------------------------------------
+
+    def _expand(self, frontier: np.ndarray, direction: str) -> np.ndarray:
+        if direction == "out":
+            return _gather(self.out_indptr, self.out_indices, frontier)[0]
+        if direction == "in":
+            return _gather(self.in_indptr, self.in_indices, frontier)[0]
+        return np.concatenate([
+            _gather(self.out_indptr, self.out_indices, frontier)[0],
+            _gather(self.in_indptr, self.in_indices, frontier)[0],
+        ])
+
+    def neighborhood(self, node: int, hops: int = 2, direction: str = "both") -> Tuple[np.ndarray, np.ndarray]:
+        """Breadth-first expansion up to ``hops``, returning (nodes, hop distance)"""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+
+        visited = np.zeros(self.node_count, dtype=bool)
+        visited[node] = True
+        frontier = np.array([node], dtype=np.int32)
+        reached, distances = [], []
+        for hop in range(1, hops + 1):
+            candidates = np.unique(self._expand(frontier, direction))
+            frontier = candidates[~visited[candidates]]
+            if frontier.size == 0:
+                break
+            visited[frontier] = True
+            reached.append(frontier)
+            distances.append(np.full(frontier.size, hop, dtype=np.int32))
+
+        if not reached:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        return np.concatenate(reached), np.concatenate(distances)
+
+    def co_citations(self, node: int, limit: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """Papers cited together with ``node``, by number of shared citing papers"""
+        cocited = _gather(self.out_indptr, self.out_indices, self.in_neighbors(node))[0]
+        return _top_counts(cocited[cocited != node], limit)
+
+    def bibliographic_coupling(self, node: int, limit: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """Papers citing the same references as ``node``, by number of shared references"""
+        coupled = _gather(self.in_indptr, self.in_indices, self.out_neighbors(node))[0]
+        return _top_counts(coupled[coupled != node], limit)
+
+    def co_citation_within(self, nodes: np.ndarray) -> np.ndarray:
+        """For each node, how often it is co-cited with the other ``nodes``.
+
+        Every paper citing m of the given nodes adds m - 1 to each of them.
+        """
+        if nodes.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        citing, owners = _gather(self.in_indptr, self.in_indices, nodes)
+        if citing.size == 0:
+            return np.zeros(nodes.size, dtype=np.int64)
+        _, inverse, per_citing = np.unique(citing, return_inverse=True, return_counts=True)
+        return np.bincount(owners, weights=per_citing[inverse] - 1, minlength=nodes.size).astype(np.int64)
+
+    def pagerank(self, damping: float = 0.85, tol: float = 1e-6, max_iter: int = 100) -> np.ndarray:
+        """Power-iteration PageRank, cached until the next refresh.
+
+        ``damping`` is rounded to two decimals and only the last
+        PAGERANK_CACHE_SIZE results are kept, so callers cannot grow the cache.
+        """
+        damping = round(damping, 2)
+        cached = self._cached_pagerank(damping)
+        if cached is not None:
+            return cached
+        rank = _power_iteration(self.out_indptr, self.out_indices, damping, tol, max_iter)
+        self._store_pagerank(damping, rank)
+        return rank
+
+    async def pagerank_async(self, damping: float = 0.85) -> np.ndarray:
+        """``pagerank`` computed in a worker thread, off the event loop"""
+        damping = round(damping, 2)
+        loop = asyncio.get_running_loop()
+        while True:
+            cached = self._cached_pagerank(damping)
+            if cached is not None:
+                return cached
+            version, indptr, indices = self.version, self.out_indptr, self.out_indices
+            rank = await loop.run_in_executor(None, _power_iteration, indptr, indices, damping)
+            # A refresh during the iteration leaves ``rank`` sized for the old graph
+            if self.version == version:
+                self._store_pagerank(damping, rank)
+                return rank
+
+    def _cached_pagerank(self, damping: float) -> Optional[np.ndarray]:
+        rank = self._pagerank.pop(damping, None)
+        if rank is not None:
+            self._pagerank[damping] = rank
+        return rank
+
+    def _store_pagerank(self, damping: float, rank: np.ndarray) -> None:
+        self._pagerank[damping] = rank
+        while len(self._pagerank) > self.PAGERANK_CACHE_SIZE:
+            del self._pagerank[next(iter(self._pagerank))]
+
+    def stats(self) -> Dict[str, object]:
+        arrays = (
+            self.paper_ids, self._sorted_ids, self._sorted_nodes,
+            self._edge_src, self._edge_dst,
+            self.out_indptr, self.out_indices, self.in_indptr, self.in_indices,
+        )
+        return {
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "version": self.version,
+            "refreshed_at": datetime.utcfromtimestamp(self.refreshed_at) if self.refreshed_at else None,
+            "watermark": self._watermark,
+            "array_bytes": int(sum(array.nbytes for array in arrays)),
+        }
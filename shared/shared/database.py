@@ -0,0 +1,177 @@
+# Description: Async engine and session factory shared by the services, with pool metrics
+import os
+import ssl
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+try:
+    from dotenv import load_dotenv
+except ImportError:  # .env files are optional
+    load_dotenv = None
+
+SSL_MODES = ("disable", "require", "verify")
+
+
+class PoolStats:
+    """Checkout counters of one connection pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that times every checkout, including waits for a free connection.
+
+    ``stats`` is set on a subclass per engine, so it survives the pool being
+    recreated after a disconnect.
+    """
+
+    stats: PoolStats
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+
+class Database:
+    """One async engine and its session factory.
+
+    Every service builds it from the same DB_* environment variables, see
+    ``from_env``. The asyncpg prepared statement cache is kept per
+    connection, so repeated queries skip parse and plan; set
+    ``statement_cache_size`` to 0 behind PgBouncer in transaction mode.
+    """
+
+    def __init__(
+        self,
+        url: URL,
+        ssl_mode: str = "require",
+        echo: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = 1800,
+        pool_pre_ping: bool = True,
+        statement_cache_size: int = 500,
+        command_timeout: Optional[float] = None
+    ):
+        if ssl_mode not in SSL_MODES:
+            raise ValueError(f"DB_SSL must be one of {', '.join(SSL_MODES)}")
+        self.url = url
+        self.ssl_mode = ssl_mode
+        self.stats = PoolStats()
+        connect_args: Dict[str, Any] = {"statement_cache_size": statement_cache_size}
+        if ssl_mode != "disable":
+            context = ssl.create_default_context()
+            if ssl_mode == "require":
+                # Managed Postgres hands out self-signed certificates
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            connect_args["ssl"] = context
+        if command_timeout:
+            connect_args["command_timeout"] = command_timeout
+
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.engine: AsyncEngine = create_async_engine(
+            url.update_query_dict({"prepared_statement_cache_size": str(statement_cache_size)}),
+            echo=echo,
+            poolclass=type("InstrumentedPool", (InstrumentedPool,), {"stats": self.stats}),
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+            connect_args=connect_args
+        )
+        self.session_factory = sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+
+    @classmethod
+    def from_env(cls) -> "Database":
+        if load_dotenv is not None:
+            load_dotenv()
+        url = URL.create(
+            "postgresql+asyncpg",
+            username=os.getenv("DB_USER", ""),
+            password=os.getenv("DB_PASSWORD", ""),
+            host=os.getenv("DB_HOST", ""),
+            port=int(os.getenv("DB_PORT") or 5432),
+            database=os.getenv("DB_NAME", "")
+        )
+        command_timeout = os.getenv("DB_COMMAND_TIMEOUT")
+        return cls(
+            url,
+            ssl_mode=os.getenv("DB_SSL", "require"),
+            echo=os.getenv("DB_ECHO", "false").lower() == "true",
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+            statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500")),
+            command_timeout=float(command_timeout) if command_timeout else None
+        )
+
+    def session(self) -> AsyncSession:
+        return self.session_factory()
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Connections in use and idle, and how long checkouts waited for one"""
+        pool = self.engine.sync_engine.pool
+        stats = self.stats
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # Counted from -pool_size, so negative until the pool is full
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": stats.checkouts,
+            "checkout_timeouts": stats.timeouts,
+            "avg_checkout_wait_ms": stats.wait_seconds / stats.checkouts * 1000 if stats.checkouts else 0.0,
+            "max_checkout_wait_ms": stats.max_wait_seconds * 1000,
+        }
+
+
+_database: Optional[Database] = None
+
+
+def get_database() -> Database:
+    """The process-wide database, created from the environment on first use"""
+    global _database
+    if _database is None:
+        _database = Database.from_env()
+    return _database
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency yielding a session that is closed after the request"""
+    async with get_database().session() as session:
+        yield session
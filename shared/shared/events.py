@@ -0,0 +1,354 @@
+# Description: Paper change events through the paper_events outbox and LISTEN/NOTIFY
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "paper_events"
+
+_PUBLISH = text("""
+    INSERT INTO paper_events (paper_id, pmid, event_type, created_at)
+    SELECT e.paper_id, e.pmid, :event_type, now() AT TIME ZONE 'utc'
+    FROM unnest(CAST(:paper_ids AS integer[]), CAST(:pmids AS varchar[])) AS e(paper_id, pmid)
+""")
+_ENSURE_CONSUMER = text("""
+    INSERT INTO event_consumers (name, last_txid, last_event_id, updated_at)
+    VALUES (:name, 0, 0, now() AT TIME ZONE 'utc')
+    ON CONFLICT (name) DO NOTHING
+""")
+# Replicas of one consumer take turns: the holder of the session-level lock
+# handles the next batches. No row lock, so no transaction spans the handler.
+_TRY_LOCK = text("SELECT pg_try_advisory_lock(hashtext(:channel), hashtext(:name))")
+_UNLOCK = text("SELECT pg_advisory_unlock(hashtext(:channel), hashtext(:name))")
+_POSITION = text("SELECT last_txid, last_event_id FROM event_consumers WHERE name = :name")
+# Only events of transactions older than every running one, so an event
+# committed late can never land behind the cursor
+_NEXT_EVENTS = text("""
+    SELECT txid, id, pmid, created_at FROM paper_events
+    WHERE (txid, id) > (:txid, :id)
+      AND txid < txid_snapshot_xmin(txid_current_snapshot())
+    ORDER BY txid, id
+    LIMIT :limit
+""")
+# Committed events the xmin rule still holds back because an older
+# transaction is open; their commit sent a NOTIFY that has already passed
+_HELD_BACK = text("""
+    SELECT EXISTS (
+        SELECT 1 FROM paper_events
+        WHERE (txid, id) > (CAST(:txid AS bigint), CAST(:id AS bigint))
+          AND txid >= txid_snapshot_xmin(txid_current_snapshot())
+    )
+""")
+# Never backwards, in case a replica that lost its lock finishes a batch late
+_ADVANCE = text("""
+    UPDATE event_consumers
+    SET last_txid = :txid, last_event_id = :id, updated_at = now() AT TIME ZONE 'utc'
+    WHERE name = :name AND (last_txid, last_event_id) < (CAST(:txid AS bigint), CAST(:id AS bigint))
+""")
+_LAG = text("""
+    SELECT count(*), min(created_at) FROM paper_events
+    WHERE (txid, id) > (CAST(:txid AS bigint), CAST(:id AS bigint))
+""")
+_PRUNE = text("""
+    DELETE FROM paper_events e
+    WHERE e.created_at < :before
+      AND NOT EXISTS (
+          SELECT 1 FROM event_consumers c WHERE (c.last_txid, c.last_event_id) < (e.txid, e.id)
+      )
+""")
+
+
+async def publish_paper_events(
+    session,
+    papers: Iterable[Tuple[int, str]],
+    event_type: str = "upserted"
+) -> int:
+    """Record events for (paper_id, pmid) pairs in the caller's transaction.
+
+    The paper_events trigger notifies listeners once the transaction commits.
+    """
+    papers = list(papers)
+    if not papers:
+        return 0
+    paper_ids, pmids = zip(*papers)
+    await session.execute(_PUBLISH, {
+        "event_type": event_type,
+        "paper_ids": list(paper_ids),
+        "pmids": list(pmids),
+    })
+    return len(papers)
+
+
+class PaperEventSubscriber:
+    """Feeds paper events to ``handler`` in small batches, at least once.
+
+    A LISTEN connection wakes the subscriber as soon as events are committed;
+    when it cannot be held, or a long transaction elsewhere holds events
+    back, the outbox is polled every ``fallback_poll_interval`` seconds
+    instead. Each consumer name keeps its position in event_consumers and
+    only moves it after ``handler`` returns, so a failed or interrupted batch
+    is delivered again and handlers must be idempotent. The handler runs
+    outside any transaction; replicas of a consumer take turns through an
+    advisory lock. Handlers get the batch's distinct PMIDs.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[List[str]], Awaitable[Any]],
+        engine,
+        session_factory,
+        batch_size: int = 50,
+        poll_interval: float = 60.0,
+        fallback_poll_interval: float = 5.0,
+        retention_days: float = 7.0,
+        max_retry_delay: float = 60.0
+    ):
+        self.name = name
+        self.handler = handler
+        self.engine = engine
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.fallback_poll_interval = fallback_poll_interval
+        self.retention = timedelta(days=retention_days)
+        self.max_retry_delay = max_retry_delay
+        # Created in run(), on the loop that waits on it
+        self._wakeup: Optional[asyncio.Event] = None
+        self._listener = None
+        self._lost_listener = None
+        self._listen_retry_at = 0.0
+        self._position: Tuple[int, int] = (0, 0)
+        self._held_back = False
+        self._lag_checked_at = 0.0
+        self._pruned_at = 0.0
+        self._stats: Dict[str, Any] = {
+            "active": False,
+            "notifications": 0,
+            "events": 0,
+            "batches": 0,
+            "errors": 0,
+            "consecutive_errors": 0,
+            "last_error": None,
+            "handler_seconds": 0.0,
+            "last_batch_at": None,
+            "lag_events": None,
+            "lag_seconds": None,
+            "held_back": False,
+        }
+
+    @classmethod
+    def from_env(cls, name: str, handler, engine, session_factory) -> "PaperEventSubscriber":
+        return cls(
+            name,
+            handler,
+            engine,
+            session_factory,
+            batch_size=int(os.getenv("PAPER_EVENTS_BATCH_SIZE", "50")),
+            poll_interval=float(os.getenv("PAPER_EVENTS_POLL_INTERVAL", "60")),
+            fallback_poll_interval=float(os.getenv("PAPER_EVENTS_FALLBACK_POLL_INTERVAL", "5")),
+            retention_days=float(os.getenv("PAPER_EVENTS_RETENTION_DAYS", "7"))
+        )
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        delay = 1.0
+        while True:
+            try:
+                await self._ensure_consumer()
+                break
+            except Exception as e:
+                logger.error(f"Event consumer {self.name} could not register: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+
+        try:
+            while True:
+                if self._listener is None and time.monotonic() >= self._listen_retry_at:
+                    await self._close(self._lost_listener)
+                    self._lost_listener = None
+                    await self._listen()
+                # Cleared before reading, so a commit during the batch still wakes us
+                self._wakeup.clear()
+                try:
+                    await self._drain()
+                    self._stats["consecutive_errors"] = 0
+                except Exception as e:
+                    self._stats["errors"] += 1
+                    self._stats["consecutive_errors"] += 1
+                    self._stats["last_error"] = str(e)
+                    delay = min(2 ** self._stats["consecutive_errors"], self.max_retry_delay)
+                    logger.error(f"Event consumer {self.name} failed, retrying in {delay}s: {str(e)}")
+                    await asyncio.sleep(delay)
+                    continue
+                await self._prune()
+                listening = self._listener is not None and not self._held_back
+                interval = self.poll_interval if listening else self.fallback_poll_interval
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self._unlisten()
+
+    async def _ensure_consumer(self) -> None:
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.execute(_ENSURE_CONSUMER, {"name": self.name})
+
+    async def _listen(self) -> None:
+        try:
+            connection = await self.engine.connect()
+            try:
+                raw = await connection.get_raw_connection()
+                driver = raw.driver_connection
+                await driver.add_listener(CHANNEL, self._notified)
+                driver.add_termination_listener(self._lost)
+            except Exception:
+                await connection.close()
+                raise
+            self._listener = connection
+            logger.info(f"Event consumer {self.name} listening on {CHANNEL}")
+        except Exception as e:
+            self._listen_retry_at = time.monotonic() + self.poll_interval
+            logger.warning(
+                f"Event consumer {self.name} cannot LISTEN, polling every "
+                f"{self.fallback_poll_interval}s: {str(e)}"
+            )
+
+    async def _unlisten(self) -> None:
+        connection, self._listener = self._listener, None
+        await self._close(connection)
+        await self._close(self._lost_listener)
+        self._lost_listener = None
+
+    @staticmethod
+    async def _close(connection) -> None:
+        if connection is None:
+            return
+        # Discarded rather than pooled, so no later user inherits the listener
+        try:
+            await connection.invalidate()
+            await connection.close()
+        except Exception as e:
+            logger.debug(f"Closing LISTEN connection failed: {str(e)}")
+
+    def _notified(self, connection, pid, channel, payload) -> None:
+        self._stats["notifications"] += 1
+        self._wakeup.set()
+
+    def _lost(self, connection) -> None:
+        logger.warning(f"Event consumer {self.name} lost its LISTEN connection, polling until it is back")
+        self._lost_listener, self._listener = self._listener, None
+        self._wakeup.set()
+
+    async def _drain(self) -> None:
+        """Hand batches to the handler until the consumer is caught up"""
+        async with self.engine.connect() as lock:
+            params = {"channel": CHANNEL, "name": self.name}
+            acquired = (await lock.execute(_TRY_LOCK, params)).scalar()
+            await lock.commit()
+            # Another replica holds the consumer; it will handle these events
+            self._stats["active"] = bool(acquired)
+            if not acquired:
+                return
+            try:
+                while True:
+                    events = await self._next_events()
+                    if events:
+                        pmids = list(dict.fromkeys(event.pmid for event in events))
+                        started = time.perf_counter()
+                        await self.handler(pmids)
+                        self._stats["handler_seconds"] += time.perf_counter() - started
+                        await self._advance(events[-1], force_lag=len(events) < self.batch_size)
+                        self._stats["events"] += len(events)
+                        self._stats["batches"] += 1
+                        self._stats["last_batch_at"] = datetime.utcnow()
+                    if len(events) < self.batch_size:
+                        if not events:
+                            await self._settle()
+                        return
+            finally:
+                await self._unlock(lock, params)
+
+    async def _unlock(self, lock, params: Dict[str, str]) -> None:
+        try:
+            await lock.execute(_UNLOCK, params)
+            await lock.commit()
+        except BaseException:
+            # A pooled connection must never keep holding the lock
+            await self._close(lock)
+            raise
+
+    async def _next_events(self) -> list:
+        """The next batch after the stored position, in a short read-only transaction"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                row = (await session.execute(_POSITION, {"name": self.name})).one()
+                self._position = (row[0], row[1])
+                return (await session.execute(_NEXT_EVENTS, {
+                    "txid": row[0], "id": row[1], "limit": self.batch_size
+                })).all()
+
+    async def _advance(self, last, force_lag: bool = False) -> None:
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.execute(_ADVANCE, {"name": self.name, "txid": last.txid, "id": last.id})
+                self._position = (last.txid, last.id)
+                await self._measure_lag(session, force=force_lag)
+                if force_lag:
+                    await self._check_held_back(session)
+
+    async def _settle(self) -> None:
+        """Lag and held back events once nothing more can be read"""
+        async with self.session_factory() as session:
+            async with session.begin():
+                await self._measure_lag(session, force=True)
+                await self._check_held_back(session)
+
+    async def _check_held_back(self, session) -> None:
+        self._held_back = bool((await session.execute(_HELD_BACK, {
+            "txid": self._position[0], "id": self._position[1]
+        })).scalar())
+        self._stats["held_back"] = self._held_back
+
+    async def _measure_lag(self, session, force: bool = False) -> None:
+        # Counting a long backlog is not free, so not after every batch
+        if not force and time.monotonic() - self._lag_checked_at < 10:
+            return
+        self._lag_checked_at = time.monotonic()
+        count, oldest = (await session.execute(_LAG, {
+            "txid": self._position[0], "id": self._position[1]
+        })).one()
+        self._stats["lag_events"] = count
+        self._stats["lag_seconds"] = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+    async def _prune(self) -> None:
+        """Drop events every consumer has handled once they are past retention"""
+        if time.monotonic() - self._pruned_at < 3600:
+            return
+        self._pruned_at = time.monotonic()
+        try:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    result = await session.execute(_PRUNE, {"before": datetime.utcnow() - self.retention})
+            if result.rowcount:
+                logger.info(f"Pruned {result.rowcount} handled paper events")
+        except Exception as e:
+            logger.warning(f"Pruning paper events failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._stats["batches"]
+        return {
+            "consumer": self.name,
+            "listening": self._listener is not None,
+            "position": {"txid": self._position[0], "event_id": self._position[1]},
+            "avg_batch_ms": self._stats["handler_seconds"] / batches * 1000 if batches else 0.0,
+            **self._stats,
+        }
@@ -1,5 +1,13 @@
 # Desc: Import all models from shared/shared/models
-from .paper import Paper, Base, paper_authors  # Remove citations
+from .paper import Paper, Base, paper_authors, paper_citations
 from .author import Author
+from .ingestion_job import IngestionJob, IngestionJobItem
+from .dedup import PaperSignature, PaperLSHBucket
+from .processed_document import ProcessedDocument, Entity, PaperEntity
+from .paper_event import PaperEvent, EventConsumer
 
-__all__ = ['Paper', 'Author', 'Base', 'paper_authors']
\ No newline at end of file
+__all__ = [
+    'Paper', 'Author', 'Base', 'paper_authors', 'paper_citations',
+    'IngestionJob', 'IngestionJobItem', 'PaperSignature', 'PaperLSHBucket',
+    'ProcessedDocument', 'Entity', 'PaperEntity', 'PaperEvent', 'EventConsumer'
+]
\ No newline at end of file
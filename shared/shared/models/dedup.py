@@ -0,0 +1,21 @@
+# Description: MinHash signatures, LSH buckets and duplicate clusters of papers
+from datetime import datetime
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, Float, LargeBinary, DateTime, ForeignKey
+from .paper import Base
+
+class PaperSignature(Base):
+    __tablename__ = 'paper_signatures'
+
+    paper_id = Column(Integer, ForeignKey('papers.id', ondelete='CASCADE'), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)
+    # Canonical paper of the near-duplicate cluster; equals paper_id for originals
+    cluster_id = Column(Integer, ForeignKey('papers.id', ondelete='CASCADE'), nullable=False, index=True)
+    similarity = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class PaperLSHBucket(Base):
+    __tablename__ = 'paper_lsh_buckets'
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    paper_id = Column(Integer, ForeignKey('papers.id', ondelete='CASCADE'), primary_key=True)
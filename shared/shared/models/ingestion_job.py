@@ -0,0 +1,49 @@
+# Description: Durable ingestion jobs and their per-PMID checkpoints
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from .paper import Base
+
+class IngestionJob(Base):
+    __tablename__ = 'ingestion_jobs'
+
+    id = Column(Integer, primary_key=True)
+    query = Column(Text, nullable=False)
+    limit = Column(Integer, nullable=False)
+    # queued -> running -> completed | failed
+    status = Column(String(20), nullable=False, default='queued', index=True)
+    total_items = Column(Integer, nullable=False, default=0)
+    completed_items = Column(Integer, nullable=False, default=0)
+    failed_items = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(255), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    searched_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    items = relationship(
+        "IngestionJobItem",
+        back_populates="job",
+        cascade="all, delete-orphan"
+    )
+
+class IngestionJobItem(Base):
+    __tablename__ = 'ingestion_job_items'
+    __table_args__ = (
+        Index('ix_ingestion_job_items_ready', 'job_id', 'status', 'next_attempt_at'),
+    )
+
+    job_id = Column(Integer, ForeignKey('ingestion_jobs.id', ondelete='CASCADE'), primary_key=True)
+    pmid = Column(String(20), primary_key=True)
+    # pending -> done | failed
+    status = Column(String(20), nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    paper_id = Column(Integer, ForeignKey('papers.id', ondelete='SET NULL'), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    job = relationship("IngestionJob", back_populates="items")
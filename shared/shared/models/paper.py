@@ -1,21 +1,44 @@
 # Description: Define the Paper model
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Table, ForeignKey
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import Column, Computed, Integer, String, Text, DateTime, Table, ForeignKey, UniqueConstraint, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship, declarative_base
 
 Base = declarative_base()
 
 # Define tables first
 paper_authors = Table(
     'paper_authors', Base.metadata,
-    Column('paper_id', Integer, ForeignKey('papers.id')),
-    Column('author_id', Integer, ForeignKey('authors.id'))
+    Column('paper_id', Integer, ForeignKey('papers.id'), primary_key=True),
+    Column('author_id', Integer, ForeignKey('authors.id'), primary_key=True),
+    # The primary key serves paper -> authors, this one author -> papers
+    Index('ix_paper_authors_author_id', 'author_id')
 )
 
+# Edges are written as soon as the citing paper is stored. The cited side is
+# keyed by PubMed ID and stays pending (cited_paper_id IS NULL) until that
+# paper is ingested and the resolver links it.
 paper_citations = Table(
     'paper_citations', Base.metadata,
     Column('citing_paper_id', Integer, ForeignKey('papers.id', ondelete='CASCADE')),
-    Column('cited_paper_id', Integer, ForeignKey('papers.id', ondelete='CASCADE'))
+    Column('cited_paper_id', Integer, ForeignKey('papers.id', ondelete='CASCADE')),
+    Column('cited_pmid', String(20), nullable=True),
+    Column('resolved_at', DateTime, nullable=True),
+    UniqueConstraint('citing_paper_id', 'cited_pmid', name='uq_paper_citations_citing_cited_pmid'),
+    Index(
+        'ix_paper_citations_pending_cited_pmid', 'cited_pmid',
+        postgresql_where=text('cited_paper_id IS NULL')
+    ),
+    Index('ix_paper_citations_resolved_at', 'resolved_at'),
+    # In-edges and ON DELETE CASCADE from the cited side; the unique
+    # constraint already leads with citing_paper_id
+    Index('ix_paper_citations_cited_paper_id', 'cited_paper_id')
+)
+
+# Weighted document for full-text search: title matches rank above abstract ones
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(abstract, '')), 'B')"
 )
 
 class Paper(Base):
@@ -24,13 +47,16 @@ class Paper(Base):
     
     id = Column(Integer, primary_key=True)
     pmid = Column(String(20), unique=True, index=True, nullable=False)
+    pubmed_id = Column(String(20), unique=True, index=True, nullable=True)
     title = Column(Text, nullable=False)
     abstract = Column(Text, nullable=True)
     publication_date = Column(DateTime, nullable=True)
-    journal = Column(String(255), nullable=True)
+    journal = Column(String(255), nullable=True, index=True)
     full_text = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Maintained by Postgres; deferred so loading a paper does not read it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True)))
 
     # Relationships
     authors = relationship(
@@ -49,3 +75,12 @@ class Paper(Base):
         backref='cited_by',
         cascade="all, delete"
     )
+
+# Keyset pagination order for GET /papers?order_by=publication_date
+Index(
+    'ix_papers_publication_date_id',
+    Paper.publication_date.desc().nullslast(),
+    Paper.id.desc()
+)
+
+Index('ix_papers_search_vector', Paper.search_vector, postgresql_using='gin')
@@ -0,0 +1,29 @@
+# Description: Outbox of paper change events and the position of each consumer in it
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, text
+from .paper import Base
+
+class PaperEvent(Base):
+    """Written in the same transaction as the paper, so no committed change is lost"""
+    __tablename__ = 'paper_events'
+    __table_args__ = (
+        Index('ix_paper_events_txid_id', 'txid', 'id'),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    # Writing transaction; ids are handed out before commit, so consumers
+    # read in (txid, id) order and only from transactions that have ended
+    txid = Column(BigInteger, nullable=False, server_default=text('txid_current()'))
+    paper_id = Column(Integer, ForeignKey('papers.id', ondelete='CASCADE'), nullable=False)
+    pmid = Column(String(20), nullable=False)
+    event_type = Column(String(20), nullable=False, default='upserted')
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class EventConsumer(Base):
+    __tablename__ = 'event_consumers'
+
+    name = Column(String(100), primary_key=True)
+    # Position of the last event the consumer has handled
+    last_txid = Column(BigInteger, nullable=False, default=0)
+    last_event_id = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
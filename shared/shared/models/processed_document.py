@@ -0,0 +1,42 @@
+# Description: Entity extraction results of the document processor and the normalized entity tables
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from .paper import Base
+
+class ProcessedDocument(Base):
+    """One result per paper and mode, valid while version and content hash still match"""
+    __tablename__ = 'processed_documents'
+    __table_args__ = (
+        Index('ix_processed_documents_paper_mode', 'paper_id', 'mode'),
+    )
+
+    paper_id = Column(Integer, ForeignKey('papers.id', ondelete='CASCADE'), primary_key=True)
+    processor_version = Column(String(64), primary_key=True)
+    # sha256 of the exact text that was processed
+    content_hash = Column(String(64), primary_key=True)
+    mode = Column(String(20), nullable=False, default='abstract')
+    pmid = Column(String(20), nullable=False, index=True)
+    entities = Column(JSONB, nullable=False)
+    # Mode specific extras such as full-text entity counts and offsets
+    details = Column(JSONB, nullable=True)
+    text_length = Column(Integer, nullable=False)
+    processed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class Entity(Base):
+    __tablename__ = 'entities'
+    __table_args__ = (
+        UniqueConstraint('category', 'text', name='uq_entities_category_text'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    category = Column(String(50), nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class PaperEntity(Base):
+    __tablename__ = 'paper_entities'
+
+    paper_id = Column(Integer, ForeignKey('papers.id', ondelete='CASCADE'), primary_key=True)
+    entity_id = Column(Integer, ForeignKey('entities.id', ondelete='CASCADE'), primary_key=True, index=True)
+    mention_count = Column(Integer, nullable=False, default=1)